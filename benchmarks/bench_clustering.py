@@ -0,0 +1,120 @@
+"""
+Benchmark van de clustering-stap in trend_analysis.run_analysis.
+
+Vergelijkt HDBSCAN op de volledige vectoren (de huidige werkwijze) met varianten
+met L2-normalisatie, dimensiereductie (PCA/SVD/UMAP) en een ander HDBSCAN-algoritme.
+Per corpusgrootte en variant worden de rekentijd, het piekgeheugen (tracemalloc) en
+de overeenkomst met de huidige werkwijze (adjusted Rand index) gerapporteerd.
+
+Zonder --vec_dir worden synthetische embeddings gebruikt (normaal verdeelde clusters
+rond willekeurige centra in 384 dimensies, zoals all-MiniLM-L6-v2).
+
+Gebruik:
+    python benchmarks/bench_clustering.py --sizes 1000 5000 20000 --output bench_clustering.json
+    python benchmarks/bench_clustering.py --vec_dir articles_normalised --sizes 2000 10000
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+from sklearn.metrics import adjusted_rand_score
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clustering import cluster_vectors  # noqa: E402
+
+VARIANTS = {
+    "baseline": {},
+    "normalized": {"normalize": True},
+    "pca50": {"normalize": True, "reduce": "pca", "n_components": 50},
+    "svd50": {"normalize": True, "reduce": "svd", "n_components": 50},
+    "pca50_boruvka": {"normalize": True, "reduce": "pca", "n_components": 50,
+                      "algorithm": "boruvka_kdtree"},
+    "umap10": {"normalize": True, "reduce": "umap", "n_components": 10},
+}
+
+
+def synthetic_embeddings(n, dim=384, n_clusters=40, noise_fraction=0.3, seed=0):
+    """n vectoren: clusters rond willekeurige centra plus een deel ruis."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    n_noise = int(n * noise_fraction)
+    assignments = rng.integers(0, n_clusters, n - n_noise)
+    clustered = centers[assignments] + rng.normal(scale=0.6, size=(len(assignments), dim))
+    noise = rng.normal(scale=1.5, size=(n_noise, dim))
+    X = np.vstack([clustered, noise]).astype(np.float32)
+    return X[rng.permutation(n)]
+
+
+def load_store_embeddings(vec_dir, n, seed=0):
+    """Een willekeurige steekproef van n vectoren uit de EmbeddingStore in vec_dir."""
+    from embedding_store import EmbeddingStore
+    X, _, _ = EmbeddingStore(vec_dir).load()
+    if n < X.shape[0]:
+        X = X[np.random.default_rng(seed).choice(X.shape[0], n, replace=False)]
+    return X
+
+
+def run_variant(X, options, min_cluster_size, min_samples, core_dist_n_jobs):
+    tracemalloc.start()
+    start = time.perf_counter()
+    labels, _ = cluster_vectors(X, min_cluster_size, min_samples,
+                                core_dist_n_jobs=core_dist_n_jobs, **options)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return labels, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark van HDBSCAN met en zonder dimensiereductie.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000],
+                        help="Corpusgroottes (aantal vectoren).")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS),
+                        choices=list(VARIANTS), help="Te meten varianten.")
+    parser.add_argument("--vec_dir", default=None,
+                        help="Gebruik vectoren uit deze EmbeddingStore in plaats van synthetische.")
+    parser.add_argument("--min_cluster_size", type=int, default=3)
+    parser.add_argument("--min_samples", type=int, default=1)
+    parser.add_argument("--core_dist_n_jobs", type=int, default=4)
+    parser.add_argument("--output", default=None,
+                        help="Schrijf de resultaten als JSON naar dit bestand.")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        X = load_store_embeddings(args.vec_dir, n) if args.vec_dir else synthetic_embeddings(n)
+        baseline_labels = None
+        for name in ["baseline"] + [v for v in args.variants if v != "baseline"]:
+            try:
+                labels, elapsed, peak = run_variant(
+                    X, VARIANTS[name], args.min_cluster_size, args.min_samples, args.core_dist_n_jobs)
+            except ImportError as e:
+                print(f"Variant {name} overgeslagen: {e}")
+                continue
+            if baseline_labels is None:
+                baseline_labels = labels
+            result = {
+                "size": int(X.shape[0]),
+                "variant": name,
+                "seconds": elapsed,
+                "peak_mb": peak / 1e6,
+                "clusters": int(len(set(labels.tolist()) - {-1})),
+                "noise_fraction": float(np.mean(labels == -1)),
+                "ari_vs_baseline": float(adjusted_rand_score(baseline_labels, labels)),
+            }
+            results.append(result)
+            print(f"n={result['size']:>7} {name:<14} {elapsed:8.2f}s  piek {result['peak_mb']:8.1f} MB  "
+                  f"clusters {result['clusters']:>4}  ARI {result['ari_vs_baseline']:.3f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark van de opstarttijd van de scripts.
+
+Importeert elke module in een nieuw Python-proces met `python -X importtime` en
+rapporteert de totale importtijd plus de zwaarste afhankelijkheden, en meet de
+wandkloktijd van `<script> --help`. Zo is te zien of zware pakketten (pandas,
+hdbscan, sklearn, nltk, openai) nog bij het importeren geladen worden.
+
+Gebruik:
+    python benchmarks/bench_import_time.py --output bench_import_time.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MODULES = ["main", "trend_analysis", "llm_analysis", "normalize", "streaming_trends"]
+DEFAULT_SCRIPTS = ["main.py", "trend_analysis.py"]
+HEAVY_PACKAGES = ["pandas", "hdbscan", "sklearn", "scipy", "nltk", "openai", "sentence_transformers", "pyarrow"]
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module):
+    """Voert `import module` uit met -X importtime; retourneert {pakket: cumulatieve µs} en de totaaltijd."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "onbekende fout")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            cumulative[match.group(4)] = int(match.group(2))
+    return cumulative, cumulative.get(module, 0)
+
+
+def time_help(script, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, script, "--help"], cwd=REPO_ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Meet de importtijd van de modules en de opstarttijd van de scripts.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--scripts", nargs="+", default=DEFAULT_SCRIPTS)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Aantal herhalingen voor --help; de snelste run telt.")
+    parser.add_argument("--top", type=int, default=10,
+                        help="Aantal zwaarste imports per module in de uitvoer.")
+    parser.add_argument("--output", default=None,
+                        help="Schrijf de resultaten als JSON naar dit bestand.")
+    args = parser.parse_args()
+
+    results = {"modules": {}, "scripts": {}}
+    for module in args.modules:
+        try:
+            cumulative, total = import_profile(module)
+        except RuntimeError as e:
+            print(f"{module}: importeren mislukt ({e})")
+            results["modules"][module] = {"error": str(e)}
+            continue
+        heaviest = sorted(((name, us) for name, us in cumulative.items() if name != module),
+                          key=lambda item: item[1], reverse=True)[:args.top]
+        results["modules"][module] = {
+            "import_seconds": total / 1e6,
+            "heavy_packages_loaded": [p for p in HEAVY_PACKAGES if p in cumulative],
+            "heaviest": [{"module": name, "seconds": us / 1e6} for name, us in heaviest],
+        }
+        loaded = ", ".join(results["modules"][module]["heavy_packages_loaded"]) or "geen"
+        print(f"{module:<18} {total / 1e6:6.3f}s  zware pakketten geladen: {loaded}")
+    for script in args.scripts:
+        seconds = time_help(script, args.repeat)
+        results["scripts"][script] = {"help_seconds": seconds}
+        print(f"{script} --help: {seconds:.3f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark van het regelfilter in pull_articles.cleanup_text.
+
+Vergelijkt de oorspronkelijke implementatie (spell.unknown() per regel) met de
+LineFilter op een opgeslagen corpus: doorvoer (regels/s en MB/s) en of beide
+implementaties voor elke regel dezelfde keep/drop beslissing nemen.
+
+Gebruik:
+    python benchmarks/bench_line_filter.py --corpus ./data --output bench_line_filter.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spellchecker import SpellChecker  # noqa: E402
+
+from line_filter import LineFilter  # noqa: E402
+
+
+def reference_cleanup_text(spell, raw_text, min_letters=3, min_spell_ratio=0.5):
+    """De oorspronkelijke implementatie van cleanup_text, als referentie."""
+    lines = raw_text.splitlines()
+    cleaned_lines = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if sum(c.isalpha() for c in line) < min_letters:
+            continue
+        words = line.split()
+        if not words:
+            continue
+        lower_words = [w.lower() for w in words]
+        unknown = spell.unknown(lower_words)
+        recognized_count = len(words) - len(unknown)
+        ratio = recognized_count / len(words)
+        if ratio < min_spell_ratio:
+            continue
+        cleaned_lines.append(line)
+    return "\n".join(cleaned_lines)
+
+
+def load_corpus(path):
+    """Leest alle .txt bestanden onder path (of één bestand) in."""
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return [f.read()]
+    texts = []
+    for root, dirs, files in os.walk(path):
+        for file in sorted(files):
+            if file.endswith(".txt"):
+                with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                    texts.append(f.read())
+    return texts
+
+
+def time_run(fn, texts, repeat):
+    best = None
+    outputs = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = fn(texts)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark van cleanup_text: referentie versus LineFilter.")
+    parser.add_argument("--corpus", required=True,
+                        help="Map met .txt bestanden of één tekstbestand.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Aantal herhalingen; de snelste run telt.")
+    parser.add_argument("--output", default=None,
+                        help="Schrijf de resultaten als JSON naar dit bestand.")
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus)
+    if not texts:
+        raise SystemExit(f"Geen .txt bestanden gevonden in {args.corpus}")
+    n_lines = sum(len(t.splitlines()) for t in texts)
+    n_bytes = sum(len(t.encode("utf-8")) for t in texts)
+
+    start = time.perf_counter()
+    spell = SpellChecker(language='en')
+    reference_load = time.perf_counter() - start
+    start = time.perf_counter()
+    line_filter = LineFilter()
+    fast_load = time.perf_counter() - start
+
+    reference_time, reference_out = time_run(
+        lambda batch: [reference_cleanup_text(spell, t) for t in batch], texts, args.repeat)
+    fast_time, fast_out = time_run(
+        line_filter.filter_documents, texts, args.repeat)
+
+    mismatches = [i for i, (a, b) in enumerate(
+        zip(reference_out, fast_out)) if a != b]
+    kept_reference = sum(len(t.splitlines()) for t in reference_out if t)
+    kept_fast = sum(len(t.splitlines()) for t in fast_out if t)
+
+    results = {
+        "documents": len(texts),
+        "lines": n_lines,
+        "bytes": n_bytes,
+        "reference": {
+            "load_seconds": reference_load,
+            "seconds": reference_time,
+            "lines_per_second": n_lines / reference_time if reference_time else None,
+            "mb_per_second": n_bytes / 1e6 / reference_time if reference_time else None,
+            "kept_lines": kept_reference,
+        },
+        "line_filter": {
+            "load_seconds": fast_load,
+            "seconds": fast_time,
+            "lines_per_second": n_lines / fast_time if fast_time else None,
+            "mb_per_second": n_bytes / 1e6 / fast_time if fast_time else None,
+            "kept_lines": kept_fast,
+        },
+        "speedup": reference_time / fast_time if fast_time else None,
+        "mismatched_documents": len(mismatches),
+    }
+    print(json.dumps(results, indent=2))
+    if mismatches:
+        print(f"Let op: {len(mismatches)} documenten verschillen, bijvoorbeeld index {mismatches[:5]}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Benchmark van de hele pipeline op een synthetische corpus (zie synthetic_corpus.py).
+
+Per corpusgrootte wordt een corpus gegenereerd in --work_dir en worden gemeten:
+    load_vectors      trend_analysis.load_vectors over de hele periode
+    run_analysis      de stappen van run_analysis (via de instrumentatie), een keer koud
+                      (term-indexen worden opgebouwd) en een keer warm
+    llm               run_llm_analysis tegen de lokale testserver (fake_openai_server.py)
+    normalize         normalize.process_all_articles met een nep-embeddingmodel
+    text              normalize.clean_text en pull_articles.cleanup_text op een steekproef
+
+Het embeddingmodel en de LLM zijn vervangen door snelle stubs, zodat alleen de eigen
+code gemeten wordt. De resultaten (met Python-versie, platform en git-commit) gaan als
+JSON naar --output, zodat runs voor en na een wijziging te vergelijken zijn.
+
+Gebruik:
+    python benchmarks/bench_pipeline.py --sizes 1000 10000 --output bench_pipeline.json
+    python benchmarks/bench_pipeline.py --sizes 500000 --normalize_vectors --reduce pca \\
+        --hdbscan_algorithm boruvka_kdtree --stages load_vectors run_analysis
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import platform
+import argparse
+import subprocess
+from datetime import date
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from synthetic_corpus import generate_corpus  # noqa: E402
+from fake_openai_server import start_server  # noqa: E402
+from instrumentation import stats  # noqa: E402
+from clustering import add_clustering_arguments  # noqa: E402
+from nltk_resources import check_resources, add_nltk_argument  # noqa: E402
+from trend_analysis import NLTK_RESOURCES, load_vectors, parse_dates, run_analysis  # noqa: E402
+
+STAGES = ["load_vectors", "run_analysis", "llm", "normalize", "text"]
+
+
+class StubEmbeddingModel:
+    """Vervangt de SentenceTransformer: een vaste willekeurige vector per tekst (op basis van een hash)."""
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _vector(self, text):
+        seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+        return np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        if isinstance(texts, str):
+            return self._vector(texts)
+        return np.vstack([self._vector(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+def time_call(fn, repeat=1):
+    """(snelste tijd in seconden, resultaat van de laatste aanroep)."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "git_commit": commit}
+
+
+def analysis_args(args, corpus):
+    return argparse.Namespace(
+        vec_dir=corpus["vec_dir"], scraper_dir=corpus["data_dir"], corpus_dir=None,
+        start_date=corpus["start_date"], end_date=corpus["end_date"],
+        min_cluster_size=args.min_cluster_size, min_samples=args.min_samples, verbose=False,
+        reduce=args.reduce, n_components=args.n_components, normalize_vectors=args.normalize_vectors,
+        hdbscan_algorithm=args.hdbscan_algorithm, core_dist_n_jobs=args.core_dist_n_jobs)
+
+
+def sample_bodies(data_dir, n):
+    """De tekst (zonder header) van de eerste n ruwe artikelen."""
+    bodies = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(".txt"):
+                with open(os.path.join(root, file), "r", encoding="utf-8") as f:
+                    bodies.append(f.read().split("\n\n", 1)[-1])
+                if len(bodies) >= n:
+                    return bodies
+    return bodies
+
+
+def bench_text(data_dir, n, repeat):
+    from normalize import clean_text
+    from pull_articles import cleanup_text
+    bodies = sample_bodies(data_dir, n)
+    megabytes = sum(len(body.encode("utf-8")) for body in bodies) / 1e6
+    results = {"documents": len(bodies), "megabytes": megabytes}
+    for name, fn in (("clean_text", clean_text), ("cleanup_text", cleanup_text)):
+        seconds, _ = time_call(lambda: [fn(body) for body in bodies], repeat)
+        results[name] = {"seconds": seconds, "documents_per_second": len(bodies) / seconds,
+                         "megabytes_per_second": megabytes / seconds}
+    return results
+
+
+def bench_size(n, args, base_url):
+    work_dir = os.path.join(args.work_dir, f"corpus_{n}")
+    if os.path.exists(work_dir) and not args.reuse:
+        shutil.rmtree(work_dir)
+    result = {"articles": n}
+    seconds, corpus = time_call(lambda: generate_corpus(
+        work_dir, n, date.fromisoformat(args.start_date), args.per_day, args.topics, args.ai_fraction,
+        args.dim, args.vectors, args.seed))
+    result["generate_seconds"] = seconds
+    print(f"[{n}] corpus gegenereerd in {seconds:.1f}s")
+    start_dt, end_dt = parse_dates(corpus["start_date"], corpus["end_date"])
+
+    if "load_vectors" in args.stages:
+        seconds, (X, _) = time_call(lambda: load_vectors(corpus["vec_dir"], start_dt, end_dt), args.repeat)
+        result["load_vectors"] = {"seconds": seconds, "documents": int(X.shape[0])}
+        print(f"[{n}] load_vectors: {seconds:.3f}s")
+
+    analysis = None
+    if "run_analysis" in args.stages or "llm" in args.stages:
+        result["run_analysis"] = {}
+        for run in ("cold", "warm"):
+            stats.reset()
+            seconds, analysis = time_call(lambda: run_analysis(analysis_args(args, corpus)))
+            result["run_analysis"][run] = {"seconds": seconds, "stages": stats.summary()["stages"]}
+            print(f"[{n}] run_analysis ({run}): {seconds:.3f}s")
+
+    if "llm" in args.stages:
+        from llm_analysis import run_llm_analysis
+        trend_results, ai_cluster_docs, ai_cluster_files, ai_cluster_info = analysis
+        trend_info = {term: {"growth": growth, "month_dict": month_dict}
+                      for term, growth, month_dict in trend_results}
+        stats.reset()
+        seconds, _ = time_call(lambda: run_llm_analysis(
+            ai_cluster_docs, ai_cluster_files, {}, trend_info, ai_cluster_info,
+            max_concurrency=args.llm_concurrency, tokens_per_minute=0, base_url=base_url))
+        summary = stats.summary()
+        result["llm"] = {"seconds": seconds, "topics": len(ai_cluster_docs),
+                         "stages": summary["stages"], "per_topic": summary["topics"]}
+        print(f"[{n}] run_llm_analysis: {seconds:.3f}s voor {len(ai_cluster_docs)} topics")
+
+    if "normalize" in args.stages:
+        import normalize
+        normalize._model = StubEmbeddingModel(args.dim)
+        output_base = os.path.join(work_dir, "normalize_out")
+        shutil.rmtree(output_base, ignore_errors=True)
+        seconds, processed = time_call(lambda: normalize.process_all_articles(
+            corpus["data_dir"], output_base, workers=args.workers, full=True))
+        result["normalize"] = {"seconds": seconds, "documents": processed,
+                               "documents_per_second": processed / seconds if seconds else None}
+        print(f"[{n}] normalize: {seconds:.3f}s")
+
+    if "text" in args.stages:
+        result["text"] = bench_text(corpus["data_dir"], args.text_sample, args.repeat)
+        print(f"[{n}] clean_text: {result['text']['clean_text']['documents_per_second']:.0f} doc/s, "
+              f"cleanup_text: {result['text']['cleanup_text']['documents_per_second']:.0f} doc/s")
+
+    if not args.keep:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark van de pipeline op een synthetische corpus, met nep-embeddings en nep-LLM.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="Corpusgroottes in artikelen (bijvoorbeeld 1000 tot 500000).")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--work_dir", default=os.path.join(REPO_ROOT, "benchmarks", ".work"),
+                        help="Map voor de gegenereerde corpora.")
+    parser.add_argument("--keep", action="store_true",
+                        help="Bewaar de gegenereerde corpora na afloop.")
+    parser.add_argument("--reuse", action="store_true",
+                        help="Hergebruik een bewaarde corpus in work_dir (de term-indexen blijven dan warm).")
+    parser.add_argument("--start_date", default="2024-01-01")
+    parser.add_argument("--per_day", type=int, default=30)
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--ai_fraction", type=float, default=0.25)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--vectors", choices=["store", "vec", "both"], default="store",
+                        help="Lees de vectoren uit de EmbeddingStore of uit losse .vec bestanden.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min_cluster_size", type=int, default=15)
+    parser.add_argument("--min_samples", type=int, default=5)
+    add_clustering_arguments(parser)
+    add_nltk_argument(parser)
+    parser.add_argument("--llm_concurrency", type=int, default=4)
+    parser.add_argument("--llm_latency", type=float, default=0.0,
+                        help="Vertraging per aanroep van de testserver in seconden.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Aantal processen voor normalize (standaard alle cores).")
+    parser.add_argument("--text_sample", type=int, default=2000,
+                        help="Aantal artikelen voor de clean_text/cleanup_text benchmark.")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Herhalingen voor load_vectors en de tekstfuncties; de snelste run telt.")
+    parser.add_argument("--output", default=None,
+                        help="Schrijf de resultaten als JSON naar dit bestand.")
+    args = parser.parse_args()
+    check_resources(NLTK_RESOURCES, download=args.nltk_download)
+
+    server, base_url = start_server(latency=args.llm_latency)
+    results = {"environment": environment(), "config": vars(args), "sizes": {}}
+    try:
+        for n in args.sizes:
+            results["sizes"][str(n)] = bench_size(n, args, base_url)
+    finally:
+        server.shutdown()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Lokale, OpenAI-compatibele testserver voor de LLM-analyse.
+
+Beantwoordt POST /v1/chat/completions met een geldig LLMAnalysisOutput JSON-antwoord
+(gebaseerd op de topicgegevens in de prompt), na een instelbare vertraging. Bij een
+response_format met JSON-schema bevat het antwoord alleen de velden uit dat schema. Met
+--fail_rate geeft een deel van de aanroepen een 429 of 503 terug, om de herhalingen
+en het tokenbudget van run_llm_analysis te testen zonder API-kosten.
+
+Gebruik:
+    python benchmarks/fake_openai_server.py --port 8765 --latency 0.5 --fail_rate 0.2
+    python main.py ... --llm_base_url http://127.0.0.1:8765/v1
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def fake_analysis(user_prompt):
+    """Een geldig LLMAnalysisOutput antwoord op basis van de termen in de prompt."""
+    topic = re.search(r"Topic ID: (\S+)", user_prompt)
+    terms = re.search(r"Top 10 Terms: \[(.*?)\]", user_prompt)
+    term_list = re.findall(r"'([^']*)'", terms.group(1)) if terms else []
+    return {
+        "topic_title": f"Topic {topic.group(1) if topic else '?'}",
+        "important_terms": term_list[:5],
+        "trending_words": term_list[:5],
+        "sample_fragments": [],
+        "trend_summary": "Samenvatting van de testserver.",
+        "relevance_explanation": "Relevantie volgens de testserver.",
+        "article_names": [],
+        "terms_monthly_distribution": {},
+    }
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    stats = {"requests": 0, "failures": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        with self.stats_lock:
+            self.stats["requests"] += 1
+        time.sleep(self.latency)
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": {"message": "not found"}})
+            return
+        if random.random() < self.fail_rate:
+            with self.stats_lock:
+                self.stats["failures"] += 1
+            status = random.choice([429, 503])
+            self._send(status, {"error": {"message": "simulated failure", "type": "fake"}},
+                       headers={"retry-after": "0.1"})
+            return
+        messages = request.get("messages", [])
+        user_prompt = next((m["content"] for m in messages if m.get("role") == "user"), "")
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+        analysis = fake_analysis(user_prompt)
+        # Met structured output alleen de velden uit het gevraagde JSON-schema
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            properties = response_format["json_schema"]["schema"].get("properties", {})
+            analysis = {key: value for key, value in analysis.items() if key in properties}
+        content = json.dumps(analysis)
+        self._send(200, {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_tokens + len(content) // 4},
+        })
+
+
+def start_server(port=0, latency=0.0, fail_rate=0.0):
+    """Start de server in een achtergrondthread; retourneert (server, base_url)."""
+    handler = type("Handler", (FakeOpenAIHandler,), {
+        "latency": latency, "fail_rate": fail_rate,
+        "stats": {"requests": 0, "failures": 0}, "stats_lock": threading.Lock()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatibele testserver voor de LLM-analyse.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5,
+                        help="Vertraging per aanroep in seconden.")
+    parser.add_argument("--fail_rate", type=float, default=0.0,
+                        help="Aandeel aanroepen dat met 429 of 503 faalt.")
+    args = parser.parse_args()
+    server, base_url = start_server(args.port, args.latency, args.fail_rate)
+    print(f"Testserver draait op {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
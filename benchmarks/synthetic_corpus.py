@@ -0,0 +1,167 @@
+"""
+Generator van een synthetische, HackerNews-achtige corpus in exact de indeling van de pipeline.
+
+Schrijft onder --out_dir:
+    data/YYYY-MM/DATE_RANK.txt             ruwe artikelen met Title/URL/Score-header (pull_article_info.py)
+    data/scraped_data_<start>_<end>.csv    scores per artikel
+    articles_normalised/YYYY-MM/DATE_RANK.txt  genormaliseerde tekst (normalize.py)
+    articles_normalised/embeddings/        EmbeddingStore met geseede vectoren (--vectors store)
+    articles_normalised/YYYY-MM/DATE_RANK.txt.vec  losse vectoren in het oude formaat (--vectors vec)
+
+Elk artikel hoort bij één van --topics onderwerpen; een deel daarvan gaat over AI en
+gebruikt de AI-termen uit trend_analysis. De vectoren liggen rond een centrum per
+onderwerp, zodat HDBSCAN de onderwerpen terugvindt. Met dezelfde --seed is de corpus
+byte-voor-byte gelijk.
+
+Gebruik:
+    python benchmarks/synthetic_corpus.py --out_dir /tmp/corpus_10k --articles 10000
+"""
+import os
+import sys
+import csv
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_store import EmbeddingStore  # noqa: E402
+from trend_analysis import AI_KEYWORDS  # noqa: E402
+
+AI_TERMS = sorted(AI_KEYWORDS | {"network", "deep", "model", "models", "gpt", "chatgpt",
+                                 "training", "inference", "agents", "generative"})
+COMMON_WORDS = [
+    "people", "company", "government", "city", "system", "data", "software", "open", "source",
+    "security", "privacy", "users", "market", "research", "paper", "team", "product", "launch",
+    "release", "version", "performance", "hardware", "chip", "energy", "battery", "space",
+    "rocket", "science", "health", "medical", "court", "law", "regulation", "policy", "internet",
+    "browser", "web", "mobile", "phone", "apple", "google", "microsoft", "startup", "funding",
+    "investors", "engineers", "developers", "code", "programming", "language", "database",
+    "cloud", "server", "network", "attack", "vulnerability", "update", "feature", "design",
+    "history", "game", "video", "music", "book", "school", "students", "university", "climate",
+    "car", "electric", "transport", "bike", "housing", "rent", "prices", "economy", "jobs",
+    "work", "remote", "office", "money", "bank", "crypto", "bitcoin", "payment", "email",
+    "search", "social", "media", "news", "article", "report", "study", "results", "problem",
+]
+STOP_WORDS = ["the", "a", "of", "and", "to", "in", "is", "that", "for", "on", "with", "as", "it"]
+JUNK_LINES = ["Share this article", "Advertisement", "| | |", "Cookie settings", "Subscribe now"]
+BACKGROUND = np.array(COMMON_WORDS + STOP_WORDS)
+STOP_SET = np.array(STOP_WORDS)
+
+
+def topic_vocabularies(n_topics, ai_fraction, rng):
+    """Per onderwerp een woordenlijst (numpy array); de eerste onderwerpen gaan over AI."""
+    n_ai = max(1, int(round(n_topics * ai_fraction)))
+    vocabularies = []
+    for topic in range(n_topics):
+        words = list(rng.choice(COMMON_WORDS, size=12, replace=False))
+        if topic < n_ai:
+            words += list(rng.choice(AI_TERMS, size=8, replace=False))
+        vocabularies.append(np.array(words))
+    return vocabularies
+
+
+def article_text(vocabulary, rng, n_paragraphs):
+    """Ruwe tekst (met HTML en rommelregels) en de bijbehorende genormaliseerde tekst."""
+    lengths = rng.integers(30, 90, size=n_paragraphs)
+    n_words = int(lengths.sum())
+    words = np.where(rng.random(n_words) < 0.6,
+                     vocabulary[rng.integers(len(vocabulary), size=n_words)],
+                     BACKGROUND[rng.integers(len(BACKGROUND), size=n_words)])
+    cleaned = " ".join(words[~np.isin(words, STOP_SET)])
+    html = rng.random(n_paragraphs) < 0.2
+    junk = rng.random(n_paragraphs) < 0.3
+    paragraphs = []
+    for p, end in enumerate(np.cumsum(lengths)):
+        sentence = " ".join(words[end - lengths[p]:end]).capitalize() + "."
+        paragraphs.append(f"<p>{sentence}</p>" if html[p] else sentence)
+        if junk[p]:
+            paragraphs.append(JUNK_LINES[p % len(JUNK_LINES)])
+    return "\n".join(paragraphs), cleaned
+
+
+def generate_corpus(out_dir, n_articles, start=date(2024, 1, 1), per_day=30, n_topics=40, ai_fraction=0.25,
+                    dim=384, vectors="store", seed=0, batch_size=5000):
+    """
+    Schrijft een synthetische corpus van n_articles artikelen (per_day per dag vanaf
+    start) en retourneert een dict met de paden en de periode.
+    """
+    rng = np.random.default_rng(seed)
+    data_dir = os.path.join(out_dir, "data")
+    vec_dir = os.path.join(out_dir, "articles_normalised")
+    vocabularies = topic_vocabularies(n_topics, ai_fraction, rng)
+    centers = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    store = EmbeddingStore(vec_dir)
+    if vectors in ("store", "both"):
+        store.reset()
+    end = start + timedelta(days=(n_articles - 1) // per_day)
+    csv_rows = []
+    records, batch_vectors = [], []
+    for i in range(n_articles):
+        day = start + timedelta(days=i // per_day)
+        rank = i % per_day + 1
+        month = f"{day.year}-{day.month:02d}"
+        date_str = day.isoformat()
+        filename = f"{date_str}_{rank}.txt"
+        topic = int(rng.integers(n_topics))
+        vocabulary = vocabularies[topic]
+        title = " ".join(vocabulary[rng.integers(len(vocabulary), size=5)]).title()
+        score = int(rng.pareto(1.5) * 20) + 1
+        num_comments = int(rng.poisson(score / 3))
+        raw, cleaned = article_text(vocabulary, rng, int(rng.integers(2, 8)))
+        os.makedirs(os.path.join(data_dir, month), exist_ok=True)
+        with open(os.path.join(data_dir, month, filename), "w", encoding="utf-8") as f:
+            f.write(f"Title: {title}\nURL: https://example.com/{month}/{rank}/{i}\nScore: {score}\n"
+                    f"Number of Comments: {num_comments}\nPost Time: {date_str} 12:00:00\n\n{raw}")
+        csv_rows.append({"date": date_str, "filename": filename, "ranking": rank,
+                         "score": score, "num_comments": num_comments})
+        relative_path = f"{month}/{filename}"
+        os.makedirs(os.path.join(vec_dir, month), exist_ok=True)
+        with open(os.path.join(vec_dir, relative_path), "w", encoding="utf-8") as f:
+            f.write(f"{title.lower()} {cleaned}")
+        vector = centers[topic] + rng.normal(scale=0.6, size=dim).astype(np.float32)
+        if vectors in ("vec", "both"):
+            with open(os.path.join(vec_dir, relative_path + ".vec"), "w", encoding="utf-8") as f:
+                f.write(" ".join(np.char.mod("%.6f", vector)))
+        if vectors in ("store", "both"):
+            records.append((f"{month}/{date_str}_{rank}", date_str, relative_path))
+            batch_vectors.append(vector)
+            if len(records) >= batch_size:
+                store.append(records, np.vstack(batch_vectors))
+                records, batch_vectors = [], []
+    if records:
+        store.append(records, np.vstack(batch_vectors))
+    with open(os.path.join(data_dir, f"scraped_data_{start}_{end}.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["date", "filename", "ranking", "score", "num_comments"])
+        writer.writeheader()
+        writer.writerows(csv_rows)
+    return {"data_dir": data_dir, "vec_dir": vec_dir, "start_date": start.isoformat(),
+            "end_date": end.isoformat(), "articles": n_articles}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Schrijft een synthetische HackerNews-achtige corpus in de indeling van de pipeline.")
+    parser.add_argument("--out_dir", required=True)
+    parser.add_argument("--articles", type=int, default=1000,
+                        help="Aantal artikelen (bijvoorbeeld 1000 tot 500000).")
+    parser.add_argument("--start_date", type=str, default="2024-01-01")
+    parser.add_argument("--per_day", type=int, default=30,
+                        help="Aantal artikelen per dag (de top N van pull_article_info.py).")
+    parser.add_argument("--topics", type=int, default=40)
+    parser.add_argument("--ai_fraction", type=float, default=0.25,
+                        help="Aandeel van de onderwerpen dat over AI gaat.")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--vectors", choices=["store", "vec", "both"], default="store",
+                        help="Vectoren in de EmbeddingStore, als losse .vec bestanden of allebei.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    info = generate_corpus(args.out_dir, args.articles, date.fromisoformat(args.start_date), args.per_day,
+                           args.topics, args.ai_fraction, args.dim, args.vectors, args.seed)
+    print(f"{info['articles']} artikelen geschreven naar {args.out_dir} "
+          f"({info['start_date']} t/m {info['end_date']})")
+
+
+if __name__ == "__main__":
+    main()
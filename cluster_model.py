@@ -0,0 +1,185 @@
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+
+from clustering import fit_reduction, transform_reduction, make_clusterer
+
+MODEL_FILE = "cluster_model.pkl"
+# Opties die de clustering zelf bepalen; wijkt één hiervan af, dan wordt opnieuw gefit
+MODEL_OPTIONS = ("min_cluster_size", "min_samples", "reduce", "n_components", "normalize")
+# Onder dit aantal nieuwe artikelen zegt het ruisaandeel te weinig om opnieuw te fitten
+MIN_NOISE_CHECK = 20
+
+
+class ClusterModel:
+    """
+    Bewaard HDBSCAN-model (gefit met prediction_data=True) plus de gefitte reductie.
+
+    Nieuwe artikelen worden met hdbscan.approximate_predict aan de bestaande clusters
+    toegewezen. De topic-id's zijn stabiel: label_map vertaalt de labels van de
+    clusterer naar topic-id's, en bij een nieuwe fit krijgen clusters het id van het
+    oude topic waarmee ze de meeste artikelen delen. assignments bevat het topic-id
+    (-1 voor ruis) van ieder artikel dat het model gezien heeft. noise_ratio is het
+    ruisaandeel bij de fit; center, spread en rms_radius beschrijven de ligging van de
+    gefitte artikelen voor de driftcontrole.
+    """
+
+    def __init__(self, clusterer, reducer, options, assignments, label_map, next_label, center, spread,
+                 rms_radius=None, noise_ratio=0.0):
+        self.clusterer = clusterer
+        self.reducer = reducer
+        self.options = options
+        self.assignments = assignments
+        self.label_map = label_map
+        self.next_label = next_label
+        self.center = center
+        self.spread = spread
+        self.rms_radius = rms_radius or spread
+        self.noise_ratio = noise_ratio
+
+    @classmethod
+    def fit(cls, X, doc_ids, options, previous=None, algorithm="best", core_dist_n_jobs=4):
+        X_reduced, reducer = fit_reduction(
+            X, options["reduce"], options["n_components"], options["normalize"])
+        clusterer = make_clusterer(options["min_cluster_size"], options["min_samples"],
+                                   algorithm, core_dist_n_jobs, prediction_data=True)
+        raw_labels = clusterer.fit_predict(X_reduced)
+        label_map, next_label = match_topics(raw_labels, doc_ids, previous)
+        center = X_reduced.mean(axis=0)
+        radii = np.linalg.norm(X_reduced - center, axis=1)
+        spread = float(radii.mean()) or 1.0
+        rms_radius = float(np.sqrt(np.mean(radii ** 2))) or 1.0
+        noise_ratio = float(np.mean(raw_labels == -1)) if len(raw_labels) else 0.0
+        model = cls(clusterer, reducer, dict(options), {}, label_map, next_label, center, spread,
+                    rms_radius, noise_ratio)
+        labels = model.topic_ids(raw_labels)
+        if previous is not None:
+            model.assignments.update(previous.assignments)
+        model.assignments.update(zip(doc_ids, labels.tolist()))
+        return model, labels
+
+    def topic_ids(self, raw_labels):
+        return np.array([self.label_map.get(int(label), -1) for label in raw_labels], dtype=np.int64)
+
+    def transform(self, X):
+        return transform_reduction(X, self.reducer, self.options["normalize"])
+
+    def predict(self, X_reduced):
+        """Wijst (gereduceerde) vectoren toe aan de bestaande topics: (topic_ids, strengths)."""
+        import hdbscan
+        raw_labels, strengths = hdbscan.approximate_predict(self.clusterer, X_reduced)
+        return self.topic_ids(raw_labels), strengths
+
+    def drift(self, X_reduced):
+        """
+        Verschuiving van het gemiddelde van X_reduced t.o.v. de fit, relatief aan de
+        spreiding. Het gemiddelde van n artikelen uit dezelfde verdeling ligt al zo'n
+        rms_radius / sqrt(n) van het centrum; alleen wat daar (met een marge van twee
+        standaardfouten) bovenuit gaat telt als drift, zodat een kleine batch niet vanzelf
+        tot een nieuwe fit leidt.
+        """
+        n = len(X_reduced)
+        if n == 0:
+            return 0.0
+        # Modellen van voor deze correctie hebben geen rms_radius
+        rms_radius = getattr(self, "rms_radius", None) or self.spread
+        shift = float(np.linalg.norm(X_reduced.mean(axis=0) - self.center))
+        return max(0.0, shift - 2 * rms_radius / np.sqrt(n)) / self.spread
+
+    def save(self, model_dir):
+        os.makedirs(model_dir, exist_ok=True)
+        path = os.path.join(model_dir, MODEL_FILE)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(self, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, model_dir):
+        path = os.path.join(model_dir, MODEL_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Kon het clustermodel in {model_dir} niet inlezen, er wordt opnieuw gefit: {e}")
+            return None
+
+
+def match_topics(raw_labels, doc_ids, previous=None):
+    """
+    Koppelt de clusterlabels van een nieuwe fit aan topic-id's: ieder cluster krijgt het
+    id van het oude topic waarmee het de meeste artikelen deelt (ieder oud id hooguit één
+    keer), de overige clusters krijgen nieuwe id's. Retourneert (label_map, next_label).
+    """
+    clusters = sorted(set(int(label) for label in raw_labels) - {-1})
+    if previous is None:
+        return {label: label for label in clusters}, (max(clusters) + 1 if clusters else 0)
+    overlap = Counter()
+    for doc_id, label in zip(doc_ids, raw_labels):
+        old_topic = previous.assignments.get(doc_id, -1)
+        if label != -1 and old_topic != -1:
+            overlap[(int(label), old_topic)] += 1
+    label_map, used = {}, set()
+    for (label, old_topic), _ in sorted(overlap.items(), key=lambda item: (-item[1], item[0])):
+        if label not in label_map and old_topic not in used:
+            label_map[label] = old_topic
+            used.add(old_topic)
+    next_label = previous.next_label
+    for label in clusters:
+        if label not in label_map:
+            label_map[label] = next_label
+            next_label += 1
+    return label_map, next_label
+
+
+def assign_topics(X, doc_ids, model_dir, options, max_noise_ratio=0.5, max_drift=0.5, refit=False,
+                  algorithm="best", core_dist_n_jobs=4, verbose=False):
+    """
+    Topic-id per artikel via het bewaarde model in model_dir. Artikelen die het model al
+    kent houden hun topic; nieuwe artikelen worden met approximate_predict toegewezen.
+    Het model wordt alleen opnieuw gefit (op alle artikelen in X) als er nog geen
+    passend model is, als refit gevraagd is, of als van de nieuwe artikelen meer dan
+    max_noise_ratio meer ruis is dan bij de fit (vanaf MIN_NOISE_CHECK nieuwe artikelen),
+    of als hun verschuiving (zie ClusterModel.drift) groter is dan max_drift.
+    Retourneert (topic_ids, model, refitted).
+    """
+    model = ClusterModel.load(model_dir)
+    reason = None
+    if refit:
+        reason = "opnieuw fitten gevraagd"
+    elif model is None:
+        reason = "nog geen clustermodel"
+    elif any(model.options.get(key) != options[key] for key in MODEL_OPTIONS):
+        reason = "clusteringopties gewijzigd"
+    labels = None
+    if reason is None:
+        new_positions = [i for i, doc_id in enumerate(doc_ids) if doc_id not in model.assignments]
+        labels = np.array([model.assignments.get(doc_id, -1) for doc_id in doc_ids], dtype=np.int64)
+        if new_positions:
+            X_new = model.transform(X[new_positions])
+            new_labels, _ = model.predict(X_new)
+            noise_ratio = float(np.mean(new_labels == -1))
+            fit_noise_ratio = getattr(model, "noise_ratio", 0.0)
+            drift = model.drift(X_new)
+            if verbose:
+                print(f"{len(new_positions)} nieuwe artikelen toegewezen: ruis {noise_ratio:.2f} "
+                      f"(bij de fit {fit_noise_ratio:.2f}), drift {drift:.2f}")
+            if len(new_positions) >= MIN_NOISE_CHECK and noise_ratio - fit_noise_ratio > max_noise_ratio:
+                reason = (f"ruisaandeel {noise_ratio:.2f} meer dan {max_noise_ratio} boven "
+                          f"dat bij de fit ({fit_noise_ratio:.2f})")
+            elif drift > max_drift:
+                reason = f"drift {drift:.2f} boven {max_drift}"
+            else:
+                labels[new_positions] = new_labels
+                model.assignments.update(zip([doc_ids[i] for i in new_positions], new_labels.tolist()))
+                model.save(model_dir)
+    if reason is not None:
+        if verbose:
+            print(f"Clustermodel wordt opnieuw gefit: {reason}")
+        model, labels = ClusterModel.fit(X, doc_ids, options, previous=model, algorithm=algorithm,
+                                         core_dist_n_jobs=core_dist_n_jobs)
+        model.save(model_dir)
+    return labels, model, reason is not None
@@ -0,0 +1,133 @@
+import numpy as np
+
+REDUCTION_METHODS = ("none", "pca", "svd", "umap")
+HDBSCAN_ALGORITHMS = ("best", "generic", "prims_kdtree", "prims_balltree",
+                      "boruvka_kdtree", "boruvka_balltree")
+
+
+def l2_normalize(X):
+    """Schaalt iedere rij naar lengte 1; euclidische afstand is dan monotoon in cosinusafstand."""
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def fit_reduction(X, method="none", n_components=50, normalize=False, random_state=42):
+    """
+    Optionele voorbewerking van de embeddings vóór HDBSCAN:
+    - method: "none", "pca", "svd" (TruncatedSVD) of "umap" (vereist umap-learn).
+    - normalize: L2-normaliseer de vectoren vóór (en na) de reductie, zodat de
+      euclidische metric van HDBSCAN overeenkomt met cosinusafstand.
+    Bij minder rijen of kolommen dan n_components wordt het aantal componenten verlaagd.
+    Retourneert (X, reducer); met transform_reduction gaan nieuwe vectoren door dezelfde
+    (gefitte) reductie. reducer is None zonder reductie.
+    """
+    if method not in REDUCTION_METHODS:
+        raise ValueError(
+            f"Onbekende reductiemethode '{method}', kies uit {', '.join(REDUCTION_METHODS)}.")
+    if normalize:
+        X = l2_normalize(np.asarray(X, dtype=np.float32))
+    if method == "none":
+        return X, None
+    n_components = min(n_components, X.shape[1], max(X.shape[0] - 1, 1))
+    if method == "pca":
+        from sklearn.decomposition import PCA
+        reducer = PCA(n_components=n_components, random_state=random_state)
+    elif method == "svd":
+        from sklearn.decomposition import TruncatedSVD
+        n_components = min(n_components, X.shape[1] - 1)
+        reducer = TruncatedSVD(n_components=n_components, random_state=random_state)
+    else:
+        try:
+            import umap
+        except ImportError:
+            raise ImportError(
+                "Voor --reduce umap is het pakket umap-learn nodig (pip install umap-learn).")
+        reducer = umap.UMAP(n_components=n_components, metric="cosine" if normalize else "euclidean",
+                            random_state=random_state)
+    X = reducer.fit_transform(X).astype(np.float32)
+    if normalize:
+        X = l2_normalize(X)
+    return X, reducer
+
+
+def transform_reduction(X, reducer, normalize=False):
+    """Past een met fit_reduction gefitte reductie toe op nieuwe vectoren."""
+    if normalize:
+        X = l2_normalize(np.asarray(X, dtype=np.float32))
+    if reducer is None:
+        return X
+    X = reducer.transform(X).astype(np.float32)
+    if normalize:
+        X = l2_normalize(X)
+    return X
+
+
+def reduce_dimensions(X, method="none", n_components=50, normalize=False, random_state=42):
+    """Zoals fit_reduction, maar retourneert alleen de gereduceerde vectoren."""
+    return fit_reduction(X, method, n_components, normalize, random_state)[0]
+
+
+def make_clusterer(min_cluster_size, min_samples, algorithm="best", core_dist_n_jobs=4, prediction_data=False):
+    """HDBSCAN met euclidische metric; met prediction_data kunnen later punten worden toegewezen."""
+    import hdbscan
+    if algorithm not in HDBSCAN_ALGORITHMS:
+        raise ValueError(
+            f"Onbekend HDBSCAN-algoritme '{algorithm}', kies uit {', '.join(HDBSCAN_ALGORITHMS)}.")
+    return hdbscan.HDBSCAN(
+        min_cluster_size=min_cluster_size,
+        min_samples=min_samples,
+        metric='euclidean',
+        algorithm=algorithm,
+        core_dist_n_jobs=core_dist_n_jobs,
+        prediction_data=prediction_data
+    )
+
+
+def cluster_vectors(X, min_cluster_size, min_samples, reduce="none", n_components=50, normalize=False,
+                    algorithm="best", core_dist_n_jobs=4):
+    """
+    Clustert de embeddings met HDBSCAN (euclidisch), na de optionele reductie uit
+    reduce_dimensions. Retourneert (cluster_labels, clusterer); met de standaardwaarden
+    is dit gelijk aan HDBSCAN op de volledige vectoren.
+    """
+    clusterer = make_clusterer(min_cluster_size, min_samples, algorithm, core_dist_n_jobs)
+    X = reduce_dimensions(X, reduce, n_components, normalize)
+    cluster_labels = clusterer.fit_predict(X)
+    return cluster_labels, clusterer
+
+
+def representative_order(X, probabilities=None):
+    """
+    Volgorde van de leden van één cluster, meest representatief eerst: op de HDBSCAN
+    lidmaatschapskans (als die bekend is) en daarbinnen op cosinusgelijkenis met het
+    centroïde van het cluster. Retourneert een lijst posities in X.
+    """
+    X = l2_normalize(np.asarray(X, dtype=np.float64))
+    similarity = X @ l2_normalize(X.mean(axis=0, keepdims=True))[0]
+    if probabilities is None:
+        return np.argsort(-similarity, kind="stable").tolist()
+    return np.lexsort((-similarity, -np.asarray(probabilities))).tolist()
+
+
+def add_clustering_arguments(parser):
+    """De clustering-opties, gedeeld door main.py en trend_analysis.py."""
+    parser.add_argument("--reduce", type=str, default="none", choices=REDUCTION_METHODS,
+                        help="Dimensiereductie vóór HDBSCAN (umap vereist umap-learn).")
+    parser.add_argument("--n_components", type=int, default=50,
+                        help="Aantal dimensies na reductie.")
+    parser.add_argument("--normalize_vectors", action="store_true",
+                        help="L2-normaliseer de embeddings, zodat euclidische afstand overeenkomt met cosinus.")
+    parser.add_argument("--hdbscan_algorithm", type=str, default="best", choices=HDBSCAN_ALGORITHMS,
+                        help="Algoritme voor HDBSCAN, bijvoorbeeld boruvka_kdtree voor grote corpora.")
+    parser.add_argument("--core_dist_n_jobs", type=int, default=4,
+                        help="Aantal parallelle processen voor de core distances (-1 = alle cores).")
+    parser.add_argument("--cluster_model_dir", type=str, default=None,
+                        help="Bewaar het clustermodel in deze map en wijs nieuwe artikelen toe aan de bestaande topics.")
+    parser.add_argument("--refit", action="store_true",
+                        help="Fit het bewaarde clustermodel opnieuw op alle artikelen in de periode.")
+    parser.add_argument("--max_noise_ratio", type=float, default=0.5,
+                        help="Fit opnieuw als het ruisaandeel van de nieuwe artikelen zoveel hoger is dan bij de fit.")
+    parser.add_argument("--max_drift", type=float, default=0.5,
+                        help="Fit opnieuw als de nieuwe artikelen verder dan dit (relatief, boven de steekproefruis) "
+                             "verschoven zijn.")
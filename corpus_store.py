@@ -0,0 +1,289 @@
+import os
+import csv
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# Eén rij per artikel; het id is gelijk aan het artikel-id van de EmbeddingStore
+# ('YYYY-MM/DATE_RANK'), story_id is het HackerNews id.
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("story_id", pa.int64()),
+    ("date", pa.date32()),
+    ("rank", pa.int32()),
+    ("score", pa.int64()),
+    ("num_comments", pa.int64()),
+    ("title", pa.string()),
+    ("url", pa.string()),
+    ("post_time", pa.string()),
+    ("raw_text", pa.string()),
+    ("cleaned_text", pa.string()),
+    ("embedding", pa.list_(pa.float32())),
+])
+COLUMNS = SCHEMA.names
+PARTITION_FILE = "part-0.parquet"
+
+
+def article_id(date_str, rank):
+    """Artikel-id in hetzelfde formaat als de tekstboom: 'YYYY-MM/YYYY-MM-DD_rank'."""
+    return f"{date_str[:7]}/{date_str}_{rank}"
+
+
+def _partition_path(dataset_dir, month):
+    return os.path.join(dataset_dir, f"month={month}", PARTITION_FILE)
+
+
+def _to_table(df):
+    df = df.reindex(columns=COLUMNS)
+    df = df.astype(object).where(pd.notna(df), None)
+    return pa.Table.from_pandas(df, schema=SCHEMA, preserve_index=False)
+
+
+def replaced_ids(new_df, existing):
+    """
+    Ids (index) die in beide DataFrames staan maar bij een ander verhaal horen: het
+    story_id, of bij ontbrekende story_ids de url, verschilt van de bestaande rij.
+    """
+    common = new_df.index.intersection(existing.index)
+    replaced = []
+    for key in ("story_id", "url"):
+        if key not in new_df.columns or key not in existing.columns:
+            continue
+        new_values = new_df.loc[common, key]
+        old_values = existing.loc[common, key]
+        known = new_values.notna() & old_values.notna()
+        replaced.extend(common[known & (new_values != old_values)])
+        # De url telt alleen als een van beide rijen geen story_id heeft
+        if key == "story_id":
+            common = common[~known]
+    return sorted(set(replaced))
+
+
+def upsert_articles(dataset_dir, records):
+    """
+    Voegt artikelen toe aan de dataset of werkt bestaande rijen bij.
+    records: lijst van dicts met minimaal 'id' en 'date' (YYYY-MM-DD of date); alleen
+    de meegegeven kolommen met een waarde overschrijven de bestaande waarden. Een ander
+    verhaal op dezelfde datum en rang vervangt de bestaande rij in zijn geheel.
+    De dataset is per maand gepartitioneerd (month=YYYY-MM).
+    """
+    if not records:
+        return
+    new_df = pd.DataFrame.from_records(records)
+    new_df["date"] = pd.to_datetime(new_df["date"]).dt.date
+    new_df["month"] = [d.strftime("%Y-%m") for d in new_df["date"]]
+    for month, month_df in new_df.groupby("month"):
+        path = _partition_path(dataset_dir, month)
+        month_df = month_df.drop(columns=["month"]).drop_duplicates(
+            subset="id", keep="last").set_index("id")
+        if os.path.exists(path):
+            existing = pq.read_table(path).to_pandas().set_index("id")
+            # Staat er op dezelfde datum en rang een ander verhaal (ander story_id of
+            # andere url), dan vervangt de nieuwe rij de oude volledig
+            existing = existing.drop(index=replaced_ids(month_df, existing))
+            # Nieuwe waarden gaan voor, ontbrekende waarden vallen terug op de bestaande rij
+            month_df = month_df.combine_first(existing)
+        month_df = month_df.reset_index().sort_values(["date", "rank"], na_position="last")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        pq.write_table(_to_table(month_df), tmp_path)
+        os.replace(tmp_path, path)
+
+
+def open_dataset(dataset_dir):
+    return ds.dataset(dataset_dir, format="parquet", schema=SCHEMA.append(pa.field("month", pa.string())),
+                      partitioning="hive")
+
+
+def read_articles(dataset_dir, start_dt=None, end_dt=None, columns=None, extra_filter=None):
+    """
+    Leest de artikelen binnen de (inclusieve) datumrange als DataFrame. Het datumfilter
+    wordt naar de Parquet-reader doorgegeven (predicate pushdown), en via de
+    maandpartities worden bestanden buiten de range niet eens geopend.
+    """
+    if not os.path.isdir(dataset_dir):
+        return pd.DataFrame(columns=columns or COLUMNS)
+    dataset = open_dataset(dataset_dir)
+    expr = None
+    conditions = []
+    if start_dt is not None:
+        conditions.append(ds.field("month") >= start_dt.strftime("%Y-%m"))
+        conditions.append(ds.field("date") >= pa.scalar(start_dt.date(), pa.date32()))
+    if end_dt is not None:
+        conditions.append(ds.field("month") <= end_dt.strftime("%Y-%m"))
+        conditions.append(ds.field("date") <= pa.scalar(end_dt.date(), pa.date32()))
+    if extra_filter is not None:
+        conditions.append(extra_filter)
+    for condition in conditions:
+        expr = condition if expr is None else expr & condition
+    table = dataset.to_table(columns=columns or COLUMNS, filter=expr)
+    df = table.to_pandas()
+    if "date" in df.columns and "rank" in df.columns:
+        df = df.sort_values(["date", "rank"], kind="stable").reset_index(drop=True)
+    return df
+
+
+def read_records(dataset_dir, start_dt=None, end_dt=None, columns=None):
+    """Zoals read_articles, maar als lijst van dicts met None voor ontbrekende waarden."""
+    if not os.path.isdir(dataset_dir):
+        return []
+    df = read_articles(dataset_dir, start_dt, end_dt, columns=columns)
+    df = df.astype(object).where(pd.notna(df), None)
+    return df.to_dict("records")
+
+
+def load_embeddings(dataset_dir, start_dt, end_dt):
+    """
+    Retourneert (X, ids, cleaned_texts) voor alle artikelen met een embedding binnen
+    de datumrange.
+    """
+    df = read_articles(dataset_dir, start_dt, end_dt, columns=["id", "date", "rank", "cleaned_text", "embedding"],
+                       extra_filter=ds.field("embedding").is_valid())
+    if df.empty:
+        return np.zeros((0, 0), dtype=np.float32), [], []
+    X = np.vstack(df["embedding"].to_numpy()).astype(np.float32)
+    return X, df["id"].tolist(), df["cleaned_text"].fillna("").tolist()
+
+
+def format_article(row):
+    """Zet een rij om naar het tekstformaat van pull_article_info.process_story."""
+    post_time = row.get("post_time", "") or ""
+    content = (f"Title: {row.get('title') or ''}\nURL: {row.get('url') or ''}\nScore: {row.get('score') or 0}\n"
+               f"Number of Comments: {row.get('num_comments') or 0}\nPost Time: {post_time}\n\n")
+    raw_text = row.get("raw_text")
+    content += raw_text if raw_text else "No article text available."
+    return content
+
+
+def export_text_tree(dataset_dir, output_folder, normalized_folder=None, start_dt=None, end_dt=None):
+    """
+    Exporteert de dataset naar de tekstboom (YYYY-MM/DATE_RANK.txt plus een
+    scraped_data CSV), en optioneel de genormaliseerde teksten naar normalized_folder.
+    Retourneert het aantal geëxporteerde artikelen.
+    """
+    records = read_records(dataset_dir, start_dt, end_dt)
+    if not records:
+        return 0
+    csv_rows = []
+    for row in records:
+        date_str = row["date"].isoformat()
+        filename = f"{date_str}_{row['rank']}.txt"
+        path = os.path.join(output_folder, date_str[:7], filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(format_article(row))
+        if normalized_folder and row.get("cleaned_text"):
+            norm_path = os.path.join(normalized_folder, date_str[:7], filename)
+            os.makedirs(os.path.dirname(norm_path), exist_ok=True)
+            with open(norm_path, "w", encoding="utf-8") as f:
+                f.write(row["cleaned_text"])
+        csv_rows.append({"date": date_str, "filename": filename, "ranking": row["rank"],
+                         "score": row["score"], "num_comments": row["num_comments"]})
+    first = min(row["date"] for row in records)
+    last = max(row["date"] for row in records)
+    csv_path = os.path.join(output_folder, f"scraped_data_{first}_{last}.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["date", "filename", "ranking", "score", "num_comments"])
+        writer.writeheader()
+        writer.writerows(csv_rows)
+    return len(csv_rows)
+
+
+def parse_article(content):
+    """Splitst een artikelbestand in de header-velden en de tekst (None zonder tekst)."""
+    header, _, body = content.partition("\n\n")
+    fields = {}
+    for line in header.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            fields[key.strip()] = value.strip()
+    body = body.strip()
+    if not body or "No article text available." in body:
+        body = None
+    return fields, body
+
+
+def import_text_tree(data_dir, dataset_dir, vec_dir=None):
+    """
+    Zet een bestaande tekstboom (YYYY-MM/DATE_RANK.txt plus scraped_data CSV's) om naar
+    de Parquet corpus. Met vec_dir worden ook de genormaliseerde teksten en de vectoren
+    uit de EmbeddingStore overgenomen. Retourneert het aantal geïmporteerde artikelen.
+    """
+    from embedding_store import EmbeddingStore, article_id_from_path, date_from_path
+    vectors = {}
+    if vec_dir and EmbeddingStore(vec_dir).exists():
+        X, ids, text_paths = EmbeddingStore(vec_dir).load()
+        for i, (vec_id, text_path) in enumerate(zip(ids, text_paths)):
+            vectors[vec_id] = (X[i], text_path)
+    # Rang en aantallen uit de CSV's; bij overlappende CSV's wint de laatste
+    csv_info = {}
+    for root, dirs, files in os.walk(data_dir):
+        for file in sorted(files):
+            if file.startswith("scraped_data_") and file.endswith(".csv"):
+                with open(os.path.join(root, file), newline="", encoding="utf-8") as f:
+                    for row in csv.DictReader(f):
+                        csv_info[row["filename"]] = row
+    records = []
+    for root, dirs, files in os.walk(data_dir):
+        for file in sorted(files):
+            date_str = date_from_path(file)
+            if not file.endswith(".txt") or date_str is None:
+                continue
+            path = os.path.join(root, file)
+            with open(path, "r", encoding="utf-8") as f:
+                fields, body = parse_article(f.read())
+            relative_path = os.path.relpath(path, data_dir)
+            art_id = article_id_from_path(relative_path)
+            info = csv_info.get(file, {})
+            record = {
+                "id": art_id,
+                "date": date_str,
+                "rank": int(info.get("ranking") or file[:-4].rsplit("_", 1)[1]),
+                "score": int(info.get("score") or fields.get("Score") or 0),
+                "num_comments": int(info.get("num_comments") or fields.get("Number of Comments") or 0),
+                "title": fields.get("Title"),
+                "url": fields.get("URL"),
+                "post_time": fields.get("Post Time") or None,
+                "raw_text": body,
+            }
+            if art_id in vectors:
+                vector, text_path = vectors[art_id]
+                with open(text_path, "r", encoding="utf-8") as f:
+                    record["cleaned_text"] = f.read()
+                record["embedding"] = vector
+            records.append(record)
+    upsert_articles(dataset_dir, records)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Zet de tekstboom om naar de kolomgebaseerde artikelcorpus, of andersom.")
+    parser.add_argument("--corpus_dir", type=str, default="corpus",
+                        help="Map van de Parquet dataset.")
+    parser.add_argument("--import_tree", type=str, default=None,
+                        help="Map met de tekstboom die in de corpus wordt ingelezen.")
+    parser.add_argument("--export_tree", type=str, default=None,
+                        help="Map waarin de tekstboom (YYYY-MM/DATE_RANK.txt) wordt geschreven.")
+    parser.add_argument("--vec_dir", type=str, default=None,
+                        help="Map met genormaliseerde teksten en embedding store (bij --import_tree).")
+    parser.add_argument("--normalized_dir", type=str, default=None,
+                        help="Map voor de genormaliseerde teksten (bij --export_tree, optioneel).")
+    parser.add_argument("--start_date", type=str, default=None)
+    parser.add_argument("--end_date", type=str, default=None)
+    args = parser.parse_args()
+    start_dt = datetime.strptime(args.start_date, "%Y-%m-%d") if args.start_date else None
+    end_dt = datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None
+    if args.import_tree:
+        count = import_text_tree(args.import_tree, args.corpus_dir, args.vec_dir)
+        print(f"{count} artikelen geïmporteerd in {args.corpus_dir}")
+    if args.export_tree:
+        count = export_text_tree(args.corpus_dir, args.export_tree,
+                                 args.normalized_dir, start_dt, end_dt)
+        print(f"{count} artikelen geëxporteerd naar {args.export_tree}")
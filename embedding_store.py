@@ -0,0 +1,242 @@
+import os
+import re
+import csv
+import glob
+import json
+import argparse
+from datetime import datetime
+
+import numpy as np
+
+# De store staat als submap in de map met genormaliseerde artikelen (vec_dir)
+STORE_DIRNAME = "embeddings"
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.csv"
+META_FILE = "meta.json"
+INDEX_HEADER = ["id", "date", "text_path"]
+
+
+def article_id_from_path(relative_path):
+    """
+    Bepaalt het artikel-id op basis van het relatieve pad van een artikel,
+    bijvoorbeeld '2024-10/2024-10-01_1.txt' -> '2024-10/2024-10-01_1'.
+    """
+    article_id = relative_path.replace(os.sep, "/")
+    if article_id.endswith(".txt"):
+        article_id = article_id[:-4]
+    return article_id
+
+
+def date_from_path(path):
+    """
+    Haalt de datum (YYYY-MM-DD) uit een bestandsnaam in het formaat DATE_RANK.
+    Retourneert None als de bestandsnaam niet aan dat formaat voldoet.
+    """
+    match = re.match(r'(\d{4}-\d{2}-\d{2})_\d+', os.path.basename(path))
+    if not match:
+        return None
+    try:
+        datetime.strptime(match.group(1), "%Y-%m-%d")
+    except ValueError:
+        return None
+    return match.group(1)
+
+
+class EmbeddingStore:
+    """
+    Geconsolideerde opslag van embedding vectoren.
+
+    Alle vectoren staan als float32 matrix in één binair bestand (vectors.f32) dat
+    met np.memmap wordt geopend; index.csv bevat per rij het artikel-id, de datum
+    en het pad naar de genormaliseerde tekst (relatief aan base_dir). Rijen worden
+    alleen toegevoegd: als een artikel opnieuw wordt opgeslagen telt de laatste rij.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.store_dir = os.path.join(base_dir, STORE_DIRNAME)
+        self.vectors_path = os.path.join(self.store_dir, VECTORS_FILE)
+        self.index_path = os.path.join(self.store_dir, INDEX_FILE)
+        self.meta_path = os.path.join(self.store_dir, META_FILE)
+
+    def exists(self):
+        return os.path.exists(self.meta_path) and os.path.exists(self.index_path)
+
+    def read_meta(self):
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def reset(self):
+        """Verwijdert alle opgeslagen vectoren en de index."""
+        for path in (self.vectors_path, self.index_path, self.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def append(self, records, vectors):
+        """
+        Voegt vectoren toe aan de store.
+        records: lijst van (article_id, date_str, text_path) tuples, text_path relatief aan base_dir.
+        vectors: array met vorm (len(records), dim).
+        """
+        if not records:
+            return
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(records):
+            raise ValueError(
+                "Aantal vectoren komt niet overeen met het aantal records.")
+        os.makedirs(self.store_dir, exist_ok=True)
+        if self.exists():
+            dim = self.read_meta()["dim"]
+            if vectors.shape[1] != dim:
+                raise ValueError(
+                    f"Vectordimensie {vectors.shape[1]} wijkt af van de store ({dim}).")
+        else:
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": int(vectors.shape[1]),
+                          "dtype": "float32"}, f)
+            with open(self.index_path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(INDEX_HEADER)
+        # Het rijnummer in de index is de positie van de vector. Een eerder onderbroken
+        # schrijfactie kan vectoren zonder indexrij hebben achtergelaten; die worden eerst
+        # afgekapt, anders zouden alle nieuwe indexrijen naar de verkeerde vector wijzen.
+        # Daarna eerst de vectoren en dan de index, zodat een onderbreking hooguit weer
+        # zulke losse vectoren oplevert.
+        self._truncate_vectors(self._index_row_count() * vectors.shape[1] * 4)
+        with open(self.vectors_path, "ab") as f:
+            vectors.tofile(f)
+        with open(self.index_path, "a", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            for article_id, date_str, text_path in records:
+                writer.writerow(
+                    [article_id, date_str, text_path.replace(os.sep, "/")])
+
+    def _index_row_count(self):
+        with open(self.index_path, "r", newline="", encoding="utf-8") as f:
+            return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+    def _truncate_vectors(self, size):
+        if os.path.exists(self.vectors_path) and os.path.getsize(self.vectors_path) > size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(size)
+
+    def _open_vectors(self, dim):
+        if not os.path.exists(self.vectors_path) or os.path.getsize(self.vectors_path) == 0:
+            return np.zeros((0, dim), dtype=np.float32)
+        n_rows = os.path.getsize(self.vectors_path) // (4 * dim)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+
+    def read_index(self):
+        """
+        Leest de index in en retourneert (rows, ids, dates, text_paths) voor de meest
+        recente rij per artikel-id, gesorteerd op rijnummer.
+        """
+        latest = {}
+        with open(self.index_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row_nr, (article_id, date_str, text_path) in enumerate(reader):
+                latest[article_id] = (row_nr, date_str, text_path)
+        items = sorted(latest.items(), key=lambda item: item[1][0])
+        rows = np.array([row for _, (row, _, _) in items], dtype=np.int64)
+        ids = [article_id for article_id, _ in items]
+        dates = np.array([d for _, (_, d, _) in items], dtype="datetime64[D]")
+        text_paths = [p for _, (_, _, p) in items]
+        return rows, ids, dates, text_paths
+
+    def load(self, start_dt=None, end_dt=None):
+        """
+        Selecteert alle vectoren binnen de (inclusieve) datumrange.
+        Retourneert (X, ids, text_paths) met X als float32 matrix en text_paths als
+        paden naar de genormaliseerde teksten.
+        """
+        dim = self.read_meta()["dim"]
+        rows, ids, dates, text_paths = self.read_index()
+        matrix = self._open_vectors(dim)
+        # Indexrijen zonder (volledig geschreven) vector tellen niet mee
+        mask = rows < matrix.shape[0]
+        if start_dt is not None:
+            mask &= dates >= np.datetime64(start_dt.date(), "D")
+        if end_dt is not None:
+            mask &= dates <= np.datetime64(end_dt.date(), "D")
+        selected = np.flatnonzero(mask)
+        X = np.asarray(matrix[rows[selected]], dtype=np.float32)
+        sel_ids = [ids[i] for i in selected]
+        sel_paths = [os.path.join(self.base_dir, text_paths[i])
+                     for i in selected]
+        return X, sel_ids, sel_paths
+
+    def compact(self, keep_ids=None):
+        """
+        Herschrijft de store met alleen de meest recente rij per artikel, optioneel
+        beperkt tot keep_ids. Retourneert het aantal overgebleven rijen.
+        """
+        if not self.exists():
+            return 0
+        dim = self.read_meta()["dim"]
+        rows, ids, dates, text_paths = self.read_index()
+        matrix = self._open_vectors(dim)
+        keep = [i for i, article_id in enumerate(ids)
+                if rows[i] < matrix.shape[0] and (keep_ids is None or article_id in keep_ids)]
+        vectors = np.array(matrix[rows[keep]], dtype=np.float32).reshape(-1, dim)
+        records = [(ids[i], str(dates[i]), text_paths[i]) for i in keep]
+        del matrix
+        self.reset()
+        if records:
+            self.append(records, vectors)
+        else:
+            with open(self.meta_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": int(dim), "dtype": "float32"}, f)
+            with open(self.index_path, "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(INDEX_HEADER)
+        return len(records)
+
+
+def import_vec_files(vec_dir, batch_size=1024):
+    """
+    Zet bestaande .vec tekstbestanden in vec_dir om naar een EmbeddingStore.
+    """
+    store = EmbeddingStore(vec_dir)
+    store.reset()
+    vec_files = sorted(glob.glob(os.path.join(
+        vec_dir, "**", "*.vec"), recursive=True))
+    records, vectors = [], []
+    imported = 0
+    for vf in vec_files:
+        text_path = os.path.relpath(vf[:-4], vec_dir)
+        date_str = date_from_path(text_path)
+        if date_str is None:
+            continue
+        with open(vf, "r", encoding="utf-8") as f:
+            vec_values = [float(x)
+                          for x in re.split(r'[\s,]+', f.read().strip()) if x]
+        if not vec_values:
+            continue
+        records.append(
+            (article_id_from_path(text_path), date_str, text_path))
+        vectors.append(vec_values)
+        if len(records) >= batch_size:
+            store.append(records, np.array(vectors))
+            imported += len(records)
+            records, vectors = [], []
+    if records:
+        store.append(records, np.array(vectors))
+        imported += len(records)
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Beheer van de geconsolideerde embedding store.")
+    parser.add_argument("--vec_dir", type=str, default="articles_normalised",
+                        help="Map met genormaliseerde artikelen en de embedding store.")
+    parser.add_argument("--import_vec", action="store_true",
+                        help="Zet bestaande .vec bestanden om naar de store.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Verwijder verouderde rijen uit de store.")
+    args = parser.parse_args()
+    if args.import_vec:
+        count = import_vec_files(args.vec_dir)
+        print(f"{count} vectoren geïmporteerd in {args.vec_dir}/{STORE_DIRNAME}")
+    if args.compact:
+        count = EmbeddingStore(args.vec_dir).compact()
+        print(f"Store bevat na compactie {count} vectoren.")
@@ -7,10 +7,13 @@
 # python pull_article_info.py --start 2025-01-01 --end 2025-01-31 --topN 20
 # python pull_article_info.py --start 2025-02-01 --end 2025-02-28 --topN 20
 # python pull_article_info.py --start 2025-03-01 --end 2025-03-22 --topN 20
-python pull_article_info.py --start 2024-10-01 --end 2024-10-01 --topN 1
+python pull_article_info.py --start 2024-10-01 --end 2024-10-01 --topN 1 --single_pass
 
 # Run pull_articles.py om artikelen in ./data bij te werken
 python pull_articles.py
 
+# Werk de trending termen over 7/30/90 dagen bij met de nieuwe artikelen
+python streaming_trends.py --scraper_dir ./data --state_dir ./stream_state
+
 # Run normalize.py om de artikelen in ./data te normaliseren en op te slaan in ./data/normalized
 python normalize.py
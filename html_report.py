@@ -0,0 +1,108 @@
+import os
+from html import escape
+from string import Template
+
+# De templates worden eenmalig bij het importeren opgebouwd; alle waarden worden
+# met html.escape ingevuld
+HEADER = Template(
+    "<html>\n"
+    "<head><meta charset='utf-8'><title>LLM Analyse Rapport $period</title>\n"
+    "<style>table.trend td{padding:0 8px}svg.spark{vertical-align:middle}</style></head>\n"
+    "<body>\n"
+    "<h1>LLM Analyse Rapport</h1>\n"
+    "<p>Periode: $period</p>\n"
+)
+TOPIC = Template(
+    "<h2>Topic: $title</h2>\n"
+    "<h3>Belangrijke termen:</h3>\n<ul>\n$important_terms</ul>\n"
+    "<h3>Trending woorden:</h3>\n<ul>\n$trending_words</ul>\n"
+    "<h3>Trend Samenvatting:</h3>\n<p>$trend_summary</p>\n"
+    "<h3>Relevantie Verklaring:</h3>\n<p>$relevance_explanation</p>\n"
+    "<h3>Artikeltitels:</h3>\n<ul>\n$article_names</ul>\n"
+    "<h3>Maandelijkse puntenverdeling per term:</h3>\n"
+    "<table class='trend'>\n<tr><th>Term</th><th>Punten per maand</th><th>Groei</th></tr>\n$distribution</table>\n"
+    "<hr>\n"
+)
+LIST_ITEM = Template("<li>$value</li>\n")
+TERM_ROW = Template("<tr><td>$term</td><td>$sparkline</td><td>$growth</td></tr>\n")
+FOOTER = "</body></html>\n"
+
+
+def report_path(start_date, end_date, output_dir="output"):
+    return os.path.join(output_dir, f"html_output_{start_date}_{end_date}.html")
+
+
+def sparkline(month_dict, width=120, height=24):
+    """Inline SVG-sparkline van de punten per maand, met de waarden als tooltip."""
+    months = sorted(month_dict)
+    if not months:
+        return "-"
+    values = [month_dict[month] for month in months]
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    step = width / (len(values) - 1) if len(values) > 1 else 0
+    points = [(i * step, height - 2 - (value - low) / span * (height - 4)) for i, value in enumerate(values)]
+    tooltip = ", ".join(f"{month}: {value:g}" for month, value in zip(months, values))
+    line = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+    last_x, last_y = points[-1]
+    return (f"<svg class='spark' width='{width}' height='{height}' viewBox='0 0 {width} {height}'>"
+            f"<title>{escape(tooltip)}</title>"
+            f"<polyline fill='none' stroke='steelblue' stroke-width='1.5' points='{line}'/>"
+            f"<circle cx='{last_x:.1f}' cy='{last_y:.1f}' r='2' fill='steelblue'/></svg>")
+
+
+def _list_items(values):
+    return "".join(LIST_ITEM.substitute(value=escape(str(value))) for value in values)
+
+
+def render_topic(result):
+    """HTML-sectie van één topic (LLMAnalysisOutput)."""
+    rows = []
+    for term, info in result.terms_monthly_distribution.items():
+        growth = "n.v.t." if info.growth is None else f"{info.growth:.2f}"
+        rows.append(TERM_ROW.substitute(term=escape(term), sparkline=sparkline(info.month_dict), growth=growth))
+    return TOPIC.substitute(
+        title=escape(result.topic_title),
+        important_terms=_list_items(result.important_terms),
+        trending_words=_list_items(result.trending_words),
+        trend_summary=escape(result.trend_summary),
+        relevance_explanation=escape(result.relevance_explanation),
+        article_names=_list_items(result.article_names),
+        distribution="".join(rows),
+    )
+
+
+class ReportWriter:
+    """
+    Schrijft het HTML-rapport topic voor topic naar schijf. Iedere sectie wordt direct
+    na write_topic weggeschreven naar <path>.tmp, zodat grote rapporten niet in het
+    geheugen hoeven te staan. Pas na een geslaagde run vervangt het rapport het vorige
+    op path; bij een afgebroken run blijft het vorige volledige rapport staan en staan
+    de topics tot dan toe in <path>.tmp.
+    """
+
+    def __init__(self, path, start_date, end_date):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(self.tmp_path, "w", encoding="utf-8")
+        self._file.write(HEADER.substitute(period=escape(f"{start_date} - {end_date}")))
+        self._file.flush()
+
+    def write_topic(self, result):
+        self._file.write(render_topic(result))
+        self._file.flush()
+
+    def close(self, complete=True):
+        """Sluit het rapport af; met complete vervangt het daarna het rapport op path."""
+        if not self._file.closed:
+            self._file.write(FOOTER)
+            self._file.close()
+            if complete:
+                os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
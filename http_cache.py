@@ -0,0 +1,182 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+
+# Status codes that will not go away by retrying (not found, gone, paywalls/blocks).
+PERMANENT_FAILURE_STATUSES = {401, 402, 403, 404, 410, 451}
+# A 403 is often a bot block that lifts again, so it is only remembered this long
+# instead of the full negative_ttl.
+SHORT_FAILURE_TTLS = {403: 24 * 3600}
+
+
+def cache_key(url, params=None):
+    """Content-addressed key for a request: sha256 of the URL and sorted params."""
+    raw = url
+    if params:
+        raw += "?" + json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """
+    On-disk cache of fetched pages for get_with_retry.
+
+    Every entry consists of <key>.json (url, status, headers, ETag/Last-Modified,
+    fetch time) and <key>.body.gz (gzip-compressed body). Fresh entries (younger than
+    ttl seconds) are served without a request; stale entries are revalidated with
+    If-None-Match / If-Modified-Since. The total size is bounded by max_bytes, evicting
+    the least recently used entries first. URLs that failed permanently are kept in a
+    negative cache for negative_ttl seconds so reruns skip them immediately.
+    """
+
+    def __init__(self, cache_dir, ttl=7 * 24 * 3600, max_bytes=500 * 1024 * 1024,
+                 negative_ttl=30 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, key):
+        folder = os.path.join(self.cache_dir, key[:2])
+        return (os.path.join(folder, f"{key}.json"),
+                os.path.join(folder, f"{key}.body.gz"),
+                os.path.join(folder, f"{key}.failed.json"))
+
+    @staticmethod
+    def _write_atomic(path, data, mode="w"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{time.monotonic_ns()}.tmp"
+        if mode == "wb":
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        else:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+        os.replace(tmp_path, path)
+
+    def lookup(self, url, params=None):
+        """Returns the cached metadata for a request, or None."""
+        meta_path, body_path, _ = self._paths(cache_key(url, params))
+        if not os.path.exists(meta_path) or not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Access time drives the LRU eviction
+        now = time.time()
+        os.utime(body_path, (now, now))
+        return meta
+
+    def is_fresh(self, meta):
+        return time.time() - meta.get("fetched_at", 0) < self.ttl
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def to_response(self, meta):
+        """Rebuilds a requests.Response from a cache entry."""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        _, body_path, _ = self._paths(meta["key"])
+        with gzip.open(body_path, "rb") as f:
+            body = f.read()
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+        response.url = meta["url"]
+        response.encoding = meta.get("encoding")
+        response._content = body
+        return response
+
+    def store(self, url, response, params=None):
+        key = cache_key(url, params)
+        meta_path, body_path, failed_path = self._paths(key)
+        meta = {
+            "key": key,
+            "url": url,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        self._write_atomic(body_path, gzip.compress(response.content), mode="wb")
+        self._write_atomic(meta_path, json.dumps(meta))
+        if os.path.exists(failed_path):
+            os.remove(failed_path)
+
+    def refresh(self, meta):
+        """Marks an entry as fresh again after a 304 Not Modified."""
+        meta = dict(meta, fetched_at=time.time())
+        meta_path, _, _ = self._paths(meta["key"])
+        self._write_atomic(meta_path, json.dumps(meta))
+        return meta
+
+    def mark_failed(self, url, reason, params=None, ttl=None):
+        """Records a failure; it is skipped for ttl seconds (default negative_ttl)."""
+        _, _, failed_path = self._paths(cache_key(url, params))
+        record = {"url": url, "reason": reason, "failed_at": time.time()}
+        if ttl is not None:
+            record["ttl"] = ttl
+        self._write_atomic(failed_path, json.dumps(record))
+
+    def failure(self, url, params=None):
+        """Returns the reason of a recorded permanent failure that has not expired, or None."""
+        _, _, failed_path = self._paths(cache_key(url, params))
+        if not os.path.exists(failed_path):
+            return None
+        try:
+            with open(failed_path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        ttl = min(record.get("ttl", self.negative_ttl), self.negative_ttl)
+        if time.time() - record.get("failed_at", 0) > ttl:
+            os.remove(failed_path)
+            return None
+        return record.get("reason", "failed")
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        Returns the number of evicted entries.
+        """
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(".body.gz"):
+                    continue
+                key = file[:-len(".body.gz")]
+                body_path = os.path.join(root, file)
+                meta_path = os.path.join(root, f"{key}.json")
+                try:
+                    size = os.path.getsize(body_path)
+                    if os.path.exists(meta_path):
+                        size += os.path.getsize(meta_path)
+                    atime = os.path.getmtime(body_path)
+                except OSError:
+                    continue
+                entries.append((atime, size, body_path, meta_path))
+                total += size
+        evicted = 0
+        for atime, size, body_path, meta_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (body_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+            evicted += 1
+        return evicted
@@ -0,0 +1,75 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class RunStats:
+    """
+    Tijden en tellers van een run, per stap en per topic. Een stap wordt gemeten met
+    stage(name); count() telt op bij de stap die in de huidige thread loopt (of bij
+    "overig" buiten een stap). summary() geeft alles als JSON-serialiseerbare dict.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self.stages = {}
+            self.topics = {}
+
+    def _stage_record(self, name):
+        return self.stages.setdefault(name, {"seconds": 0.0, "calls": 0})
+
+    @contextmanager
+    def stage(self, name):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                record = self._stage_record(name)
+                record["seconds"] += elapsed
+                record["calls"] += 1
+
+    def count(self, name, value=1, stage=None):
+        """Telt value op bij teller name van stage (standaard de lopende stap)."""
+        if stage is None:
+            stack = getattr(self._local, "stack", None)
+            stage = stack[-1] if stack else "overig"
+        with self._lock:
+            record = self._stage_record(stage)
+            record[name] = record.get(name, 0) + value
+
+    def topic(self, topic_id, **fields):
+        """Legt gegevens van één topic vast, bijvoorbeeld tokens en latency van de LLM-aanroep."""
+        with self._lock:
+            self.topics.setdefault(str(topic_id), {}).update(fields)
+
+    def summary(self):
+        with self._lock:
+            return {
+                "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started_at)),
+                "wall_seconds": time.perf_counter() - self._start,
+                "stages": {name: dict(record) for name, record in self.stages.items()},
+                "topics": {topic_id: dict(fields) for topic_id, fields in self.topics.items()},
+            }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, default=str)
+
+
+# Gedeelde meetgegevens van het proces; main.py schrijft ze na de run weg
+stats = RunStats()
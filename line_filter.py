@@ -0,0 +1,69 @@
+import threading
+
+from spellchecker import SpellChecker
+
+
+class LineFilter:
+    """
+    Fast line-quality filter for scraped article text.
+
+    Gives the same keep/drop decisions as checking every line with
+    SpellChecker.unknown(), but the vocabulary is frozen once into a set, each line
+    is lowercased in one go instead of word by word, and the (relatively expensive)
+    "should this word be checked" rules are only evaluated for words that are not in
+    the vocabulary.
+    """
+
+    def __init__(self, language='en'):
+        self._spell = SpellChecker(language=language)
+        self.vocabulary = frozenset(self._spell.word_frequency.dictionary)
+        self._should_check = {}
+
+    def _is_unknown(self, word):
+        if word in self.vocabulary:
+            return False
+        # SpellChecker skips punctuation, numbers and overly long words; cache the outcome
+        should_check = self._should_check.get(word)
+        if should_check is None:
+            should_check = self._spell._check_if_should_check(word)
+            self._should_check[word] = should_check
+        return should_check
+
+    def keep_line(self, line, min_letters=3, min_spell_ratio=0.5):
+        """Decides for a stripped, non-empty line whether it is kept."""
+        if sum(map(str.isalpha, line)) < min_letters:
+            return False
+        # Lowercasing the whole line splits into the same words as lowercasing each word
+        words = line.lower().split()
+        if not words:
+            return False
+        # Like SpellChecker.unknown() this counts each distinct unknown word once
+        unknown = {w for w in words if self._is_unknown(w)}
+        ratio = (len(words) - len(unknown)) / len(words)
+        return ratio >= min_spell_ratio
+
+    def filter_text(self, raw_text, min_letters=3, min_spell_ratio=0.5):
+        """Returns the kept lines of a document, joined with newlines."""
+        kept = []
+        for line in raw_text.splitlines():
+            line = line.strip()
+            if line and self.keep_line(line, min_letters, min_spell_ratio):
+                kept.append(line)
+        return "\n".join(kept)
+
+    def filter_documents(self, texts, min_letters=3, min_spell_ratio=0.5):
+        """Filters a batch of documents; returns the cleaned texts in the same order."""
+        return [self.filter_text(text, min_letters, min_spell_ratio) for text in texts]
+
+
+_line_filter = None
+_line_filter_lock = threading.Lock()
+
+
+def get_line_filter():
+    """Shared LineFilter; the vocabulary is loaded only once per process."""
+    global _line_filter
+    with _line_filter_lock:
+        if _line_filter is None:
+            _line_filter = LineFilter()
+    return _line_filter
@@ -1,36 +1,250 @@
 import os
 import re
+import time
+import random
+import threading
+from contextlib import contextmanager, nullcontext
 from collections import Counter
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from llm_output import LLMAnalysisOutput
+from llm_output import LLMAnalysisOutput, LLMTopicAnalysis
+from llm_cache import LLMCache, llm_cache_key
+from prompt_builder import (DEFAULT_PROMPT_BUDGET, DEFAULT_FRAGMENT_TOKENS, build_topic_prompt, count_tokens,
+                            estimate_cost)
 from trend_analysis import clean_and_tokenize
-import nltk
+from instrumentation import stats as run_stats
 
 # Laad de .env file zodat OPENAI_API_KEY beschikbaar is
 load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+DEFAULT_MODEL = "gpt-4o"
+TEMPERATURE = 0.7
+# Statuscodes waarbij een aanroep na een pauze opnieuw wordt geprobeerd
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+# Geschatte lengte van een antwoord, voor het tokenbudget per minuut; in de structured-output
+# modus bevat het antwoord alleen titel, termen, samenvatting en relevantie
+EXPECTED_COMPLETION_TOKENS = 1500
+STRUCTURED_COMPLETION_TOKENS = 500
 
-def analyze_topic(topic_id: str, docs: list, files: list, score_map: dict, trend_info: dict) -> LLMAnalysisOutput:
+# System prompt met context, objectieven en instructies
+_PROMPT_INTRO = (
+    "# CONTEXT #\n"
+    "You are an experienced trend analyst working for the municipality of Amsterdam. "
+    "Amsterdam actively monitors technical trends in AI to support its AI Lab and innovation department. "
+    "It is crucial to identify emerging technical trends, potential risks for citizen safety, "
+    "opportunities for innovation and changes in legislation. Your analysis should combine quantitative trends with qualitative insights.\n\n"
+    "# OBJECTIVE #\n"
+    "Based on the provided topic data, determine which 5 terms from the top 10 are truly discriminative and analyze their monthly points trend. "
+    "Then, summarize the overall trend and topic based on the documents, and explain critically the relevance of this topic for the municipality. "
+    "In your explanation, focus on technical opportunities, risks for citizens, and potential changes in laws and regulations. "
+    "Additionally, please provide a creative title for this topic.\n\n"
+    "# STYLE #\n"
+    "Respond in clear, concise, and analytical language. Your answer should be strictly in JSON format according to the specified schema.\n\n"
+)
+SYSTEM_PROMPT = _PROMPT_INTRO + (
+    "# RESPONSE FORMAT #\n"
+    "Return a JSON object with the following keys:\n"
+    "- 'topic_title': string,\n"
+    "- 'important_terms': array of 5 strings,\n"
+    "- 'trending_words': array of 5 strings,\n"
+    "- 'sample_fragments': array of strings,\n"
+    "- 'trend_summary': string,\n"
+    "- 'relevance_explanation': string,\n"
+    "- 'article_names': array of strings,\n"
+    "- 'terms_monthly_distribution': object (mapping each term to its monthly trend info, including 'growth' and 'month_dict')\n\n"
+    "Ensure the JSON is valid."
+)
+# In de structured-output modus worden de fragmenten, titels en verdeling niet teruggegeven
+STRUCTURED_SYSTEM_PROMPT = _PROMPT_INTRO + (
+    "# RESPONSE FORMAT #\n"
+    "Return a JSON object with the following keys:\n"
+    "- 'topic_title': string,\n"
+    "- 'important_terms': array of the 5 most discriminative terms,\n"
+    "- 'trend_summary': string,\n"
+    "- 'relevance_explanation': string"
+)
+
+# De OpenAI clients (en het openai pakket) worden pas bij de eerste LLM-aanroep geladen,
+# één per base_url (bijvoorbeeld een lokale OpenAI-compatibele testserver)
+_clients = {}
+_client_lock = threading.Lock()
+
+
+def get_client(base_url=None):
+    """Gedeelde OpenAI client, aangemaakt bij het eerste gebruik."""
+    with _client_lock:
+        if base_url not in _clients:
+            from openai import OpenAI
+            # Herhalingen doet call_llm zelf, met het gedeelde tokenbudget
+            _clients[base_url] = OpenAI(api_key=os.getenv("OPENAI_API_KEY") or "not-set",
+                                        base_url=base_url, max_retries=0)
+        return _clients[base_url]
+
+
+class RateLimiter:
+    """
+    Limieten voor de LLM-aanroepen: hooguit max_concurrency gelijktijdige aanroepen en
+    een budget van tokens_per_minute (token bucket die continu wordt bijgevuld). Een
+    aanroep die groter is dan het hele budget wacht tot de bucket vol is.
+    """
+
+    def __init__(self, max_concurrency=4, tokens_per_minute=30000):
+        self.capacity = float(tokens_per_minute) if tokens_per_minute else None
+        self._semaphore = threading.Semaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._available = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._available = min(self.capacity, self._available + (now - self._updated) * self.capacity / 60.0)
+        self._updated = now
+
+    def _reserve(self, tokens):
+        if self.capacity is None:
+            return
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._available >= tokens:
+                    self._available -= tokens
+                    return
+                wait = (tokens - self._available) * 60.0 / self.capacity
+            time.sleep(wait)
+
+    def adjust(self, tokens):
+        """Verrekent het verschil tussen het werkelijke en het geschatte tokengebruik."""
+        if self.capacity is None:
+            return
+        with self._lock:
+            self._refill()
+            self._available = min(self.capacity, self._available - tokens)
+
+    @contextmanager
+    def slot(self, tokens):
+        with self._semaphore:
+            self._reserve(tokens)
+            yield
+
+
+def _retry_delay(error, attempt, base_delay):
+    """Wachttijd voor de volgende poging: Retry-After van de server of exponentiële backoff."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return float(retry_after)
+    except ValueError:
+        pass
+    return base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+
+
+def _is_retryable(error):
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    # Verbindingsfouten en time-outs hebben geen statuscode
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def json_schema_format(model_class):
+    """response_format voor structured output volgens het (strikte) JSON-schema van model_class."""
+    schema = model_class.model_json_schema()
+    schema["additionalProperties"] = False
+    return {"type": "json_schema",
+            "json_schema": {"name": model_class.__name__, "schema": schema, "strict": True}}
+
+
+def call_llm(system_prompt, user_prompt, model=DEFAULT_MODEL, temperature=TEMPERATURE, limiter=None,
+             max_retries=5, base_delay=2.0, base_url=None, response_format=None,
+             completion_tokens=EXPECTED_COMPLETION_TOKENS, usage=None):
+    """
+    Voert één chat completion uit binnen de limieten van limiter en probeert het bij
+    429, 5xx en verbindingsfouten opnieuw met backoff. Retourneert de tekst van het
+    antwoord; na max_retries herhalingen wordt de laatste fout doorgegeven. Met
+    response_format (zie json_schema_format) gebruikt de API structured output. In de
+    dict usage worden het tokengebruik, het aantal pogingen en de duur bijgehouden.
+    """
+    # Dezelfde telling als het promptbudget, zodat limiter en budget het over de prompt eens zijn
+    estimate = count_tokens(system_prompt, model) + count_tokens(user_prompt, model) + completion_tokens
+    extra = {"response_format": response_format} if response_format is not None else {}
+    attempt = 0
+    start = time.perf_counter()
+    while True:
+        try:
+            with limiter.slot(estimate) if limiter is not None else nullcontext():
+                response = get_client(base_url).chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=temperature,
+                    **extra
+                )
+        except Exception as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            time.sleep(_retry_delay(e, attempt, base_delay))
+            attempt += 1
+            continue
+        response_usage = getattr(response, "usage", None)
+        if limiter is not None and response_usage is not None and getattr(response_usage, "total_tokens", None):
+            limiter.adjust(response_usage.total_tokens - estimate)
+        if usage is not None:
+            usage["llm_attempts"] = attempt + 1
+            usage["llm_seconds"] = time.perf_counter() - start
+            usage["llm_prompt_tokens"] = getattr(response_usage, "prompt_tokens", None)
+            usage["llm_completion_tokens"] = getattr(response_usage, "completion_tokens", None)
+        message = response.choices[0].message
+        if message.content is None and getattr(message, "refusal", None):
+            raise ValueError(f"De LLM weigerde het verzoek: {message.refusal}")
+        return message.content
+
+
+def error_output(message):
+    """LLMAnalysisOutput voor een topic waarvan de analyse mislukt is."""
+    return LLMAnalysisOutput(topic_title="Error", important_terms=[], trending_words=[], sample_fragments=[],
+                             trend_summary=f"Error: {message}", relevance_explanation="", article_names=[],
+                             terms_monthly_distribution={})
+
+
+def analyze_topic(topic_id: str, docs: list, files: list, score_map: dict, trend_info: dict,
+                  top_terms: list = None, limiter: RateLimiter = None, model: str = DEFAULT_MODEL,
+                  max_retries: int = 5, base_url: str = None, cache: LLMCache = None,
+                  order: list = None, prompt_budget: int = DEFAULT_PROMPT_BUDGET,
+                  fragment_tokens: int = DEFAULT_FRAGMENT_TOKENS, prompt_stats: dict = None,
+                  structured: bool = False) -> LLMAnalysisOutput:
     """
     Voor een gegeven topic:
-    - Berekent de top 10 termen (frequentie) uit de documenten in het topic.
+    - Berekent de top 10 termen (frequentie) uit de documenten in het topic, tenzij
+      run_analysis ze al via de term-index heeft bepaald (top_terms).
     - Berekent de top trending woorden als de top 5 van de top 10 termen.
-    - Voegt alle documenten toe als sample representatieve fragmenten.
-    - Extraheert de artikeltitels door de eerste 150 karakters van elk artikel te lezen.
+    - Kiest binnen prompt_budget tokens de meest representatieve documenten (order) als
+      fragmenten, elk ingekort tot fragment_tokens, met hun artikeltitel (de eerste 150
+      karakters van het artikel). Met prompt_budget 0 gaan alle documenten volledig mee.
     - Bereidt de maandelijkse puntenverdeling en de daadwerkelijke groei per term voor (via trend_info).
     - Stelt een prompt op volgens het CO‑STAR principe met extra context voor de gemeente Amsterdam.
-    - Roept OpenAI aan en valideert de JSON-output via het LLMAnalysisOutput model.
-    - Retourneert de gevalideerde output.
+    - Roept OpenAI aan (binnen de limieten van limiter, met herhalingen bij 429/5xx) en
+      valideert de JSON-output via het LLMAnalysisOutput model.
+    - Met structured vraagt de LLM via structured output alleen titel, belangrijke
+      termen, samenvatting en relevantie (LLMTopicAnalysis); trending woorden,
+      fragmenten, artikeltitels en maandelijkse verdeling worden lokaal aangevuld.
+    - Retourneert de gevalideerde output. De promptgrootte en geschatte kosten komen in
+      prompt_stats[topic_id] als dat meegegeven is. Met cache wordt een eerder gevalideerd antwoord
+      op exact dezelfde prompt (en model/parameters) hergebruikt zonder API-aanroep.
     """
     # Bereken top 10 termen
-    all_tokens = []
-    for doc in docs:
-        tokens = clean_and_tokenize(doc)
-        all_tokens.extend(tokens)
-    freq = Counter(all_tokens)
-    top10_terms = [term for term, count in freq.most_common(10)]
+    if top_terms is not None:
+        top10_terms = list(top_terms[:10])
+    else:
+        all_tokens = []
+        for doc in docs:
+            tokens = clean_and_tokenize(doc)
+            all_tokens.extend(tokens)
+        freq = Counter(all_tokens)
+        top10_terms = [term for term, count in freq.most_common(10)]
     # Top trending woorden: top 5 van de top 10
     trending_words = top10_terms[:5]
 
@@ -40,76 +254,46 @@ def analyze_topic(topic_id: str, docs: list, files: list, score_map: dict, trend
         info = trend_info.get(term, {"growth": None, "month_dict": {}})
         terms_monthly_distribution[term] = info
 
-    # Voeg alle documenten als sample representatieve fragmenten toe
-    sample_fragments = []
-    for doc in docs:
-        frag = doc.strip().replace("\n", " ")
-        if frag:
-            sample_fragments.append(frag)
-
-    # Extraheer artikeltitels: gebruik de eerste 150 karakters van het bestand
+    # Extraheer artikeltitels: gebruik de eerste 150 karakters van elk artikel. De
+    # documenten zijn de ingelezen inhoud van files, dus die hoeven niet opnieuw gelezen te worden.
     article_names = []
-    if files:
-        for f in files:
+    for doc, f in zip(docs, files):
+        article_names.append(doc[:150] if doc else os.path.basename(f))
+
+    system_prompt = STRUCTURED_SYSTEM_PROMPT if structured else SYSTEM_PROMPT
+
+    # Fragmenten en titels van de meest representatieve documenten, binnen het tokenbudget
+    user_prompt, sample_fragments, _, stats = build_topic_prompt(
+        system_prompt, topic_id, docs, article_names, top10_terms, trending_words,
+        terms_monthly_distribution, order=order, budget=prompt_budget,
+        fragment_tokens=fragment_tokens, model=model)
+    completion_tokens = STRUCTURED_COMPLETION_TOKENS if structured else EXPECTED_COMPLETION_TOKENS
+    stats["estimated_cost"] = estimate_cost(stats["prompt_tokens"], completion_tokens, model)
+    stats["cached"] = False
+    if prompt_stats is not None:
+        prompt_stats[topic_id] = stats
+
+    # Antwoorden van een andere endpoint (zoals de lokale testserver) krijgen een eigen
+    # sleutel; zonder base_url blijft de sleutel van de echte API ongewijzigd
+    cache_params = {"temperature": TEMPERATURE, "structured": structured}
+    if base_url:
+        cache_params["base_url"] = base_url
+    cache_key = llm_cache_key(system_prompt, user_prompt, model, cache_params)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
             try:
-                with open(f, "r", encoding="utf-8") as file:
-                    content = file.read().strip()
-                    title = content[:150]
-                    article_names.append(title)
+                llm_output = LLMAnalysisOutput.parse_raw(cached)
+                stats["cached"] = True
+                return llm_output
             except Exception:
-                article_names.append(os.path.basename(f))
-    else:
-        article_names = []
-
-    # System prompt met context, objectieven en instructies
-    system_prompt = (
-        "# CONTEXT #\n"
-        "You are an experienced trend analyst working for the municipality of Amsterdam. "
-        "Amsterdam actively monitors technical trends in AI to support its AI Lab and innovation department. "
-        "It is crucial to identify emerging technical trends, potential risks for citizen safety, "
-        "opportunities for innovation and changes in legislation. Your analysis should combine quantitative trends with qualitative insights.\n\n"
-        "# OBJECTIVE #\n"
-        "Based on the provided topic data, determine which 5 terms from the top 10 are truly discriminative and analyze their monthly points trend. "
-        "Then, summarize the overall trend and topic based on the documents, and explain critically the relevance of this topic for the municipality. "
-        "In your explanation, focus on technical opportunities, risks for citizens, and potential changes in laws and regulations. "
-        "Additionally, please provide a creative title for this topic.\n\n"
-        "# STYLE #\n"
-        "Respond in clear, concise, and analytical language. Your answer should be strictly in JSON format according to the specified schema.\n\n"
-        "# RESPONSE FORMAT #\n"
-        "Return a JSON object with the following keys:\n"
-        "- 'topic_title': string,\n"
-        "- 'important_terms': array of 5 strings,\n"
-        "- 'trending_words': array of 5 strings,\n"
-        "- 'sample_fragments': array of strings,\n"
-        "- 'trend_summary': string,\n"
-        "- 'relevance_explanation': string,\n"
-        "- 'article_names': array of strings,\n"
-        "- 'terms_monthly_distribution': object (mapping each term to its monthly trend info, including 'growth' and 'month_dict')\n\n"
-        "Ensure the JSON is valid."
-    )
-
-    user_prompt = (
-        f"# TOPIC DATA #\n"
-        f"Topic ID: {topic_id}\n"
-        f"Top 10 Terms: {top10_terms}\n"
-        f"Trending Words: {trending_words}\n"
-        f"Number of documents: {len(docs)}\n"
-        f"Article Titles: {article_names}\n"
-        f"Terms Monthly Distribution: {terms_monthly_distribution}\n"
-        f"Sample Fragments: {sample_fragments}\n\n"
-        "Please provide your analysis following the guidelines above."
-    )
+                pass
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.7
-        )
-        result_text = response.choices[0].message.content
+        result_text = call_llm(system_prompt, user_prompt, model=model, limiter=limiter,
+                               max_retries=max_retries, base_url=base_url,
+                               response_format=json_schema_format(LLMTopicAnalysis) if structured else None,
+                               completion_tokens=completion_tokens, usage=stats)
 
         # Verwijder eventuele markdown-codeblokken (```json ... ```)
         pattern = r"```json\s*(.*?)\s*```"
@@ -117,28 +301,94 @@ def analyze_topic(topic_id: str, docs: list, files: list, score_map: dict, trend
         if match:
             result_text = match.group(1)
     except Exception as e:
-        result_text = (
-            f'{{"topic_title": "Error", "important_terms": [], "trending_words": [], '
-            f'"sample_fragments": [], "trend_summary": "Error: {e}", '
-            f'"relevance_explanation": "", "article_names": [], "terms_monthly_distribution": {{}}}}'
-        )
+        return error_output(e)
 
     try:
-        llm_output = LLMAnalysisOutput.parse_raw(result_text)
+        if structured:
+            analysis = LLMTopicAnalysis.parse_raw(result_text)
+            llm_output = LLMAnalysisOutput(
+                topic_title=analysis.topic_title, important_terms=analysis.important_terms,
+                trending_words=trending_words, trend_summary=analysis.trend_summary,
+                relevance_explanation=analysis.relevance_explanation, sample_fragments=sample_fragments,
+                article_names=article_names, terms_monthly_distribution=terms_monthly_distribution)
+        else:
+            llm_output = LLMAnalysisOutput.parse_raw(result_text)
     except Exception as e:
         raise ValueError(
             f"Fout bij het valideren van de LLM output voor topic {topic_id}: {e}\nRaw response: {result_text}"
         )
 
+    if cache is not None:
+        cache.put(cache_key, llm_output.json(), model=model)
     return llm_output
 
 
-def run_llm_analysis(ai_cluster_docs, ai_cluster_files, score_map, trend_info):
-    topic_llm_results = {}
-    for topic_id in ai_cluster_docs:
-        docs = ai_cluster_docs[topic_id]
-        files = ai_cluster_files[topic_id]
-        llm_result = analyze_topic(
-            str(topic_id), docs, files, score_map, trend_info)
-        topic_llm_results[topic_id] = llm_result
-    return topic_llm_results
+def print_prompt_stats(prompt_stats, topic_ids):
+    """Toont per topic de promptgrootte en de geschatte kosten, plus het totaal."""
+    total_tokens, total_cost = 0, 0.0
+    for topic_id in topic_ids:
+        stats = prompt_stats.get(str(topic_id))
+        if stats is None:
+            continue
+        cost = stats["estimated_cost"]
+        line = (f"Topic {topic_id}: prompt {stats['prompt_tokens']} tokens, "
+                f"{stats['fragments']}/{stats['documents']} fragmenten")
+        if stats["cached"]:
+            line += ", uit de cache"
+        elif cost is not None:
+            line += f", geschat ${cost:.4f}"
+            total_cost += cost
+        print(line)
+        total_tokens += stats["prompt_tokens"]
+    print(f"Totaal: {total_tokens} prompt-tokens, geschatte kosten ${total_cost:.4f}")
+
+
+def run_llm_analysis(ai_cluster_docs, ai_cluster_files, score_map, trend_info, ai_cluster_info=None,
+                     max_concurrency=4, tokens_per_minute=30000, max_retries=5, model=DEFAULT_MODEL,
+                     base_url=None, cache=None, prompt_budget=DEFAULT_PROMPT_BUDGET,
+                     fragment_tokens=DEFAULT_FRAGMENT_TOKENS, structured=False, on_result=None,
+                     completed=None):
+    """
+    Analyseert de topics parallel (hooguit max_concurrency tegelijk, binnen een budget
+    van tokens_per_minute). Een mislukt topic levert een "Error"-resultaat op in plaats
+    van het hele rapport af te breken. De resultaten staan in dezelfde volgorde als de
+    topics in ai_cluster_docs. Met cache (een LLMCache) worden eerder gevalideerde
+    antwoorden hergebruikt. Per topic worden de promptgrootte en de geschatte kosten getoond.
+    on_result(topic_id, result) wordt in de volgorde van de topics aangeroepen zodra een
+    topic (en alle topics ervoor) klaar is, bijvoorbeeld om het rapport bij te schrijven.
+    Topics in completed ({topic_id: LLMAnalysisOutput}, bijvoorbeeld uit een checkpoint)
+    worden niet opnieuw geanalyseerd.
+    """
+    limiter = RateLimiter(max_concurrency, tokens_per_minute)
+    topic_ids = list(ai_cluster_docs)
+    prompt_stats = {}
+
+    def analyze(topic_id):
+        if completed and topic_id in completed:
+            return completed[topic_id]
+        info = (ai_cluster_info or {}).get(topic_id, {})
+        try:
+            return analyze_topic(str(topic_id), ai_cluster_docs[topic_id], ai_cluster_files[topic_id],
+                                 score_map, trend_info, info.get("top_terms"), limiter=limiter, model=model,
+                                 max_retries=max_retries, base_url=base_url, cache=cache,
+                                 order=info.get("representative_order"), prompt_budget=prompt_budget,
+                                 fragment_tokens=fragment_tokens, prompt_stats=prompt_stats,
+                                 structured=structured)
+        except Exception as e:
+            print(f"Analyse van topic {topic_id} mislukt: {e}")
+            return error_output(e)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        for topic_id, result in zip(topic_ids, executor.map(analyze, topic_ids)):
+            results[topic_id] = result
+            if on_result is not None:
+                on_result(topic_id, result)
+    if cache is not None:
+        cache.evict()
+    print_prompt_stats(prompt_stats, topic_ids)
+    for topic_id, topic_stats in prompt_stats.items():
+        run_stats.topic(topic_id, **topic_stats)
+        for key in ("llm_prompt_tokens", "llm_completion_tokens"):
+            run_stats.count(key, topic_stats.get(key) or 0, stage="llm")
+    return results
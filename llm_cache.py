@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import hashlib
+
+DEFAULT_CACHE_DIR = "./.llm_cache"
+
+
+def llm_cache_key(system_prompt, user_prompt, model, params=None):
+    """Inhoudsadres van een LLM-aanroep: sha256 van prompts, model en parameters."""
+    raw = json.dumps({"system": system_prompt, "user": user_prompt, "model": model,
+                      "params": params or {}}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Cache op schijf van gevalideerde LLM-antwoorden (LLMAnalysisOutput als JSON),
+    geadresseerd met llm_cache_key. Een herhaalde run met dezelfde prompt, hetzelfde
+    model en dezelfde parameters slaat de API-aanroep over. Entries waarvan created_at
+    meer dan max_age seconden geleden is vervallen, ook als ze nog gelezen worden; met
+    evict() wordt de totale grootte beperkt tot max_bytes door de minst recent gebruikte
+    entries (volgens de mtime, die get() bijwerkt) te verwijderen.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_age=30 * 24 * 3600, max_bytes=100 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Het bewaarde JSON-antwoord voor key, of None als het ontbreekt of verlopen is."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.max_age and time.time() - entry.get("created_at", 0) > self.max_age:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        # De mtime bepaalt de volgorde bij het opruimen (minst recent gebruikt eerst)
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return entry.get("output")
+
+    def put(self, key, output_json, model=None):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{time.monotonic_ns()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "model": model, "output": output_json}, f)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Verwijdert verlopen entries en daarna de minst recent gebruikte, tot de cache
+        binnen max_bytes past. Retourneert het aantal verwijderde entries.
+        """
+        entries = []
+        total = 0
+        now = time.time()
+        evicted = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(".json"):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    size = os.path.getsize(path)
+                    mtime = os.path.getmtime(path)
+                    # De leeftijd komt uit created_at, net als in get(); de mtime is
+                    # alleen het tijdstip van het laatste gebruik
+                    with open(path, "r", encoding="utf-8") as f:
+                        created_at = json.load(f).get("created_at", 0)
+                except (OSError, ValueError):
+                    continue
+                if self.max_age and now - created_at > self.max_age:
+                    os.remove(path)
+                    evicted += 1
+                    continue
+                entries.append((mtime, size, path))
+                total += size
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            evicted += 1
+        return evicted
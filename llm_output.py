@@ -16,3 +16,12 @@ class LLMAnalysisOutput(BaseModel):
     sample_fragments: List[str]
     article_names: List[str]
     terms_monthly_distribution: Dict[str, TermTrendInfo]
+
+
+# Antwoord van de LLM in de structured-output modus: alleen de velden die de LLM zelf
+# bepaalt. De overige velden van LLMAnalysisOutput worden lokaal aangevuld.
+class LLMTopicAnalysis(BaseModel):
+    topic_title: str
+    important_terms: List[str]
+    trend_summary: str
+    relevance_explanation: str
@@ -1,6 +1,14 @@
 import argparse
-from trend_analysis import run_analysis, parse_dates, read_scores
+from trend_analysis import run_analysis, parse_dates, read_scores, read_corpus_scores, NLTK_RESOURCES
 from llm_analysis import run_llm_analysis
+from llm_cache import LLMCache, DEFAULT_CACHE_DIR
+from prompt_builder import DEFAULT_PROMPT_BUDGET, DEFAULT_FRAGMENT_TOKENS
+from clustering import add_clustering_arguments
+from html_report import ReportWriter, report_path
+from run_checkpoints import RunDirectory, fingerprint
+from llm_output import LLMAnalysisOutput
+from instrumentation import stats
+from nltk_resources import check_resources, add_nltk_argument
 import os
 
 
@@ -8,9 +16,11 @@ def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Main file voor clustering en trendanalyse voor AI-artikelen.")
     parser.add_argument("--vec_dir", type=str, default="articles_normalised",
-                        help="Map waar de .vec bestanden (en .txt bestanden) staan.")
+                        help="Map met de genormaliseerde .txt bestanden en de embedding store (of losse .vec bestanden).")
     parser.add_argument("--scraper_dir", type=str, default="./scraper",
                         help="Map waar de CSV-bestanden met scores staan (scraped_data_...).")
+    parser.add_argument("--corpus_dir", type=str, default=None,
+                        help="Lees artikelen, scores en embeddings uit deze Parquet corpus in plaats van vec_dir/scraper_dir.")
     parser.add_argument("--start_date", type=str, required=True,
                         help="Begindatum in formaat YYYY-MM-DD (inclusief).")
     parser.add_argument("--end_date", type=str, required=True,
@@ -19,65 +29,53 @@ def parse_arguments():
                         help="min_cluster_size voor HDBSCAN.")
     parser.add_argument("--min_samples", type=int, default=1,
                         help="min_samples voor HDBSCAN.")
+    add_clustering_arguments(parser)
+    add_nltk_argument(parser)
+    parser.add_argument("--llm_concurrency", type=int, default=4,
+                        help="Aantal topics dat tegelijk door de LLM wordt geanalyseerd.")
+    parser.add_argument("--llm_tokens_per_minute", type=int, default=30000,
+                        help="Tokenbudget per minuut voor de LLM-aanroepen (0 = geen limiet).")
+    parser.add_argument("--llm_max_retries", type=int, default=5,
+                        help="Aantal herhalingen per topic bij 429- en 5xx-fouten.")
+    parser.add_argument("--llm_model", type=str, default="gpt-4o",
+                        help="Model voor de LLM-analyse.")
+    parser.add_argument("--llm_base_url", type=str, default=None,
+                        help="Base URL van een OpenAI-compatibele API, bijvoorbeeld een lokale testserver.")
+    parser.add_argument("--llm_prompt_budget", type=int, default=DEFAULT_PROMPT_BUDGET,
+                        help="Maximaal aantal tokens per prompt; de meest representatieve fragmenten gaan mee "
+                             "tot het budget op is (0 = alle documenten volledig).")
+    parser.add_argument("--llm_fragment_tokens", type=int, default=DEFAULT_FRAGMENT_TOKENS,
+                        help="Maximaal aantal tokens per fragment in de prompt.")
+    parser.add_argument("--llm_structured_output", action="store_true",
+                        help="Laat de LLM via structured output alleen titel, termen, samenvatting en relevantie "
+                             "teruggeven; de overige velden worden lokaal aangevuld.")
+    parser.add_argument("--no-llm-cache", dest="no_llm_cache", action="store_true",
+                        help="Roep de LLM altijd aan, ook als er een bewaard antwoord op dezelfde prompt is.")
+    parser.add_argument("--llm_cache_dir", type=str, default=DEFAULT_CACHE_DIR,
+                        help="Map voor de cache van LLM-antwoorden.")
+    parser.add_argument("--llm_cache_max_age_days", type=float, default=30,
+                        help="Bewaarde LLM-antwoorden vervallen na dit aantal dagen.")
+    parser.add_argument("--llm_cache_max_mb", type=float, default=100,
+                        help="Maximale grootte van de LLM-cache in MB.")
+    parser.add_argument("--run_dir", type=str, default=None,
+                        help="Map voor de checkpoints van deze run (standaard output/run_<start_date>_<end_date>).")
+    parser.add_argument("--resume", action="store_true",
+                        help="Hergebruik de checkpoints in run_dir: voltooide stappen en topics worden overgeslagen "
+                             "zolang hun invoer niet veranderd is.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profileer de run met cProfile en bewaar het profiel naast het HTML-rapport.")
     parser.add_argument("--verbose", action="store_true",
                         help="Geef extra uitvoer")
     args = parser.parse_args()
     return args
 
 
-def generate_html_report(llm_results, start_date, end_date):
-    html_parts = [
-        "<html>",
-        "<head><meta charset='utf-8'><title>LLM Analyse Rapport</title></head>",
-        "<body>",
-        "<h1>LLM Analyse Rapport</h1>"
-    ]
-    for result in llm_results.values():
-        html_parts.append(f"<h2>Topic: {result.topic_title}</h2>")
-        html_parts.append("<h3>Belangrijke termen:</h3>")
-        html_parts.append("<ul>")
-        for term in result.important_terms:
-            html_parts.append(f"<li>{term}</li>")
-        html_parts.append("</ul>")
-        html_parts.append("<h3>Trending woorden:</h3>")
-        html_parts.append("<ul>")
-        for term in result.trending_words:
-            html_parts.append(f"<li>{term}</li>")
-        html_parts.append("</ul>")
-        html_parts.append("<h3>Trend Samenvatting:</h3>")
-        html_parts.append(f"<p>{result.trend_summary}</p>")
-        html_parts.append("<h3>Relevantie Verklaring:</h3>")
-        html_parts.append(f"<p>{result.relevance_explanation}</p>")
-        html_parts.append("<h3>Artikeltitels:</h3>")
-        html_parts.append("<ul>")
-        for name in result.article_names:
-            html_parts.append(f"<li>{name}</li>")
-        html_parts.append("</ul>")
-        html_parts.append("<h3>Maandelijkse puntenverdeling per term:</h3>")
-        html_parts.append("<ul>")
-        for term, info in result.terms_monthly_distribution.items():
-            html_parts.append(f"<li>{term}: {info}</li>")
-        html_parts.append("</ul>")
-        html_parts.append("<hr>")
-    html_parts.append("</body></html>")
-    html_output = "\n".join(html_parts)
-
-    # Zorg dat de output map bestaat
-    output_dir = "output"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-
-    output_file = os.path.join(
-        output_dir, f"html_output_{start_date}_{end_date}.html")
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html_output)
-    return output_file
-
-
-def main():
-    args = parse_arguments()
+def run(args):
+    # Tussenresultaten worden per stap bewaard, zodat een afgebroken run met --resume verder kan
+    run_dir = RunDirectory(args.run_dir or os.path.join("output", f"run_{args.start_date}_{args.end_date}"),
+                           resume=args.resume)
     # Voer run_analysis slechts één keer uit
-    trend_results, ai_cluster_docs, ai_cluster_files = run_analysis(args)
+    trend_results, ai_cluster_docs, ai_cluster_files, ai_cluster_info = run_analysis(args, run_dir)
     if args.verbose:
         print("\nTrendresultaten:")
         for term, growth, month_dict in trend_results:
@@ -92,10 +90,49 @@ def main():
         trend_info[term] = {"growth": growth, "month_dict": month_dict}
 
     start_dt, end_dt = parse_dates(args.start_date, args.end_date)
-    score_map = read_scores(args.scraper_dir, start_dt, end_dt)
+    # run_analysis heeft de score-index al opgebouwd; deze wordt hier hergebruikt. Met een
+    # corpus staan de scores in de corpus zelf en wordt scraper_dir niet gebruikt
+    with stats.stage("read_scores"):
+        if args.corpus_dir:
+            score_map = read_corpus_scores(args.corpus_dir, start_dt, end_dt)
+        else:
+            score_map = read_scores(args.scraper_dir, start_dt, end_dt)
 
-    llm_results = run_llm_analysis(
-        ai_cluster_docs, ai_cluster_files, score_map, trend_info)
+    llm_cache = None
+    if not args.no_llm_cache:
+        llm_cache = LLMCache(args.llm_cache_dir, max_age=args.llm_cache_max_age_days * 24 * 3600,
+                             max_bytes=int(args.llm_cache_max_mb * 1024 * 1024))
+    # Per topic een vingerafdruk van alles wat de prompt bepaalt; voltooide topics uit een
+    # eerdere run worden bij --resume overgeslagen
+    llm_options = [args.llm_model, args.llm_base_url, args.llm_structured_output, args.llm_prompt_budget,
+                   args.llm_fragment_tokens]
+    topic_fingerprints = {}
+    completed = {}
+    for topic_id, files in ai_cluster_files.items():
+        top_terms = ai_cluster_info.get(topic_id, {}).get("top_terms", [])
+        topic_fingerprints[topic_id] = fingerprint(
+            llm_options, files, ai_cluster_info.get(topic_id), {term: trend_info.get(term) for term in top_terms})
+        output_json = run_dir.load_topic(topic_id, topic_fingerprints[topic_id])
+        if output_json is not None:
+            completed[topic_id] = LLMAnalysisOutput.parse_raw(output_json)
+    if completed:
+        print(f"{len(completed)} van de {len(ai_cluster_files)} topics hergebruikt uit {run_dir.path}.")
+
+    def topic_done(topic_id, result):
+        report.write_topic(result)
+        if topic_id not in completed and result.topic_title != "Error":
+            run_dir.save_topic(topic_id, topic_fingerprints[topic_id], result.json())
+
+    # Het rapport wordt per topic bijgeschreven zodra de analyse ervan klaar is
+    html_file = report_path(args.start_date, args.end_date)
+    with ReportWriter(html_file, args.start_date, args.end_date) as report, stats.stage("llm"):
+        llm_results = run_llm_analysis(
+            ai_cluster_docs, ai_cluster_files, score_map, trend_info, ai_cluster_info,
+            max_concurrency=args.llm_concurrency, tokens_per_minute=args.llm_tokens_per_minute,
+            max_retries=args.llm_max_retries, model=args.llm_model, base_url=args.llm_base_url,
+            cache=llm_cache, prompt_budget=args.llm_prompt_budget, fragment_tokens=args.llm_fragment_tokens,
+            structured=args.llm_structured_output,
+            on_result=topic_done, completed=completed)
     if args.verbose:
         print("\nLLM Analyse Resultaten:")
         for result in llm_results.values():
@@ -105,11 +142,41 @@ def main():
             print(f"  Trend samenvatting: {result.trend_summary[:100]}...")
             print(
                 f"  Relevantie verklaring: {result.relevance_explanation[:100]}...")
-    html_file = generate_html_report(
-        llm_results, args.start_date, args.end_date)
     if args.verbose:
         print(f"\nHTML rapport is opgeslagen in: {os.path.abspath(html_file)}")
 
 
+def main():
+    args = parse_arguments()
+    # Controleer de NLTK-resources vooraf, zodat de run niet halverwege stopt
+    check_resources(NLTK_RESOURCES, download=args.nltk_download)
+    # Het overzicht van tijden en tellers (en het profiel) komt naast het HTML-rapport,
+    # ook als de run halverwege afbreekt
+    output_dir = os.path.dirname(report_path(args.start_date, args.end_date))
+    os.makedirs(output_dir, exist_ok=True)
+    period = f"{args.start_date}_{args.end_date}"
+    stats.reset()
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(args)
+    finally:
+        if profiler is not None:
+            import pstats
+            profiler.disable()
+            profile_file = os.path.join(output_dir, f"profile_{period}.prof")
+            profiler.dump_stats(profile_file)
+            with open(os.path.join(output_dir, f"profile_{period}.txt"), "w", encoding="utf-8") as f:
+                pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(50)
+            print(f"Profiel opgeslagen in: {os.path.abspath(profile_file)}")
+        summary_file = os.path.join(output_dir, f"run_summary_{period}.json")
+        stats.save(summary_file)
+        if args.verbose:
+            print(f"Overzicht van de run opgeslagen in: {os.path.abspath(summary_file)}")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,52 @@
+import sys
+from functools import lru_cache
+
+# NLTK-resources van de pipeline, met hun pad binnen nltk_data
+RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+}
+TAGGER = "averaged_perceptron_tagger_eng"
+
+
+def missing_resources(names):
+    """De resources uit names die niet lokaal in nltk_data staan (zonder netwerk)."""
+    import nltk
+    missing = []
+    for name in names:
+        try:
+            nltk.data.find(RESOURCES[name])
+        except LookupError:
+            missing.append(name)
+    return missing
+
+
+def check_resources(names, download=False):
+    """
+    Controleert bij het opstarten of de NLTK-resources lokaal beschikbaar zijn. Met
+    download=True worden ontbrekende resources opgehaald; anders stopt het programma met
+    een melding hoe ze te installeren, in plaats van halverwege een run te falen.
+    """
+    missing = missing_resources(names)
+    if missing and download:
+        import nltk
+        for name in missing:
+            nltk.download(name, quiet=True)
+        missing = missing_resources(names)
+    if missing:
+        print(f"Ontbrekende NLTK-resources: {', '.join(missing)}. Installeer ze met:\n"
+              f"    python -m nltk.downloader {' '.join(missing)}\n"
+              "of start opnieuw met --nltk_download.")
+        sys.exit(1)
+
+
+@lru_cache(maxsize=None)
+def english_stop_words():
+    """De Engelse stopwoorden, één keer per proces ingelezen."""
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words('english'))
+
+
+def add_nltk_argument(parser):
+    parser.add_argument("--nltk_download", action="store_true",
+                        help="Download ontbrekende NLTK-resources bij het opstarten.")
@@ -1,17 +1,32 @@
 import os
 import re
-import glob
+import time
+import json
+import hashlib
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
-import nltk
-from nltk.corpus import stopwords
-from sentence_transformers import SentenceTransformer
+from embedding_store import EmbeddingStore, article_id_from_path, date_from_path
+from nltk_resources import english_stop_words, check_resources, add_nltk_argument
 
-# Zorg dat je de NLTK stopwoorden hebt gedownload
-nltk.download('stopwords')
-stop_words = set(stopwords.words('english'))
+# Voorgetrainde SentenceTransformer; wordt pas bij het eerste gebruik geladen zodat
+# de worker processen die alleen tekst opschonen het model niet hoeven te laden.
+MODEL_NAME = 'all-MiniLM-L6-v2'
+_model = None
 
-# Laad een voorgetrainde SentenceTransformer
-model = SentenceTransformer('all-MiniLM-L6-v2')
+# Manifest met per artikel de content hash, zodat alleen nieuwe of gewijzigde
+# artikelen opnieuw ge-embed worden
+MANIFEST_FILE = "manifest.json"
+
+
+def get_model():
+    global _model
+    if _model is None:
+        # sentence_transformers (en torch) pas hier importeren: de opschoon-workers hebben het niet nodig
+        from sentence_transformers import SentenceTransformer
+        _model = SentenceTransformer(MODEL_NAME)
+    return _model
 
 
 def clean_text(text):
@@ -27,16 +42,18 @@ def clean_text(text):
     text = text.lower()
     # Tokeniseer en filter stopwoorden
     words = text.split()
+    stop_words = english_stop_words()
     words = [w for w in words if w not in stop_words]
     cleaned = ' '.join(words)
     return cleaned
 
 
-def process_article_file(file_path, output_base):
+def prepare_article(file_path, input_base="data", output_base="./articles_normalised"):
     """
     Leest een artikelbestand, verwijdert de header (behalve de titel), controleert of de
     tekst beschikbaar is en schrijft de genormaliseerde tekst naar de output folder.
-    Daarnaast wordt er een embedding vector berekend en opgeslagen.
+    Retourneert (record, cleaned_text) met record = (artikel-id, datum, tekstpad), of
+    None als het artikel overgeslagen wordt. Draait in de worker processen.
     """
     with open(file_path, 'r', encoding='utf-8') as f:
         content = f.read()
@@ -44,12 +61,12 @@ def process_article_file(file_path, output_base):
     # Splits de header van de tekst; we gaan er vanuit dat de header en de tekst gescheiden zijn door een lege regel
     parts = content.split('\n\n', 1)
     if len(parts) < 2:
-        return  # Geen duidelijke scheiding, overslaan
+        return None  # Geen duidelijke scheiding, overslaan
 
     header, body = parts
     # Als het artikel de placeholder bevat, dan overslaan
     if "No article text available." in body:
-        return
+        return None
 
     # Haal de titel op uit de header (alleen de regel die met "Title:" begint)
     title = ""
@@ -64,11 +81,8 @@ def process_article_file(file_path, output_base):
     # Normaliseer de tekst
     cleaned_text = clean_text(full_text)
 
-    # Bereken de embedding vector
-    vector = model.encode(cleaned_text)
-
     # Bepaal de output pad, behoud de subdirectory-structuur
-    relative_path = os.path.relpath(file_path, "data")
+    relative_path = os.path.relpath(file_path, input_base)
     output_path = os.path.join(output_base, relative_path)
     output_dir = os.path.dirname(output_path)
     os.makedirs(output_dir, exist_ok=True)
@@ -77,25 +91,291 @@ def process_article_file(file_path, output_base):
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(cleaned_text)
 
-    # Sla de vector op in een parallel bestand (bijvoorbeeld met dezelfde naam + .vec)
-    vec_output_path = output_path + ".vec"
-    vec_str = ",".join(map(str, vector))
-    with open(vec_output_path, 'w', encoding='utf-8') as f:
-        f.write(vec_str)
+    date_str = date_from_path(relative_path)
+    if date_str is None:
+        return None  # Zonder datum kan het artikel niet op periode geselecteerd worden
+    record = (article_id_from_path(relative_path), date_str, relative_path)
+    return record, cleaned_text
 
 
-def process_all_articles(input_base="data", output_base="./articles_normalised"):
+def process_article_file(file_path, output_base, input_base="data"):
     """
-    Loopt over alle bestanden in de input_base directory en verwerkt ze.
+    Normaliseert één artikel en berekent de embedding vector.
+    Retourneert (record, vector) of None als het artikel overgeslagen wordt.
     """
+    prepared = prepare_article(file_path, input_base, output_base)
+    if prepared is None:
+        return None
+    record, cleaned_text = prepared
+    return record, get_model().encode(cleaned_text)
+
+
+def iter_article_files(input_base):
+    """Geeft alle .txt artikelbestanden onder input_base in vaste volgorde."""
     for root, dirs, files in os.walk(input_base):
-        for file in files:
+        dirs.sort()
+        for file in sorted(files):
             # Veronderstel dat alle artikelbestanden .txt-extensie hebben
             if file.endswith(".txt"):
-                file_path = os.path.join(root, file)
-                process_article_file(file_path, output_base)
+                yield os.path.join(root, file)
 
 
-if __name__ == "__main__":
-    process_all_articles()
+def encode_batch(texts, batch_size, encode_pool=None):
+    """Berekent de embeddings voor een batch teksten, optioneel met een multi-process pool."""
+    model = get_model()
+    if encode_pool is not None:
+        return model.encode_multi_process(texts, encode_pool, batch_size=batch_size)
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+def load_manifest(output_base):
+    """
+    Leest het manifest met per artikel (relatief pad) de content hash en of er een
+    vector in de store staat. Retourneert None als er nog geen manifest is.
+    """
+    path = os.path.join(output_base, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(output_base, manifest):
+    os.makedirs(output_base, exist_ok=True)
+    path = os.path.join(output_base, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def file_signature(file_path, previous=None):
+    """
+    Bepaalt de signatuur (hash, grootte, mtime) van een artikelbestand. Als grootte en
+    mtime gelijk zijn aan de vorige signatuur wordt de hash hergebruikt zonder het
+    bestand opnieuw te lezen.
+    """
+    stat = os.stat(file_path)
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        return previous["hash"], stat.st_size, stat.st_mtime_ns
+    with open(file_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return digest, stat.st_size, stat.st_mtime_ns
+
+
+def remove_normalized_output(output_base, relative_path):
+    output_path = os.path.join(output_base, relative_path)
+    if os.path.exists(output_path):
+        os.remove(output_path)
 
+
+def process_all_articles(input_base="data", output_base="./articles_normalised", batch_size=64,
+                         workers=None, encode_processes=0, full=False):
+    """
+    Loopt over alle bestanden in de input_base directory en verwerkt ze.
+    Alleen nieuwe of gewijzigde artikelen (volgens het manifest) worden opnieuw
+    opgeschoond en ge-embed; bij een ander model of met full=True wordt alles opnieuw
+    verwerkt. Uitvoer van artikelen waarvan de bron verwijderd is wordt opgeruimd.
+    Het inlezen en opschonen gebeurt in een pool van `workers` processen; de
+    opgeschoonde teksten worden in batches van batch_size door het model gehaald
+    (met encode_processes > 1 via de multi-process pool van SentenceTransformer) en
+    per batch aan de EmbeddingStore in output_base toegevoegd.
+    Retourneert het aantal verwerkte artikelen.
+    """
+    start_time = time.perf_counter()
+    store = EmbeddingStore(output_base)
+    manifest = None if full else load_manifest(output_base)
+    if manifest is None or manifest.get("model") != MODEL_NAME or not store.exists():
+        # Geen bruikbaar manifest: alle artikelen opnieuw verwerken met een lege store
+        store.reset()
+        manifest = {"model": MODEL_NAME, "articles": {}}
+    previous = manifest["articles"]
+    # Een artikel is alleen bijgewerkt als zijn vector ook echt in de store staat (na een
+    # reset of verlies van rijen wordt het opnieuw ge-embed)
+    stored_ids = set(store.read_index()[1]) if store.exists() else set()
+
+    # Bepaal welke artikelen nieuw of gewijzigd zijn
+    current = {}
+    todo = []
+    for file_path in iter_article_files(input_base):
+        relative_path = os.path.relpath(
+            file_path, input_base).replace(os.sep, "/")
+        entry = previous.get(relative_path)
+        digest, size, mtime_ns = file_signature(file_path, entry)
+        current[relative_path] = {"hash": digest,
+                                  "size": size, "mtime_ns": mtime_ns}
+        up_to_date = (entry is not None and entry["hash"] == digest and
+                      (not entry.get("embedded") or
+                       (os.path.exists(os.path.join(output_base, relative_path)) and
+                        article_id_from_path(relative_path) in stored_ids)))
+        if up_to_date:
+            current[relative_path]["embedded"] = entry.get("embedded", False)
+        else:
+            todo.append(file_path)
+
+    # Ruim uitvoer op van artikelen waarvan de bron verwijderd is
+    removed = [rel for rel in previous if rel not in current]
+    for relative_path in removed:
+        remove_normalized_output(output_base, relative_path)
+    # Artikelen die al een vector hadden en opnieuw verwerkt worden laten een oude rij achter
+    replaced = sum(1 for fp in todo if previous.get(
+        os.path.relpath(fp, input_base).replace(os.sep, "/"), {}).get("embedded"))
+    print(f"{len(todo)} van {len(current)} artikelen nieuw of gewijzigd, {len(removed)} verwijderd.")
+
+    prepare = partial(prepare_article, input_base=input_base,
+                      output_base=output_base)
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(
+        max_workers=workers) if workers > 1 and todo else None
+    encode_pool = None
+    processed = 0
+    # Het manifest bevat alleen artikelen waarvan de uitvoer daadwerkelijk is weggeschreven
+    articles = {rel: info for rel, info in current.items() if "embedded" in info}
+    try:
+        # Start de workers vóór het laden van het model, zodat ze het model niet erven
+        prepared_iter = executor.map(prepare, todo, chunksize=16) if executor else map(
+            prepare, todo)
+        if encode_processes > 1 and todo:
+            encode_pool = get_model().start_multi_process_pool(
+                target_devices=["cpu"] * encode_processes)
+        records, texts, pending = [], [], []
+        for file_path, prepared in zip(todo, prepared_iter):
+            relative_path = os.path.relpath(
+                file_path, input_base).replace(os.sep, "/")
+            if prepared is None:
+                # Artikel zonder (bruikbare) tekst: eventuele oude uitvoer vervalt
+                if previous.get(relative_path, {}).get("embedded"):
+                    remove_normalized_output(output_base, relative_path)
+                articles[relative_path] = dict(
+                    current[relative_path], embedded=False)
+                continue
+            record, cleaned_text = prepared
+            records.append(record)
+            texts.append(cleaned_text)
+            pending.append(relative_path)
+            if len(records) >= batch_size:
+                store.append(records, encode_batch(
+                    texts, batch_size, encode_pool))
+                processed += len(records)
+                for rel in pending:
+                    articles[rel] = dict(current[rel], embedded=True)
+                records, texts, pending = [], [], []
+        if records:
+            store.append(records, encode_batch(texts, batch_size, encode_pool))
+            processed += len(records)
+            for rel in pending:
+                articles[rel] = dict(current[rel], embedded=True)
+    finally:
+        if encode_pool is not None:
+            get_model().stop_multi_process_pool(encode_pool)
+        if executor is not None:
+            executor.shutdown()
+        manifest["articles"] = articles
+        save_manifest(output_base, manifest)
+
+    # Verwijder verouderde en verweesde rijen uit de store
+    if removed or replaced:
+        keep_ids = {article_id_from_path(rel)
+                    for rel, info in articles.items() if info.get("embedded")}
+        store.compact(keep_ids)
+    elapsed = time.perf_counter() - start_time
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"{processed} artikelen genormaliseerd in {elapsed:.1f}s ({rate:.1f} artikelen/s)")
+    return processed
+
+
+def clean_corpus_row(row):
+    """Worker-variant van prepare_article voor een rij uit de Parquet corpus."""
+    full_text = (row["title"] or "") + "\n" + row["raw_text"]
+    return clean_text(full_text)
+
+
+def process_corpus(corpus_dir, batch_size=64, workers=None, encode_processes=0, full=False,
+                   flush_every=1024):
+    """
+    Normaliseert en embed de artikelen in de Parquet corpus: alleen rijen met tekst en
+    zonder embedding (of alle rijen met tekst als full=True). De opgeschoonde tekst en
+    de embedding worden per flush_every artikelen in de corpus bijgewerkt.
+    Retourneert het aantal verwerkte artikelen.
+    """
+    from corpus_store import read_articles, upsert_articles
+    start_time = time.perf_counter()
+    df = read_articles(corpus_dir, columns=[
+                       "id", "date", "rank", "title", "raw_text", "embedding"])
+    todo = df[df["raw_text"].notna()]
+    if not full:
+        todo = todo[todo["embedding"].isna()]
+    rows = todo[["id", "date", "title", "raw_text"]].to_dict("records")
+    print(f"{len(rows)} van {len(df)} artikelen in de corpus te verwerken.")
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(
+        max_workers=workers) if workers > 1 and rows else None
+    encode_pool = None
+    processed = 0
+    try:
+        cleaned_iter = executor.map(clean_corpus_row, rows, chunksize=16) if executor else map(
+            clean_corpus_row, rows)
+        if encode_processes > 1 and rows:
+            encode_pool = get_model().start_multi_process_pool(
+                target_devices=["cpu"] * encode_processes)
+        batch_rows, texts, updates = [], [], []
+        for row, cleaned_text in zip(rows, cleaned_iter):
+            batch_rows.append(row)
+            texts.append(cleaned_text)
+            if len(batch_rows) >= batch_size:
+                vectors = encode_batch(texts, batch_size, encode_pool)
+                updates.extend({"id": r["id"], "date": r["date"], "cleaned_text": t, "embedding": v}
+                               for r, t, v in zip(batch_rows, texts, vectors))
+                batch_rows, texts = [], []
+            if len(updates) >= flush_every:
+                upsert_articles(corpus_dir, updates)
+                processed += len(updates)
+                updates = []
+        if batch_rows:
+            vectors = encode_batch(texts, batch_size, encode_pool)
+            updates.extend({"id": r["id"], "date": r["date"], "cleaned_text": t, "embedding": v}
+                           for r, t, v in zip(batch_rows, texts, vectors))
+        if updates:
+            upsert_articles(corpus_dir, updates)
+            processed += len(updates)
+    finally:
+        if encode_pool is not None:
+            get_model().stop_multi_process_pool(encode_pool)
+        if executor is not None:
+            executor.shutdown()
+    elapsed = time.perf_counter() - start_time
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"{processed} artikelen genormaliseerd in {elapsed:.1f}s ({rate:.1f} artikelen/s)")
+    return processed
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Normaliseert de artikelen en berekent de embeddings in batches.")
+    parser.add_argument("--input_base", type=str, default="data",
+                        help="Map met de ruwe artikelen (.txt).")
+    parser.add_argument("--output_base", type=str, default="./articles_normalised",
+                        help="Map voor de genormaliseerde teksten en de embedding store.")
+    parser.add_argument("--batch_size", type=int, default=64,
+                        help="Aantal artikelen per model.encode aanroep.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Aantal processen voor inlezen en opschonen (standaard: aantal CPU's).")
+    parser.add_argument("--encode_processes", type=int, default=0,
+                        help="Aantal processen voor het embedden (0 of 1: in het hoofdproces).")
+    parser.add_argument("--full", action="store_true",
+                        help="Verwerk alle artikelen opnieuw, ook als ze niet gewijzigd zijn.")
+    parser.add_argument("--corpus_dir", type=str, default=None,
+                        help="Verwerk de Parquet corpus in deze map in plaats van de tekstbestanden.")
+    add_nltk_argument(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    check_resources(["stopwords"], download=args.nltk_download)
+    if args.corpus_dir:
+        process_corpus(args.corpus_dir, batch_size=args.batch_size, workers=args.workers,
+                       encode_processes=args.encode_processes, full=args.full)
+    else:
+        process_all_articles(args.input_base, args.output_base, batch_size=args.batch_size,
+                             workers=args.workers, encode_processes=args.encode_processes, full=args.full)
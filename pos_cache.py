@@ -0,0 +1,48 @@
+import os
+import json
+
+from nltk_resources import TAGGER
+
+POS_CACHE_FILE = ".pos_cache.json"
+
+
+class PosCache:
+    """
+    Bewaarde term→POS-tag tabel, zodat filter_candidate_terms alleen termen tagt die
+    nog niet eerder gezien zijn. De tabel hoort bij één tagger; bij een andere tagger
+    wordt opnieuw begonnen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tags = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("tagger") == TAGGER:
+                    self.tags = data.get("tags", {})
+            except (OSError, ValueError) as e:
+                print(f"Kon de POS-cache {path} niet inlezen: {e}")
+
+    def tag(self, terms):
+        """[(term, tag)] voor terms; onbekende termen worden in één batch getagd."""
+        terms = list(terms)
+        unseen = sorted({t for t in terms if t not in self.tags})
+        if unseen:
+            from nltk import pos_tag
+            self.tags.update(pos_tag(unseen))
+            self._dirty = True
+        return [(t, self.tags[t]) for t in terms]
+
+    def save(self):
+        if not self._dirty or not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"tagger": TAGGER, "tags": self.tags}, f)
+        os.replace(self.path + ".tmp", self.path)
+        self._dirty = False
@@ -0,0 +1,125 @@
+from functools import lru_cache
+
+# Standaard tokenbudget voor de hele prompt (system + user) en maximum per fragment
+DEFAULT_PROMPT_BUDGET = 8000
+DEFAULT_FRAGMENT_TOKENS = 300
+# Prijzen in dollar per miljoen tokens (invoer, uitvoer), voor de kostenschatting
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+
+@lru_cache(maxsize=None)
+def _encoding(model):
+    """De tiktoken-encoding van model, of None als het optionele pakket tiktoken ontbreekt."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model="gpt-4o"):
+    """Aantal tokens van text; zonder tiktoken een schatting van ongeveer 4 tekens per token."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text, max_tokens, model="gpt-4o"):
+    """Kort text in tot hooguit max_tokens tokens."""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
+
+
+def estimate_cost(prompt_tokens, completion_tokens, model="gpt-4o"):
+    """Geschatte kosten in dollar, of None voor een model zonder bekende prijs."""
+    prices = MODEL_PRICES.get(model)
+    if prices is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1e6
+
+
+def select_fragments(docs, titles, order, budget, fragment_tokens, model="gpt-4o"):
+    """
+    Kiest fragmenten (en de bijbehorende titels) in de volgorde van order, de meest
+    representatieve documenten eerst, tot het budget aan tokens op is. Elk fragment
+    wordt ingekort tot fragment_tokens. Retourneert (fragments, titles).
+    """
+    fragments, chosen_titles = [], []
+    used = 0
+    for i in order:
+        frag = docs[i].strip().replace("\n", " ")
+        if not frag:
+            continue
+        if fragment_tokens:
+            frag = truncate_tokens(frag, fragment_tokens, model)
+        # repr zoals de lijsten in de prompt staan, plus het scheidingsteken
+        cost = count_tokens(repr(frag), model) + count_tokens(repr(titles[i]), model) + 2
+        if budget is not None and used + cost > budget:
+            if fragments:
+                break
+            continue
+        fragments.append(frag)
+        chosen_titles.append(titles[i])
+        used += cost
+    return fragments, chosen_titles
+
+
+def build_user_prompt(topic_id, top10_terms, trending_words, n_docs, article_names,
+                      terms_monthly_distribution, sample_fragments):
+    return (
+        f"# TOPIC DATA #\n"
+        f"Topic ID: {topic_id}\n"
+        f"Top 10 Terms: {top10_terms}\n"
+        f"Trending Words: {trending_words}\n"
+        f"Number of documents: {n_docs}\n"
+        f"Article Titles: {article_names}\n"
+        f"Terms Monthly Distribution: {terms_monthly_distribution}\n"
+        f"Sample Fragments: {sample_fragments}\n\n"
+        "Please provide your analysis following the guidelines above."
+    )
+
+
+def build_topic_prompt(system_prompt, topic_id, docs, titles, top10_terms, trending_words,
+                       terms_monthly_distribution, order=None, budget=DEFAULT_PROMPT_BUDGET,
+                       fragment_tokens=DEFAULT_FRAGMENT_TOKENS, model="gpt-4o"):
+    """
+    Bouwt de user prompt voor een topic binnen een budget van budget tokens (system en
+    user prompt samen). De vaste onderdelen (termen, maandelijkse verdeling) gaan altijd
+    mee; de rest van het budget wordt gevuld met fragmenten en titels van de meest
+    representatieve documenten (order, standaard de volgorde van docs). Met budget
+    None of 0 gaan alle documenten volledig mee.
+    Retourneert (user_prompt, sample_fragments, article_names, stats) met stats de
+    promptgrootte en het aantal fragmenten.
+    """
+    if order is None:
+        order = range(len(docs))
+    if budget:
+        base = count_tokens(system_prompt, model) + count_tokens(build_user_prompt(
+            topic_id, top10_terms, trending_words, len(docs), [], terms_monthly_distribution, []), model)
+        sample_fragments, article_names = select_fragments(
+            docs, titles, order, max(0, budget - base), fragment_tokens, model)
+    else:
+        sample_fragments = [frag for frag in (doc.strip().replace("\n", " ") for doc in docs) if frag]
+        article_names = list(titles)
+    user_prompt = build_user_prompt(topic_id, top10_terms, trending_words, len(docs), article_names,
+                                    terms_monthly_distribution, sample_fragments)
+    stats = {
+        "prompt_tokens": count_tokens(system_prompt, model) + count_tokens(user_prompt, model),
+        "fragments": len(sample_fragments),
+        "documents": len(docs),
+    }
+    return user_prompt, sample_fragments, article_names, stats
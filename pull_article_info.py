@@ -4,7 +4,8 @@ import argparse
 import json
 from datetime import datetime, timedelta
 from collections import defaultdict
-from google.cloud import bigquery
+
+CSV_HEADER = ['date', 'filename', 'ranking', 'score', 'num_comments']
 
 
 def parse_args():
@@ -14,6 +15,11 @@ def parse_args():
       --end           End date (YYYY-MM-DD)
       --topN          Number of top stories per day (default: 10)
       --output_folder Folder where output files will be stored (default: ./data)
+      --single_pass   Rank stories and fetch their comments in one BigQuery job
+      --page_size     Rows per result page when streaming single-pass results
+      --storage_api   Stream single-pass results through the BigQuery Storage Read API
+      --corpus_dir    Also write the stories to the partitioned Parquet corpus in this folder
+      --no_text_tree  Do not write the YYYY-MM/DATE_RANK.txt tree (only with --corpus_dir)
     """
     parser = argparse.ArgumentParser(
         description="HackerNews BigQuery scraper.")
@@ -24,6 +30,16 @@ def parse_args():
                         help="Top N stories per day")
     parser.add_argument('--output_folder', default="./data",
                         help="Output folder")
+    parser.add_argument('--single_pass', action='store_true',
+                        help="Rank the top N stories per day and join their comments in one query")
+    parser.add_argument('--page_size', type=int, default=1000,
+                        help="Rows per result page in single-pass mode (default: 1000)")
+    parser.add_argument('--storage_api', action='store_true',
+                        help="Read single-pass results via the BigQuery Storage Read API (Arrow)")
+    parser.add_argument('--corpus_dir', default=None,
+                        help="Also write the stories to a Parquet corpus (partitioned by month)")
+    parser.add_argument('--no_text_tree', action='store_true',
+                        help="Skip the text tree and CSV output (requires --corpus_dir)")
     return parser.parse_args()
 
 
@@ -59,11 +75,57 @@ def query_comments_for_stories(client, story_ids):
     return comments_by_story
 
 
-def process_story(day, rank, story, comments, output_folder, stats):
+def query_top_stories_with_comments(client, start_date, end_date, top_n, page_size=1000,
+                                    bqstorage_client=None):
+    """
+    Single-pass variant of the per-day queries: ranks the top N stories per day with a
+    window function and joins their comments in the same job. Yields one dict per
+    story (ordered by date and rank) with a 'ranking' and a 'comments' list.
+    Results are streamed per page, or as Arrow record batches when a BigQuery Storage
+    client is given. The client only needs a query() method, so a local stub works.
+    """
+    query = f"""
+    WITH ranked AS (
+      SELECT id, title, url, text, score, descendants AS num_comments,
+             DATE(TIMESTAMP_SECONDS(time)) AS post_date,
+             TIMESTAMP_SECONDS(time) AS post_time,
+             ROW_NUMBER() OVER (
+               PARTITION BY DATE(TIMESTAMP_SECONDS(time))
+               ORDER BY IFNULL(score, 0) DESC, id
+             ) AS ranking
+      FROM `bigquery-public-data.hacker_news.full`
+      WHERE type = 'story'
+        AND DATE(TIMESTAMP_SECONDS(time)) BETWEEN '{start_date.isoformat()}' AND '{end_date.isoformat()}'
+      QUALIFY ranking <= {int(top_n)}
+    )
+    SELECT r.id, r.title, r.url, r.text, r.score, r.num_comments, r.post_date, r.post_time, r.ranking,
+           ARRAY_AGG(
+             IF(c.id IS NULL, NULL,
+                STRUCT(c.id AS id, c.parent AS parent, c.text AS text,
+                       TIMESTAMP_SECONDS(c.time) AS post_time))
+             IGNORE NULLS ORDER BY c.time
+           ) AS comments
+    FROM ranked r
+    LEFT JOIN `bigquery-public-data.hacker_news.full` c
+      ON c.type = 'comment' AND c.parent = r.id
+    GROUP BY r.id, r.title, r.url, r.text, r.score, r.num_comments, r.post_date, r.post_time, r.ranking
+    ORDER BY r.post_date, r.ranking
+    """
+    query_job = client.query(query)
+    results = query_job.result(page_size=page_size)
+    if bqstorage_client is not None:
+        for batch in results.to_arrow_iterable(bqstorage_client=bqstorage_client):
+            for row in batch.to_pylist():
+                yield row
+    else:
+        for row in results:
+            yield dict(row)
+
+
+def process_story(day, rank, story, comments, output_folder, stats, write_text_tree=True):
     y = day.year
     m = day.month
     year_month_folder = os.path.join(output_folder, f"{y}-{m:02d}")
-    os.makedirs(year_month_folder, exist_ok=True)
 
     date_str = day.strftime('%Y-%m-%d')
     content_filename = f"{date_str}_{rank}.txt"
@@ -76,6 +138,29 @@ def process_story(day, rank, story, comments, output_folder, stats):
     num_comments = story.get('num_comments', 0)
     post_time = story.get('post_time', '')
 
+    record = {
+        'id': f"{y}-{m:02d}/{date_str}_{rank}",
+        'story_id': story.get('id'),
+        'date': date_str,
+        'rank': rank,
+        'score': score,
+        'num_comments': num_comments,
+        'title': title,
+        'url': url,
+        'post_time': str(post_time) if post_time else None,
+        'raw_text': text_content or None,
+    }
+    result = {
+        'filename': content_filename,
+        'score': score,
+        'num_comments': num_comments,
+        'record': record
+    }
+    stats['success'] += 1
+    if not write_text_tree:
+        return result
+
+    os.makedirs(year_month_folder, exist_ok=True)
     content = f"Title: {title}\nURL: {url}\nScore: {score}\nNumber of Comments: {num_comments}\nPost Time: {post_time}\n\n"
     if text_content:
         content += text_content
@@ -84,7 +169,6 @@ def process_story(day, rank, story, comments, output_folder, stats):
 
     with open(content_filepath, "w", encoding="utf-8") as f:
         f.write(content)
-    stats['success'] += 1
 
     story_comments = comments.get(story['id'], [])
     comments_filename = f"comments_{date_str}_{rank}.json"
@@ -99,22 +183,33 @@ def process_story(day, rank, story, comments, output_folder, stats):
                 default=lambda o: o.isoformat() if isinstance(o, datetime) else None
             )
 
+    return result
+
+
+def csv_row(day, rank, result):
     return {
-        'filename': content_filename,
-        'score': score,
-        'num_comments': num_comments
+        'date': day.isoformat(),
+        'filename': result['filename'],
+        'ranking': rank,
+        'score': result['score'],
+        'num_comments': result['num_comments']
     }
 
 
-def main():
-    args = parse_args()
-    start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
-    end_date = datetime.strptime(args.end, "%Y-%m-%d").date()
-    topN = args.topN
-    output_folder = args.output_folder
+def write_csv(output_folder, start_date, end_date, csv_rows):
+    os.makedirs(output_folder, exist_ok=True)
+    csv_filename = os.path.join(
+        output_folder, f"scraped_data_{start_date}_{end_date}.csv")
+    with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_HEADER)
+        writer.writeheader()
+        writer.writerows(csv_rows)
+    return csv_filename
 
-    client = bigquery.Client(project="ferrous-gate-137723")
 
+def run_per_day(client, start_date, end_date, topN, output_folder, stats, write_text_tree=True,
+                corpus_records=None):
+    """One stories query for the whole range, then one comments query per day."""
     print(
         f"\n[Query] Retrieving all stories between {start_date} and {end_date}")
     all_stories = query_stories_for_date_range(client, start_date, end_date)
@@ -125,9 +220,6 @@ def main():
         grouped_stories[post_date].append(story)
 
     csv_rows = []
-    csv_header = ['date', 'filename', 'ranking', 'score', 'num_comments']
-    stats = {'success': 0}
-
     for single_day in (start_date + timedelta(n) for n in range((end_date - start_date).days + 1)):
         stories = grouped_stories.get(single_day, [])
         if not stories:
@@ -145,22 +237,79 @@ def main():
 
         for i, story in enumerate(top_stories):
             result = process_story(
-                single_day, i + 1, story, comments_by_story, output_folder, stats)
-            row = {
-                'date': single_day.isoformat(),
-                'filename': result['filename'],
-                'ranking': i + 1,
-                'score': result['score'],
-                'num_comments': result['num_comments']
-            }
-            csv_rows.append(row)
+                single_day, i + 1, story, comments_by_story, output_folder, stats, write_text_tree)
+            csv_rows.append(csv_row(single_day, i + 1, result))
+            if corpus_records is not None:
+                corpus_records.append(result['record'])
+    return csv_rows
 
-    csv_filename = os.path.join(
-        output_folder, f"scraped_data_{start_date}_{end_date}.csv")
-    with open(csv_filename, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=csv_header)
-        writer.writeheader()
-        writer.writerows(csv_rows)
+
+def run_single_pass(client, start_date, end_date, topN, output_folder, stats, page_size=1000,
+                    bqstorage_client=None, write_text_tree=True, corpus_records=None):
+    """Stories and comments in a single job; rows are written as they stream in."""
+    print(
+        f"\n[Query] Retrieving top {topN} stories per day with comments between {start_date} and {end_date}")
+    csv_rows = []
+    days_seen = set()
+    for row in query_top_stories_with_comments(client, start_date, end_date, topN,
+                                               page_size=page_size, bqstorage_client=bqstorage_client):
+        day = row['post_date']
+        if day not in days_seen:
+            days_seen.add(day)
+            print(f"\n[Process] {day}")
+        rank = row['ranking']
+        comments = {row['id']: row.get('comments') or []}
+        result = process_story(day, rank, row, comments,
+                               output_folder, stats, write_text_tree)
+        csv_rows.append(csv_row(day, rank, result))
+        if corpus_records is not None:
+            corpus_records.append(result['record'])
+    for single_day in (start_date + timedelta(n) for n in range((end_date - start_date).days + 1)):
+        if single_day not in days_seen:
+            print(f"\n[Info] No stories found for {single_day}")
+    return csv_rows
+
+
+def main():
+    args = parse_args()
+    start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end_date = datetime.strptime(args.end, "%Y-%m-%d").date()
+    topN = args.topN
+    output_folder = args.output_folder
+    if args.no_text_tree and not args.corpus_dir:
+        raise SystemExit("--no_text_tree requires --corpus_dir")
+    write_text_tree = not args.no_text_tree
+    corpus_records = [] if args.corpus_dir else None
+
+    from google.cloud import bigquery
+    client = bigquery.Client(project="ferrous-gate-137723")
+
+    stats = {'success': 0}
+
+    if args.single_pass:
+        bqstorage_client = None
+        if args.storage_api:
+            try:
+                from google.cloud import bigquery_storage
+            except ImportError:
+                raise ImportError(
+                    "--storage_api requires the google-cloud-bigquery-storage package "
+                    "(pip install google-cloud-bigquery-storage).")
+            bqstorage_client = bigquery_storage.BigQueryReadClient()
+        csv_rows = run_single_pass(client, start_date, end_date, topN, output_folder, stats,
+                                   page_size=args.page_size, bqstorage_client=bqstorage_client,
+                                   write_text_tree=write_text_tree, corpus_records=corpus_records)
+    else:
+        csv_rows = run_per_day(client, start_date, end_date, topN, output_folder, stats,
+                               write_text_tree=write_text_tree, corpus_records=corpus_records)
+
+    if corpus_records is not None:
+        from corpus_store import upsert_articles
+        upsert_articles(args.corpus_dir, corpus_records)
+        print(f"\n[Corpus] Wrote {len(corpus_records)} stories to {args.corpus_dir}")
+
+    if write_text_tree:
+        write_csv(output_folder, start_date, end_date, csv_rows)
 
     total_articles = stats['success']
     print(f"\nQuery complete. Total articles processed: {total_articles}")
@@ -2,26 +2,117 @@
 import os
 import re
 import time
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
-from readability import Document
-from spellchecker import SpellChecker
+import hashlib
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from line_filter import get_line_filter
+from http_cache import HttpCache, PERMANENT_FAILURE_STATUSES, SHORT_FAILURE_TTLS
 
-# Initialize spellchecker for cleanup_text.
-spell = SpellChecker(language='en')
+# Sites commonly answer the default python-requests User-Agent with a 403 bot block
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/124.0 Safari/537.36")
 
 
-def get_with_retry(url, params=None, max_retries=5, base_delay=1.0, timeout=10):
-    """Simple exponential backoff for HTTP GET."""
+class HostLimiter:
+    """
+    Politeness limits per host: at most per_host concurrent requests and at least
+    delay seconds between the start of two requests to the same host.
+    """
+
+    def __init__(self, per_host=2, delay=1.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = defaultdict(float)
+
+    @contextmanager
+    def slot(self, url):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            semaphore = self._semaphores.setdefault(
+                host, threading.Semaphore(self.per_host))
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start[host])
+                self._next_start[host] = start + self.delay
+            if start > now:
+                time.sleep(start - now)
+            yield
+
+
+def make_session(pool_size=10):
+    """Shared session so connections are pooled across worker threads."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+@contextmanager
+def _host_slot(limiter, url):
+    if limiter is None:
+        yield
+    else:
+        with limiter.slot(url):
+            yield
+
+
+def get_with_retry(url, params=None, max_retries=5, base_delay=1.0, timeout=10, session=None, limiter=None,
+                   cache=None):
+    """
+    Simple exponential backoff for HTTP GET.
+    With an HttpCache, fresh cached pages are returned without a request, stale ones
+    are revalidated with a conditional request, and URLs with a recorded permanent
+    failure are skipped without spending the retry budget.
+    """
+    headers = {}
+    if session is None:
+        import requests
+        session = requests
+        headers["User-Agent"] = USER_AGENT
+    http = session
+    cached = None
+    if cache is not None:
+        reason = cache.failure(url, params)
+        if reason:
+            print(f"Skipping {url}: cached failure ({reason})")
+            return None
+        cached = cache.lookup(url, params)
+        if cached and cached["status"] == 200:
+            if cache.is_fresh(cached):
+                return cache.to_response(cached)
+            headers.update(cache.conditional_headers(cached))
     attempt = 0
     while attempt < max_retries:
         try:
-            response = requests.get(url, params=params, timeout=timeout)
+            with _host_slot(limiter, url):
+                response = http.get(url, params=params,
+                                    timeout=timeout, headers=headers)
             if response.status_code == 200:
+                if cache is not None:
+                    cache.store(url, response, params)
                 return response
+            elif response.status_code == 304 and cached:
+                return cache.to_response(cache.refresh(cached))
             else:
                 print(f"Status code {response.status_code} at {url}")
+                if response.status_code in PERMANENT_FAILURE_STATUSES:
+                    # Retrying will not help; remember it so reruns skip this URL
+                    if cache is not None:
+                        cache.mark_failed(
+                            url, f"status {response.status_code}", params,
+                            ttl=SHORT_FAILURE_TTLS.get(response.status_code))
+                    return None
         except Exception as e:
             print(f"Error fetching {url}: {e}")
         time.sleep(base_delay * (2 ** attempt))
@@ -32,57 +123,96 @@ def get_with_retry(url, params=None, max_retries=5, base_delay=1.0, timeout=10):
 def cleanup_text(raw_text, min_letters=3, min_spell_ratio=0.5):
     """
     - Verwijdert lijnen die minder dan min_letters letters hebben.
-    - Checkt via spell.unknown(...) welke woorden niet in de dictionary staan.
+    - Checkt welke woorden niet in de dictionary van de spellchecker staan.
     - Als er te veel 'onbekende' woorden zijn, skip de regel.
+    Uses the shared LineFilter, which gives the same results as spell.unknown() per line.
     """
-    lines = raw_text.splitlines()
-    cleaned_lines = []
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-        if sum(c.isalpha() for c in line) < min_letters:
-            continue
-        words = line.split()
-        if not words:
-            continue
-        lower_words = [w.lower() for w in words]
-        unknown = spell.unknown(lower_words)
-        recognized_count = len(words) - len(unknown)
-        ratio = recognized_count / len(words)
-        if ratio < min_spell_ratio:
-            continue
-        cleaned_lines.append(line)
-    return "\n".join(cleaned_lines)
-
-
-def extract_main_content_with_fallback(url):
+    return get_line_filter().filter_text(raw_text, min_letters, min_spell_ratio)
+
+
+def raw_html_path(raw_html_dir, url):
+    """Location of the saved raw HTML for a URL (keyed by a hash of the URL)."""
+    digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(raw_html_dir, digest[:2], f"{digest}.html")
+
+
+def fetch_html(url, session=None, limiter=None, raw_html_dir=None, offline=False, cache=None):
     """
-    Probeert newspaper3k, anders readability-lxml.
+    Fetches the HTML of a URL once. With raw_html_dir the response body is saved so
+    extraction can be re-run later with offline=True without refetching.
     """
+    if raw_html_dir and offline:
+        path = raw_html_path(raw_html_dir, url)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    resp = get_with_retry(url, max_retries=2, session=session,
+                          limiter=limiter, cache=cache)
+    if not resp or resp.status_code != 200:
+        return None
+    html = resp.text
+    if raw_html_dir:
+        path = raw_html_path(raw_html_dir, url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+    return html
+
+
+def extract_main_content(html, url):
+    """
+    Extracts the article text from already fetched HTML: newspaper3k's parser first,
+    readability-lxml as fallback when that text is too short.
+    """
+    # The extraction libraries are only imported here, so cleanup_text and the
+    # offline helpers work without them
+    from bs4 import BeautifulSoup
+    from newspaper import Article
+    from readability import Document
     text_newspaper = ""
     try:
         article = Article(url)
-        article.download()
+        article.download(input_html=html)
         article.parse()
         text_newspaper = article.text.strip()
     except Exception:
         text_newspaper = ""
     if text_newspaper and len(text_newspaper) > 80:
         return cleanup_text(text_newspaper)
-    else:
-        resp = get_with_retry(url, max_retries=1)
-        if resp and resp.status_code == 200:
-            doc = Document(resp.text)
-            soup = BeautifulSoup(doc.summary(), "html.parser")
-            text_readability = soup.get_text(separator="\n").strip()
-            return cleanup_text(text_readability)
-        else:
-            return ""
-
-
-def update_file(file_path, failures):
-    """Reads a file, extracts the URL, gets article content, and updates the file."""
+    try:
+        doc = Document(html)
+        soup = BeautifulSoup(doc.summary(), "html.parser")
+        text_readability = soup.get_text(separator="\n").strip()
+    except Exception:
+        return ""
+    return cleanup_text(text_readability)
+
+
+def extract_main_content_with_fallback(url, session=None, limiter=None, raw_html_dir=None, offline=False,
+                                       cache=None):
+    """
+    Probeert newspaper3k, anders readability-lxml.
+    The page is downloaded only once; both extractors work on the same HTML.
+    """
+    html = fetch_html(url, session=session, limiter=limiter,
+                      raw_html_dir=raw_html_dir, offline=offline, cache=cache)
+    if not html:
+        return ""
+    return extract_main_content(html, url)
+
+
+def is_video_url(url):
+    video_extensions = (".mp4", ".avi", ".mov", ".wmv", ".flv", ".mkv")
+    return url.lower().endswith(video_extensions)
+
+
+def update_file(file_path, failures, session=None, limiter=None, raw_html_dir=None, offline=False,
+                cache=None):
+    """
+    Reads a file, extracts the URL, gets article content, and updates the file.
+    Returns the URL that was fetched, or None if no fetch was attempted.
+    """
     with open(file_path, "r", encoding="utf-8") as f:
         content = f.read()
     # Look for a line starting with "URL:" followed by the URL.
@@ -90,16 +220,18 @@ def update_file(file_path, failures):
     if not match:
         print(f"No URL found in {file_path}")
         failures.append(f"{file_path} - no URL found")
-        return
+        return None
     url = match.group(1)
     # Skip URLs that end with common video file extensions.
-    video_extensions = (".mp4", ".avi", ".mov", ".wmv", ".flv", ".mkv")
-    if url.lower().endswith(video_extensions):
+    if is_video_url(url):
         print(f"Skipping video URL in {file_path}: {url}")
         failures.append(f"{file_path} - video URL: {url}")
-        return
+        if cache is not None:
+            cache.mark_failed(url, "video URL")
+        return None
     print(f"Updating {file_path} from URL: {url}")
-    article_text = extract_main_content_with_fallback(url)
+    article_text = extract_main_content_with_fallback(
+        url, session=session, limiter=limiter, raw_html_dir=raw_html_dir, offline=offline, cache=cache)
     if article_text:
         new_content = content.replace(
             "No article text available.", article_text)
@@ -108,24 +240,117 @@ def update_file(file_path, failures):
     else:
         print(f"Failed to retrieve article text from {url} for {file_path}")
         failures.append(f"{file_path} - failed to retrieve text from {url}")
+    return url
+
+
+def update_corpus_row(row, failures, updates, session=None, limiter=None, raw_html_dir=None, offline=False,
+                      cache=None):
+    """
+    Corpus variant of update_file: fetches the article text for one row of the Parquet
+    corpus and collects the new raw_text in updates. Returns the URL that was fetched,
+    or None if no fetch was attempted.
+    """
+    article_id, url = row["id"], row["url"]
+    if is_video_url(url):
+        print(f"Skipping video URL for {article_id}: {url}")
+        failures.append(f"{article_id} - video URL: {url}")
+        if cache is not None:
+            cache.mark_failed(url, "video URL")
+        return None
+    print(f"Updating {article_id} from URL: {url}")
+    article_text = extract_main_content_with_fallback(
+        url, session=session, limiter=limiter, raw_html_dir=raw_html_dir, offline=offline, cache=cache)
+    if article_text:
+        updates.append(
+            {"id": article_id, "date": row["date"], "raw_text": article_text})
+    else:
+        print(f"Failed to retrieve article text from {url} for {article_id}")
+        failures.append(f"{article_id} - failed to retrieve text from {url}")
+    return url
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fetch article text for all files in the data folder.")
+    parser.add_argument("--data_dir", default="./data",
+                        help="Folder with the article files (default: ./data)")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Maximum number of concurrent fetches (default: 8)")
+    parser.add_argument("--per_host", type=int, default=2,
+                        help="Maximum number of concurrent fetches per host (default: 2)")
+    parser.add_argument("--host_delay", type=float, default=1.0,
+                        help="Minimum seconds between requests to the same host (default: 1.0)")
+    parser.add_argument("--raw_html_dir", default=None,
+                        help="Save the raw HTML of every fetched page in this folder")
+    parser.add_argument("--offline", action="store_true",
+                        help="Re-run extraction on the HTML saved in --raw_html_dir without fetching")
+    parser.add_argument("--cache_dir", default="./.http_cache",
+                        help="Folder for the HTTP response cache (default: ./.http_cache)")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Disable the HTTP response cache")
+    parser.add_argument("--cache_ttl_hours", type=float, default=7 * 24,
+                        help="Hours a cached page is used without revalidation (default: 168)")
+    parser.add_argument("--cache_max_mb", type=float, default=500,
+                        help="Maximum size of the HTTP cache in MB (default: 500)")
+    parser.add_argument("--corpus_dir", default=None,
+                        help="Fill raw_text in this Parquet corpus instead of the text files in --data_dir")
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
+    if args.offline and not args.raw_html_dir:
+        raise SystemExit("--offline requires --raw_html_dir")
     # Gebruik de data-map als basis; maak deze aan als die niet bestaat.
-    data_dir = "./data"
+    data_dir = args.data_dir
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
     failures = []
-    # Process all .txt files recursively from the data directory.
-    for root, dirs, files in os.walk(data_dir):
-        for file in files:
-            if file.endswith(".txt"):
-                file_path = os.path.join(root, file)
-                update_file(file_path, failures)
+    session = make_session(pool_size=args.workers)
+    limiter = HostLimiter(per_host=args.per_host, delay=args.host_delay)
+    cache = None
+    if not args.no_cache:
+        cache = HttpCache(args.cache_dir, ttl=args.cache_ttl_hours * 3600,
+                          max_bytes=int(args.cache_max_mb * 1024 * 1024))
+    fetch_options = dict(session=session, limiter=limiter, raw_html_dir=args.raw_html_dir,
+                         offline=args.offline, cache=cache)
+    start_time = time.perf_counter()
+    if args.corpus_dir:
+        from corpus_store import read_articles, upsert_articles
+        # Only rows that still lack article text need a fetch
+        df = read_articles(args.corpus_dir, columns=[
+                           "id", "date", "rank", "url", "raw_text"])
+        todo = df[df["raw_text"].isna() & df["url"].notna() & (df["url"] != "")]
+        updates = []
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            fetched = list(executor.map(
+                lambda row: update_corpus_row(
+                    row, failures, updates, **fetch_options),
+                todo.to_dict("records")))
+        upsert_articles(args.corpus_dir, updates)
+    else:
+        # Collect all .txt files recursively from the data directory.
+        file_paths = []
+        for root, dirs, files in os.walk(data_dir):
+            for file in files:
+                if file.endswith(".txt"):
+                    file_paths.append(os.path.join(root, file))
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            fetched = list(executor.map(
+                lambda fp: update_file(fp, failures, **fetch_options), file_paths))
+    if cache is not None:
+        evicted = cache.evict()
+        if evicted:
+            print(f"Evicted {evicted} entries from the HTTP cache")
+    elapsed = time.perf_counter() - start_time
+    url_count = sum(1 for url in fetched if url)
+    rate = url_count / (elapsed / 60) if elapsed > 0 else 0.0
+    print(f"\nFetched {url_count} URLs in {elapsed:.1f}s ({rate:.1f} URLs/minute)")
     # Write failures to failed.txt in de data-map.
     if failures:
         with open(os.path.join(data_dir, "failed.txt"), "w", encoding="utf-8") as f:
-            f.write("\n".join(failures))
+            # Worker threads finish in arbitrary order; keep the report stable.
+            f.write("\n".join(sorted(failures)))
         print(
             f"\nFinished with {len(failures)} failures. See {os.path.join(data_dir, 'failed.txt')} for details.")
     else:
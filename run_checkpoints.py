@@ -0,0 +1,107 @@
+import os
+import json
+import pickle
+import hashlib
+import numpy as np
+
+TOPICS_DIR = "topics"
+
+
+def fingerprint(*parts):
+    """
+    Vingerafdruk van de invoer van een stap. numpy arrays worden op hun inhoud gehasht,
+    de overige delen via hun JSON-weergave (met str voor onbekende typen).
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            part = np.ascontiguousarray(part)
+            digest.update(f"{part.dtype}{part.shape}".encode("utf-8"))
+            digest.update(memoryview(part).cast("B"))
+        else:
+            digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def tree_signature(root):
+    """
+    Vingerafdruk van een map op basis van naam, grootte en mtime van de bestanden (zonder
+    ze te lezen). Verborgen bestanden en mappen, zoals de indexen, tellen niet mee.
+    """
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if name.startswith("."):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((os.path.relpath(path, root), stat.st_size, stat.st_mtime_ns))
+    entries.sort()
+    return fingerprint(entries)
+
+
+class RunDirectory:
+    """
+    Map met de tussenresultaten van een run van main.py: per stap een pickle met de
+    vingerafdruk van de invoer, en per topic de LLM-output als JSON. Met resume worden
+    bewaarde resultaten hergebruikt zolang de vingerafdruk overeenkomt; een verouderd
+    resultaat wordt gemeld en opnieuw berekend. Zonder resume wordt alles opnieuw
+    berekend en bewaard.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.resume = resume
+        os.makedirs(os.path.join(path, TOPICS_DIR), exist_ok=True)
+
+    def load(self, stage, stage_fingerprint):
+        """Het bewaarde resultaat van stage, of None als het ontbreekt, verouderd is of resume uit staat."""
+        if not self.resume:
+            return None
+        path = os.path.join(self.path, f"{stage}.pkl")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                checkpoint = pickle.load(f)
+        except Exception as e:
+            print(f"Kon het checkpoint {path} niet inlezen: {e}")
+            return None
+        if checkpoint.get("fingerprint") != stage_fingerprint:
+            print(f"Checkpoint '{stage}' is verouderd (invoer gewijzigd) en wordt opnieuw berekend.")
+            return None
+        print(f"Checkpoint '{stage}' hergebruikt.")
+        return checkpoint["data"]
+
+    def save(self, stage, stage_fingerprint, data):
+        path = os.path.join(self.path, f"{stage}.pkl")
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump({"fingerprint": stage_fingerprint, "data": data}, f)
+        os.replace(path + ".tmp", path)
+
+    def _topic_path(self, topic_id):
+        return os.path.join(self.path, TOPICS_DIR, f"{topic_id}.json")
+
+    def load_topic(self, topic_id, topic_fingerprint):
+        """Het bewaarde LLM-resultaat (JSON) van een topic, of None."""
+        if not self.resume:
+            return None
+        try:
+            with open(self._topic_path(topic_id), "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("fingerprint") != topic_fingerprint:
+            return None
+        return checkpoint["output"]
+
+    def save_topic(self, topic_id, topic_fingerprint, output_json):
+        path = self._topic_path(topic_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": topic_fingerprint, "output": output_json}, f)
+        os.replace(path + ".tmp", path)
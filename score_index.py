@@ -0,0 +1,120 @@
+import os
+import re
+import glob
+
+import pandas as pd
+
+INDEX_FILE = ".score_index.pkl"
+CSV_PATTERN = re.compile(
+    r"scraped_data_(\d{4}-\d{2}-\d{2})_(\d{4}-\d{2}-\d{2})\.csv")
+
+# Binnen één proces wordt de index per scraper_dir maar één keer opgebouwd of ingelezen
+_indexes = {}
+
+
+def _csv_files(scraper_dir):
+    """Alle scraped_data CSV's, gesorteerd van oudste naar nieuwste periode."""
+    csv_files = []
+    for cf in glob.glob(os.path.join(scraper_dir, "scraped_data_*.csv")):
+        match = CSV_PATTERN.match(os.path.basename(cf))
+        if match:
+            csv_files.append((match.group(2), match.group(1), cf))
+    return [cf for _, _, cf in sorted(csv_files)]
+
+
+def _fingerprint(csv_files):
+    fingerprint = []
+    for cf in csv_files:
+        stat = os.stat(cf)
+        fingerprint.append(
+            (os.path.basename(cf), stat.st_size, stat.st_mtime_ns))
+    return fingerprint
+
+
+class ScoreIndex:
+    """
+    Score- en datumopzoektabel voor alle artikelen, gesleuteld op artikel-id
+    ('YYYY-MM/DATE_RANK', zoals in de EmbeddingStore). Als dezelfde DATE_RANK.txt in
+    meerdere overlappende CSV's voorkomt, wint de CSV met de meest recente periode;
+    die hoort bij de laatst opgehaalde versie van het artikelbestand.
+    """
+
+    def __init__(self, df, fingerprint=None):
+        self.df = df
+        self.fingerprint = fingerprint or []
+
+    @classmethod
+    def build(cls, scraper_dir):
+        csv_files = _csv_files(scraper_dir)
+        frames = []
+        for cf in csv_files:
+            try:
+                frames.append(pd.read_csv(cf, usecols=lambda c: c in (
+                    "date", "filename", "ranking", "score", "num_comments")))
+            except Exception as e:
+                print(f"Fout bij inlezen {cf}: {e}")
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=["date", "filename", "score"])
+        df["date_dt"] = pd.to_datetime(
+            df["date"], format="%Y-%m-%d", errors="coerce")
+        df = df.dropna(subset=["date_dt", "filename"])
+        df["score"] = pd.to_numeric(df["score"], errors="coerce").fillna(0)
+        stems = df["filename"].astype(str).str.replace(r"\.txt$", "", regex=True)
+        df["article_id"] = df["date_dt"].dt.strftime("%Y-%m") + "/" + stems
+        # De CSV's zijn van oud naar nieuw ingelezen; de laatste rij per artikel wint
+        df = df.drop_duplicates(subset="article_id", keep="last")
+        df = df.set_index("article_id").sort_values("date_dt", kind="stable")
+        return cls(df[["filename", "date_dt", "score"]], _fingerprint(csv_files))
+
+    def save(self, path):
+        pd.to_pickle({"fingerprint": self.fingerprint, "df": self.df}, path)
+
+    @classmethod
+    def load(cls, path):
+        data = pd.read_pickle(path)
+        return cls(data["df"], data["fingerprint"])
+
+    def in_range(self, start_dt, end_dt):
+        """Het deel van de index binnen de (inclusieve) datumrange."""
+        dates = self.df["date_dt"]
+        return self.df[(dates >= start_dt) & (dates <= end_dt)]
+
+    def score_map(self, start_dt, end_dt):
+        """{article_id: {"score": ..., "date_dt": ..., "filename": ...}} voor de datumrange."""
+        df = self.in_range(start_dt, end_dt)
+        return {article_id: {"score": score, "date_dt": date_dt, "filename": filename}
+                for article_id, score, date_dt, filename in zip(
+                    df.index, df["score"].tolist(), df["date_dt"], df["filename"].astype(str))}
+
+
+def get_score_index(scraper_dir, rebuild=False):
+    """
+    Retourneert de ScoreIndex voor scraper_dir. De index wordt naast de CSV's bewaard
+    (.score_index.pkl) en alleen opnieuw opgebouwd als de CSV's veranderd zijn; binnen
+    een proces wordt dezelfde index gedeeld.
+    """
+    key = os.path.abspath(scraper_dir)
+    fingerprint = _fingerprint(_csv_files(scraper_dir))
+    index = _indexes.get(key)
+    if index is not None and index.fingerprint == fingerprint and not rebuild:
+        return index
+    path = os.path.join(scraper_dir, INDEX_FILE)
+    index = None
+    if os.path.exists(path) and not rebuild:
+        try:
+            index = ScoreIndex.load(path)
+        except Exception:
+            index = None
+        if index is not None and index.fingerprint != fingerprint:
+            index = None
+    if index is None:
+        index = ScoreIndex.build(scraper_dir)
+        if os.path.isdir(scraper_dir):
+            try:
+                index.save(path)
+            except OSError as e:
+                print(f"Kon de score-index niet opslaan in {path}: {e}")
+    _indexes[key] = index
+    return index
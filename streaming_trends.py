@@ -0,0 +1,254 @@
+import os
+import json
+import pickle
+import argparse
+from datetime import datetime, timedelta
+from collections import Counter
+
+from nltk_resources import check_resources, add_nltk_argument
+
+STATE_FILE = "stream_state.pkl"
+DEFAULT_WINDOWS = (7, 30, 90)
+# Kleinere sommen (afrondingsresten na aftrekken) worden uit de vensters verwijderd
+EPSILON = 1e-9
+
+
+def _add(target, contributions, factor=1.0):
+    """Telt contributions (term -> waarde) met factor op bij target en ruimt nullen op."""
+    for term, value in contributions.items():
+        total = target.get(term, 0.0) + factor * value
+        if abs(total) < EPSILON:
+            target.pop(term, None)
+        else:
+            target[term] = total
+
+
+class StreamingTrends:
+    """
+    Trending termen over glijdende vensters (standaard 7, 30 en 90 dagen).
+
+    Per dag worden de scores per term bijgehouden (score van het artikel maal het aantal
+    keer dat de term voorkomt, zoals in de batch-trendanalyse). Per venster van w dagen
+    lopen twee sommen mee: het huidige venster (de laatste w dagen t/m as_of) en het
+    vorige venster (de w dagen daarvoor). Een nieuw artikel of een nieuwe dag past
+    alleen die sommen aan, dus een update kost O(termen van de betrokken dagen) en de
+    groei per venster is (huidig - vorig) / vorig zonder de corpus opnieuw te lezen.
+    Dagen en artikelen ouder dan twee keer het grootste venster worden vergeten.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.as_of = None
+        self.daily = {}
+        self.articles = {}
+        self.sums = {w: {"current": {}, "previous": {}} for w in self.windows}
+
+    @property
+    def horizon(self):
+        return 2 * self.windows[-1]
+
+    def _window_of(self, day, w):
+        """'current', 'previous' of None: in welk deel van venster w valt day (t.o.v. as_of)."""
+        age = (self.as_of - day).days
+        if 0 <= age < w:
+            return "current"
+        if w <= age < 2 * w:
+            return "previous"
+        return None
+
+    def advance_to(self, day):
+        """Schuift de vensters dag voor dag op tot en met day."""
+        if self.as_of is None:
+            self.as_of = day
+            return
+        while self.as_of < day:
+            self.as_of += timedelta(days=1)
+            for w in self.windows:
+                sums = self.sums[w]
+                # De dag die uit het huidige venster valt schuift door naar het vorige venster
+                leaving = self.daily.get(self.as_of - timedelta(days=w))
+                if leaving:
+                    _add(sums["current"], leaving, -1.0)
+                    _add(sums["previous"], leaving)
+                dropped = self.daily.get(self.as_of - timedelta(days=2 * w))
+                if dropped:
+                    _add(sums["previous"], dropped, -1.0)
+            expired = self.as_of - timedelta(days=self.horizon)
+            self.daily.pop(expired, None)
+        cutoff = self.as_of - timedelta(days=self.horizon)
+        for article_id in [a for a, info in self.articles.items() if info["day"] <= cutoff]:
+            del self.articles[article_id]
+
+    def _apply(self, day, contributions, factor):
+        _add(self.daily.setdefault(day, {}), contributions, factor)
+        if not self.daily[day]:
+            del self.daily[day]
+        for w in self.windows:
+            part = self._window_of(day, w)
+            if part is not None:
+                _add(self.sums[w][part], contributions, factor)
+
+    def ingest(self, article_id, day, score, signature, load_tokens):
+        """
+        Verwerkt één artikel. Een artikel dat al met dezelfde score en signatuur is
+        verwerkt wordt overgeslagen; bij een gewijzigde score of tekst wordt de oude
+        bijdrage eerst afgetrokken. load_tokens() wordt alleen aangeroepen als de tekst
+        nieuw of gewijzigd is. Retourneert True als de vensters zijn bijgewerkt.
+        """
+        if self.as_of is not None and (self.as_of - day).days >= self.horizon:
+            return False
+        previous = self.articles.get(article_id)
+        if previous is not None and previous["score"] == score and previous["signature"] == signature:
+            return False
+        if self.as_of is None or day > self.as_of:
+            self.advance_to(day)
+        if previous is not None:
+            old = {term: previous["score"] * count for term, count in previous["counts"].items()}
+            self._apply(previous["day"], old, -1.0)
+            counts = previous["counts"] if previous["signature"] == signature else None
+        else:
+            counts = None
+        if counts is None:
+            counts = dict(Counter(load_tokens()))
+        self.articles[article_id] = {"day": day, "score": score, "signature": signature, "counts": counts}
+        self._apply(day, {term: score * count for term, count in counts.items()}, 1.0)
+        return True
+
+    def growth(self, w):
+        """{term: (growth, current, previous)} voor venster w, in O(termen)."""
+        current, previous = self.sums[w]["current"], self.sums[w]["previous"]
+        result = {}
+        for term in current.keys() | previous.keys():
+            cur, prev = current.get(term, 0.0), previous.get(term, 0.0)
+            result[term] = ((cur - prev) / prev if prev > 0 else cur, cur, prev)
+        return result
+
+    def top_terms(self, w, n=25, terms=None):
+        """De n sterkst groeiende termen in venster w, optioneel beperkt tot terms."""
+        growth = self.growth(w)
+        if terms is not None:
+            growth = {t: g for t, g in growth.items() if t in terms}
+        ranked = sorted(growth.items(), key=lambda item: (-item[1][0], item[0]))[:n]
+        return [{"term": term, "growth": g, "current": cur, "previous": prev}
+                for term, (g, cur, prev) in ranked]
+
+    def snapshot(self, n=25, terms=None):
+        return {"as_of": self.as_of.isoformat() if self.as_of else None,
+                "windows": {str(w): self.top_terms(w, n, terms) for w in self.windows}}
+
+    def save(self, state_dir):
+        os.makedirs(state_dir, exist_ok=True)
+        path = os.path.join(state_dir, STATE_FILE)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(self, f)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, state_dir, windows=DEFAULT_WINDOWS):
+        """Laadt de bewaarde toestand; met andere vensters wordt opnieuw begonnen."""
+        path = os.path.join(state_dir, STATE_FILE)
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    state = pickle.load(f)
+                if state.windows == tuple(sorted(windows)):
+                    return state
+                print("De vensters zijn gewijzigd; de streaming-toestand wordt opnieuw opgebouwd.")
+            except Exception as e:
+                print(f"Kon de streaming-toestand in {state_dir} niet inlezen: {e}")
+        return cls(windows)
+
+
+def iter_scraper_articles(scraper_dir, start_dt=None):
+    """
+    Geeft (article_id, day, score, signature, load_tokens) voor alle artikelen uit de
+    scraped_data CSV's van pull_article_info.py waarvan het tekstbestand bestaat, vanaf
+    start_dt. De score-index is op datum gesorteerd, dus oudere artikelen worden niet
+    eens bekeken.
+    """
+    from score_index import get_score_index
+    from term_index import file_signature
+    from trend_analysis import clean_and_tokenize, read_text
+    df = get_score_index(scraper_dir).df
+    if start_dt is not None:
+        df = df.iloc[df["date_dt"].searchsorted(start_dt):]
+    for article_id, score, date_dt in zip(df.index, df["score"].tolist(), df["date_dt"]):
+        path = os.path.join(scraper_dir, article_id + ".txt")
+        if not os.path.exists(path):
+            continue
+        yield (article_id, date_dt.date(), score, file_signature(path),
+               lambda path=path: clean_and_tokenize(read_text(path)))
+
+
+def iter_corpus_articles(corpus_dir, start_dt=None):
+    """Corpus-variant van iter_scraper_articles."""
+    from corpus_store import read_records, format_article
+    from term_index import text_signature
+    from trend_analysis import clean_and_tokenize
+    columns = ["id", "date", "rank", "score", "num_comments",
+               "title", "url", "post_time", "raw_text"]
+    for row in read_records(corpus_dir, start_dt=start_dt, columns=columns):
+        content = format_article(row).strip()
+        yield (row["id"], row["date"], row["score"] or 0, text_signature(content),
+               lambda content=content: clean_and_tokenize(content))
+
+
+def update_stream(state_dir, scraper_dir=None, corpus_dir=None, windows=DEFAULT_WINDOWS):
+    """
+    Verwerkt alle nieuwe of gewijzigde artikelen en bewaart de toestand. Artikelen worden
+    op datum verwerkt, zodat de vensters alleen vooruit schuiven.
+    Retourneert (state, aantal bijgewerkte artikelen).
+    """
+    state = StreamingTrends.load(state_dir, windows)
+    # Alleen artikelen binnen de bewaarde horizon kunnen de vensters nog veranderen; een
+    # incrementele run leest dus alleen de recente partities of het recente deel van de
+    # score-index
+    start_dt = None
+    if state.as_of is not None:
+        start_dt = datetime.combine(state.as_of - timedelta(days=state.horizon - 1), datetime.min.time())
+    if corpus_dir:
+        articles = iter_corpus_articles(corpus_dir, start_dt)
+    else:
+        articles = iter_scraper_articles(scraper_dir, start_dt)
+    articles = sorted(articles, key=lambda article: (article[1], article[0]))
+    updated = 0
+    for article_id, day, score, signature, load_tokens in articles:
+        if state.ingest(article_id, day, score, signature, load_tokens):
+            updated += 1
+    state.save(state_dir)
+    return state, updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Werkt de trending termen over glijdende vensters bij met nieuwe artikelen.")
+    parser.add_argument("--state_dir", type=str, default="stream_state",
+                        help="Map voor de streaming-toestand en de snapshots.")
+    parser.add_argument("--scraper_dir", type=str, default="./data",
+                        help="Map met de artikelen en scraped_data CSV's van pull_article_info.py.")
+    parser.add_argument("--corpus_dir", type=str, default=None,
+                        help="Lees de artikelen uit deze Parquet corpus in plaats van scraper_dir.")
+    parser.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS),
+                        help="Venstergroottes in dagen.")
+    parser.add_argument("--top", type=int, default=25,
+                        help="Aantal termen per venster in de snapshot.")
+    parser.add_argument("--ai_terms", action="store_true",
+                        help="Beperk de snapshot tot de AI-trefwoorden uit de trendanalyse.")
+    add_nltk_argument(parser)
+    args = parser.parse_args()
+    check_resources(["stopwords"], download=args.nltk_download)
+    state, updated = update_stream(args.state_dir, args.scraper_dir, args.corpus_dir, args.windows)
+    terms = None
+    if args.ai_terms:
+        from trend_analysis import AI_KEYWORDS
+        terms = AI_KEYWORDS
+    snapshot = state.snapshot(args.top, terms)
+    if snapshot["as_of"]:
+        snapshot_path = os.path.join(args.state_dir, f"trends_{snapshot['as_of']}.json")
+        with open(snapshot_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=2)
+        print(f"{updated} artikelen verwerkt; snapshot tot en met {snapshot['as_of']} in {snapshot_path}")
+    for w, rows in snapshot["windows"].items():
+        print(f"\nVenster {w} dagen:")
+        for row in rows[:10]:
+            print(f"  {row['term']}: groei {row['growth']:.2f} ({row['previous']:.0f} -> {row['current']:.0f})")
@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+COUNTS_FILE = "counts.npz"
+META_FILE = "meta.json"
+
+
+def text_signature(text):
+    """Signatuur van een document dat al in het geheugen staat."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_signature(path):
+    """Signatuur van een document op schijf (grootte en mtime), zonder het te lezen."""
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class TermIndex:
+    """
+    Per-document termfrequenties als sparse doc×term matrix (CSR) met vocabulaire.
+
+    De index wordt per corpus in index_dir bewaard en incrementeel bijgewerkt: bij
+    update() worden alleen nieuwe of gewijzigde documenten (volgens hun signatuur)
+    opnieuw getokeniseerd. Kolommen staan in volgorde van eerste voorkomen.
+    """
+
+    def __init__(self, index_dir, tokenize):
+        self.index_dir = index_dir
+        self.tokenize = tokenize
+        self.doc_ids = []
+        self.signatures = []
+        self.vocabulary = []
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self._doc_rows = {}
+        self._term_cols = {}
+        self._dirty = False
+        if os.path.exists(os.path.join(index_dir, META_FILE)):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.index_dir, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            counts = sparse.load_npz(os.path.join(
+                self.index_dir, COUNTS_FILE)).tocsr()
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Term-index in {self.index_dir} is onleesbaar en wordt opnieuw opgebouwd: {e}")
+            return
+        self.doc_ids = meta["doc_ids"]
+        self.signatures = meta["signatures"]
+        self.vocabulary = meta["vocabulary"]
+        self.counts = counts
+        self._doc_rows = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        self._term_cols = {term: j for j, term in enumerate(self.vocabulary)}
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        sparse.save_npz(os.path.join(self.index_dir, COUNTS_FILE), self.counts)
+        tmp_path = os.path.join(self.index_dir, META_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"doc_ids": self.doc_ids, "signatures": self.signatures,
+                       "vocabulary": self.vocabulary}, f)
+        os.replace(tmp_path, os.path.join(self.index_dir, META_FILE))
+        self._dirty = False
+
+    def update(self, documents):
+        """
+        Werkt de index bij voor documents: een iterable van (doc_id, signature, load_text)
+        waarbij load_text() alleen wordt aangeroepen voor nieuwe of gewijzigde documenten.
+        Retourneert een array met de rijnummers van de documenten, in dezelfde volgorde.
+        """
+        rows = []
+        changed_rows, new_rows = {}, []
+        indices, data, indptr = [], [], [0]
+        for doc_id, signature, load_text in documents:
+            row = self._doc_rows.get(doc_id)
+            # Ook een document dat eerder in dezelfde batch al is toegevoegd wordt hergebruikt
+            if row is not None and (row >= len(self.signatures) or self.signatures[row] == signature):
+                rows.append(row)
+                continue
+            counter = Counter(self.tokenize(load_text()))
+            for term, count in counter.items():
+                col = self._term_cols.get(term)
+                if col is None:
+                    col = len(self.vocabulary)
+                    self._term_cols[term] = col
+                    self.vocabulary.append(term)
+                indices.append(col)
+                data.append(count)
+            indptr.append(len(indices))
+            position = len(indptr) - 2
+            if row is None:
+                row = len(self.doc_ids) + len(new_rows)
+                new_rows.append((doc_id, signature, position))
+                self._doc_rows[doc_id] = row
+            else:
+                self.signatures[row] = signature
+                changed_rows[row] = position
+            rows.append(row)
+        if len(indptr) > 1:
+            fresh = sparse.csr_matrix((np.array(data, dtype=np.int32), np.array(indices, dtype=np.int32),
+                                       np.array(indptr, dtype=np.int64)),
+                                      shape=(len(indptr) - 1, len(self.vocabulary)))
+            self._apply(fresh, changed_rows, new_rows)
+        return np.array(rows, dtype=np.int64)
+
+    def _apply(self, fresh, changed_rows, new_rows):
+        n_docs, n_terms = self.counts.shape[0], fresh.shape[1]
+        counts = self.counts
+        if counts.shape[1] < n_terms:
+            # De vocabulaire groeit alleen aan het eind, dus bestaande kolommen blijven geldig
+            counts = sparse.csr_matrix(
+                (counts.data, counts.indices, counts.indptr), shape=(n_docs, n_terms))
+        if changed_rows:
+            # Gewijzigde documenten: oude rij leegmaken en de nieuwe tellingen erop tellen
+            rows = np.fromiter(changed_rows.keys(), dtype=np.int64)
+            positions = np.fromiter(changed_rows.values(), dtype=np.int64)
+            keep = np.ones(n_docs, dtype=np.int32)
+            keep[rows] = 0
+            selector = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, positions)),
+                                         shape=(n_docs, fresh.shape[0]))
+            counts = (sparse.diags(keep, dtype=np.int32) @ counts + selector @ fresh).tocsr()
+            counts.eliminate_zeros()
+        if new_rows:
+            counts = sparse.vstack(
+                [counts, fresh[[position for _, _, position in new_rows]]], format="csr")
+            for doc_id, signature, _ in new_rows:
+                self.doc_ids.append(doc_id)
+                self.signatures.append(signature)
+        self.counts = counts.astype(np.int32)
+        self._dirty = True
+
+    def term_totals(self, rows):
+        """Som van de termfrequenties over de gegeven rijen (één waarde per term)."""
+        if len(rows) == 0:
+            return np.zeros(len(self.vocabulary), dtype=np.int64)
+        return np.asarray(self.counts[rows].sum(axis=0)).ravel()
+
+    def top_terms(self, rows, n=10):
+        """
+        De n meest voorkomende termen over de gegeven rijen; bij gelijke aantallen
+        gaat de term voor die als eerste in de corpus voorkwam.
+        """
+        totals = self.term_totals(rows)
+        nonzero = np.flatnonzero(totals)
+        if len(nonzero) == 0:
+            return []
+        order = nonzero[np.argsort(-totals[nonzero], kind="stable")]
+        return [self.vocabulary[j] for j in order[:n]]
+
+    def columns(self, terms):
+        """Kolomnummers van de termen die in de vocabulaire voorkomen, met de termen zelf."""
+        found = [(self._term_cols[t], t) for t in terms if t in self._term_cols]
+        return np.array([c for c, _ in found], dtype=np.int64), [t for _, t in found]
@@ -0,0 +1,93 @@
+"""
+Local stand-in for google.cloud.bigquery.Client, backed by a list of HackerNews items.
+
+It answers the three queries in pull_article_info.py by evaluating them in Python:
+the per-range stories query, the comments-per-story query and the single-pass
+ROW_NUMBER/QUALIFY query with its ARRAY_AGG of comments. Every SQL string is kept in
+`queries` so tests can count jobs.
+"""
+import re
+from datetime import datetime, timezone
+
+import pyarrow as pa
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+class StubRowIterator:
+    def __init__(self, rows, page_size=None):
+        self.rows = rows
+        self.page_size = page_size
+
+    def __iter__(self):
+        return iter([dict(row) for row in self.rows])
+
+    def to_arrow_iterable(self, bqstorage_client=None):
+        size = self.page_size or len(self.rows) or 1
+        for start in range(0, len(self.rows), size):
+            yield pa.RecordBatch.from_pylist(self.rows[start:start + size])
+
+
+class StubQueryJob:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def result(self, page_size=None):
+        return StubRowIterator(self.rows, page_size)
+
+
+class StubBigQueryClient:
+    def __init__(self, items):
+        self.items = items
+        self.queries = []
+
+    def query(self, sql):
+        self.queries.append(sql)
+        if "ROW_NUMBER()" in sql:
+            return StubQueryJob(self._top_stories_with_comments(sql))
+        if "type = 'comment'" in sql:
+            return StubQueryJob(self._comments(sql))
+        return StubQueryJob(self._stories(sql))
+
+    def _date_range(self, sql):
+        start, end = re.search(r"BETWEEN '(\d{4}-\d{2}-\d{2})' AND '(\d{4}-\d{2}-\d{2})'", sql).groups()
+        return datetime.strptime(start, "%Y-%m-%d").date(), datetime.strptime(end, "%Y-%m-%d").date()
+
+    def _story_row(self, item):
+        post_time = _timestamp(item["time"])
+        return {"id": item["id"], "title": item.get("title"), "url": item.get("url"),
+                "text": item.get("text"), "score": item.get("score"),
+                "num_comments": item.get("descendants"), "post_date": post_time.date(),
+                "post_time": post_time}
+
+    def _comment_row(self, item):
+        return {"id": item["id"], "parent": item["parent"], "text": item.get("text"),
+                "post_time": _timestamp(item["time"])}
+
+    def _stories(self, sql):
+        start, end = self._date_range(sql)
+        return [self._story_row(item) for item in self.items
+                if item["type"] == "story" and start <= _timestamp(item["time"]).date() <= end]
+
+    def _comments(self, sql):
+        parents = {int(i) for i in re.search(r"parent IN \(([\d,]+)\)", sql).group(1).split(",")}
+        return [self._comment_row(item) for item in self.items
+                if item["type"] == "comment" and item["parent"] in parents]
+
+    def _top_stories_with_comments(self, sql):
+        top_n = int(re.search(r"QUALIFY ranking <= (\d+)", sql).group(1))
+        by_day = {}
+        for row in self._stories(sql):
+            by_day.setdefault(row["post_date"], []).append(row)
+        rows = []
+        for day in sorted(by_day):
+            ranked = sorted(by_day[day], key=lambda r: (-(r["score"] or 0), r["id"]))[:top_n]
+            for ranking, row in enumerate(ranked, start=1):
+                comments = sorted((item for item in self.items
+                                   if item["type"] == "comment" and item["parent"] == row["id"]),
+                                  key=lambda item: item["time"])
+                rows.append(dict(row, ranking=ranking,
+                                 comments=[self._comment_row(item) for item in comments]))
+        return rows
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cluster_model import assign_topics  # noqa: E402
+
+OPTIONS = {"min_cluster_size": 10, "min_samples": 1, "reduce": "none", "n_components": 50, "normalize": False}
+
+
+def blobs(rng, n, centers, noise=0):
+    """n punten rond de centra, plus noise verspreide punten."""
+    labels = rng.integers(len(centers), size=n)
+    X = centers[labels] + rng.normal(scale=0.3, size=(n, centers.shape[1]))
+    scattered = rng.uniform(-6, 6, size=(noise, centers.shape[1]))
+    return np.vstack([X, scattered]).astype(np.float32)
+
+
+def test_few_in_distribution_articles_do_not_trigger_refit(tmp_path):
+    rng = np.random.default_rng(0)
+    centers = rng.normal(scale=4, size=(3, 8))
+    X = blobs(rng, 300, centers, noise=60)
+    ids = [f"2024-01/2024-01-01_{i}" for i in range(len(X))]
+    _, _, refitted = assign_topics(X, ids, str(tmp_path), OPTIONS)
+    assert refitted
+
+    for day, n in enumerate((2, 5, 12), start=2):
+        X_new = blobs(rng, n, centers)
+        new_ids = [f"2024-01/2024-01-{day:02d}_{i}" for i in range(n)]
+        _, _, refitted = assign_topics(np.vstack([X, X_new]), ids + new_ids, str(tmp_path), OPTIONS)
+        assert not refitted
+        X, ids = np.vstack([X, X_new]), ids + new_ids
+
+
+def test_shifted_articles_trigger_refit(tmp_path):
+    rng = np.random.default_rng(1)
+    centers = rng.normal(scale=4, size=(3, 8))
+    X = blobs(rng, 300, centers)
+    ids = [f"2024-01/2024-01-01_{i}" for i in range(len(X))]
+    assign_topics(X, ids, str(tmp_path), OPTIONS)
+    X_new = blobs(rng, 50, centers + 10)
+    new_ids = [f"2024-01/2024-01-02_{i}" for i in range(50)]
+    _, _, refitted = assign_topics(np.vstack([X, X_new]), ids + new_ids, str(tmp_path), OPTIONS)
+    assert refitted
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_store import read_records, upsert_articles  # noqa: E402
+
+
+def test_upsert_fills_missing_columns_for_same_story(tmp_path):
+    upsert_articles(tmp_path, [{"id": "2024-01/2024-01-01_1", "date": "2024-01-01", "rank": 1, "story_id": 1,
+                                "title": "Oud", "raw_text": "tekst", "embedding": np.ones(3, np.float32)}])
+    upsert_articles(tmp_path, [{"id": "2024-01/2024-01-01_1", "date": "2024-01-01", "rank": 1, "story_id": 1,
+                                "score": 10}])
+    [row] = read_records(tmp_path)
+    assert row["score"] == 10
+    assert row["raw_text"] == "tekst"
+    assert list(row["embedding"]) == [1, 1, 1]
+
+
+def test_upsert_replaces_row_when_rank_holds_other_story(tmp_path):
+    upsert_articles(tmp_path, [{"id": "2024-01/2024-01-01_1", "date": "2024-01-01", "rank": 1, "story_id": 1,
+                                "title": "Oud", "url": "https://a", "raw_text": "oude tekst",
+                                "cleaned_text": "oude tekst", "embedding": np.ones(3, np.float32)}])
+    upsert_articles(tmp_path, [{"id": "2024-01/2024-01-01_1", "date": "2024-01-01", "rank": 1, "story_id": 2,
+                                "title": "Nieuw", "url": "https://b", "score": 5}])
+    [row] = read_records(tmp_path)
+    assert row["story_id"] == 2
+    assert row["title"] == "Nieuw"
+    assert row["raw_text"] is None
+    assert row["cleaned_text"] is None
+    assert row["embedding"] is None
+
+
+def test_upsert_replaces_row_by_url_without_story_id(tmp_path):
+    upsert_articles(tmp_path, [{"id": "2024-01/2024-01-01_1", "date": "2024-01-01", "rank": 1,
+                                "url": "https://a", "raw_text": "oude tekst"}])
+    upsert_articles(tmp_path, [{"id": "2024-01/2024-01-01_1", "date": "2024-01-01", "rank": 1,
+                                "url": "https://b"}])
+    [row] = read_records(tmp_path)
+    assert row["url"] == "https://b"
+    assert row["raw_text"] is None
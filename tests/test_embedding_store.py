@@ -0,0 +1,23 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_store import EmbeddingStore  # noqa: E402
+
+
+def test_append_after_interrupted_write_keeps_rows_aligned(tmp_path):
+    store = EmbeddingStore(str(tmp_path))
+    store.append([("2024-01/2024-01-01_1", "2024-01-01", "2024-01/2024-01-01_1.txt")],
+                 np.full((1, 4), 1, np.float32))
+    # Een onderbroken append: de vectoren zijn geschreven, de indexrijen niet
+    with open(store.vectors_path, "ab") as f:
+        np.full((2, 4), 9, np.float32).tofile(f)
+    store.append([("2024-01/2024-01-02_1", "2024-01-02", "2024-01/2024-01-02_1.txt")],
+                 np.full((1, 4), 2, np.float32))
+    X, ids, _ = store.load()
+    assert ids == ["2024-01/2024-01-01_1", "2024-01/2024-01-02_1"]
+    assert X.tolist() == [[1] * 4, [2] * 4]
+    assert os.path.getsize(store.vectors_path) == 2 * 4 * 4
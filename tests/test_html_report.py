@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_report import ReportWriter  # noqa: E402
+
+
+def test_report_replaced_only_after_success(tmp_path):
+    path = str(tmp_path / "report.html")
+    with ReportWriter(path, "2024-01-01", "2024-01-31"):
+        pass
+    with open(path, encoding="utf-8") as f:
+        complete = f.read()
+    assert complete.rstrip().endswith("</html>")
+    assert not os.path.exists(path + ".tmp")
+
+    with pytest.raises(KeyboardInterrupt):
+        with ReportWriter(path, "2024-02-01", "2024-02-29"):
+            raise KeyboardInterrupt
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == complete
+    with open(path + ".tmp", encoding="utf-8") as f:
+        assert "2024-02-01" in f.read()
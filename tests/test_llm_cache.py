@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_cache import LLMCache  # noqa: E402
+
+
+def age_entry(cache, key, seconds):
+    """Zet created_at van een entry terug, zoals bij een antwoord van seconds geleden."""
+    path = cache._path(key)
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.load(f)
+    entry["created_at"] -= seconds
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entry, f)
+
+
+def test_evict_uses_creation_time_not_last_read(tmp_path):
+    cache = LLMCache(str(tmp_path), max_age=3600)
+    cache.put("a" * 64, '{"x": 1}')
+    cache.put("b" * 64, '{"x": 2}')
+    age_entry(cache, "a" * 64, 7200)
+    # Lezen werkt de mtime bij, maar maakt de entry niet jonger
+    os.utime(cache._path("a" * 64), (time.time(), time.time()))
+    assert cache.evict() == 1
+    assert not os.path.exists(cache._path("a" * 64))
+    assert cache.get("b" * 64) == '{"x": 2}'
+
+
+def test_evict_removes_least_recently_used_over_size(tmp_path):
+    cache = LLMCache(str(tmp_path), max_bytes=1)
+    cache.put("a" * 64, '{"x": 1}')
+    cache.put("b" * 64, '{"x": 2}')
+    os.utime(cache._path("a" * 64), (time.time() - 100, time.time() - 100))
+    cache.max_bytes = os.path.getsize(cache._path("b" * 64))
+    assert cache.evict() == 1
+    assert cache.get("a" * 64) is None
+    assert cache.get("b" * 64) == '{"x": 2}'
@@ -0,0 +1,37 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import normalize  # noqa: E402
+from embedding_store import EmbeddingStore  # noqa: E402
+
+
+class StubModel:
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, **kwargs):
+        return np.ones((len(texts), 4), np.float32)
+
+
+def write_articles(data_dir, n):
+    os.makedirs(data_dir / "2024-01")
+    for rank in range(1, n + 1):
+        (data_dir / "2024-01" / f"2024-01-01_{rank}.txt").write_text(
+            f"Title: Story {rank}\nURL: https://example.com\nScore: 1\n\nSome article text about models {rank}.",
+            encoding="utf-8")
+
+
+def test_articles_missing_from_store_are_embedded_again(tmp_path, monkeypatch):
+    monkeypatch.setattr(normalize, "_model", StubModel())
+    data_dir, output_base = tmp_path / "data", tmp_path / "out"
+    write_articles(data_dir, 3)
+    assert normalize.process_all_articles(str(data_dir), str(output_base), workers=1) == 3
+    assert normalize.process_all_articles(str(data_dir), str(output_base), workers=1) == 0
+
+    # Een store die rijen kwijt is: alleen het eerste artikel staat er nog in
+    store = EmbeddingStore(str(output_base))
+    store.compact({"2024-01/2024-01-01_1"})
+    assert normalize.process_all_articles(str(data_dir), str(output_base), workers=1) == 2
+    _, ids, _ = store.load()
+    assert sorted(ids) == [f"2024-01/2024-01-01_{rank}" for rank in (1, 2, 3)]
@@ -0,0 +1,77 @@
+import os
+import sys
+from datetime import date, datetime, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bigquery_stub import StubBigQueryClient  # noqa: E402
+from pull_article_info import run_per_day, run_single_pass, write_csv  # noqa: E402
+
+START = date(2024, 3, 1)
+END = date(2024, 3, 3)
+
+
+def hn_items():
+    """Stories on three days (none on 2024-03-02), some with comments, one outside the range."""
+    items = []
+    next_id = 1
+    for day, n_stories in ((1, 5), (3, 4), (4, 2)):
+        base = int(datetime(2024, 3, day, 8, tzinfo=timezone.utc).timestamp())
+        for i in range(n_stories):
+            story_id = next_id
+            next_id += 1
+            items.append({"id": story_id, "type": "story", "title": f"Story {story_id}",
+                          "url": f"https://example.com/{story_id}", "text": "Body" if i % 2 else None,
+                          "score": (i * 37) % 11 + i, "descendants": i, "time": base + i * 60})
+            for c in range(i % 3):
+                items.append({"id": 1000 + next_id, "type": "comment", "parent": story_id,
+                              "text": f"Comment {c} on {story_id}", "time": base + i * 60 + 10 + c})
+                next_id += 1
+    return items
+
+
+def tree(folder):
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "r", encoding="utf-8") as f:
+                files[os.path.relpath(path, folder)] = f.read()
+    return files
+
+
+def run_two_pass(folder):
+    stats = {"success": 0}
+    client = StubBigQueryClient(hn_items())
+    rows = run_per_day(client, START, END, 3, str(folder), stats)
+    write_csv(str(folder), START, END, rows)
+    return client, stats
+
+
+@pytest.mark.parametrize("storage_api", [False, True])
+def test_single_pass_matches_two_pass(tmp_path, storage_api):
+    _, two_pass_stats = run_two_pass(tmp_path / "two_pass")
+    stats = {"success": 0}
+    client = StubBigQueryClient(hn_items())
+    rows = run_single_pass(client, START, END, 3, str(tmp_path / "single_pass"), stats, page_size=2,
+                           bqstorage_client=object() if storage_api else None)
+    write_csv(str(tmp_path / "single_pass"), START, END, rows)
+
+    assert len(client.queries) == 1
+    assert stats == two_pass_stats == {"success": 6}
+    expected = tree(tmp_path / "two_pass")
+    assert tree(tmp_path / "single_pass") == expected
+    assert "scraped_data_2024-03-01_2024-03-03.csv" in expected
+    assert any(name.startswith(os.path.join("2024-03", "comments_")) for name in expected)
+
+
+def test_single_pass_collects_corpus_records(tmp_path):
+    records = []
+    client = StubBigQueryClient(hn_items())
+    run_single_pass(client, START, END, 3, str(tmp_path), {"success": 0}, write_text_tree=False,
+                    corpus_records=records)
+    assert [r["id"] for r in records] == [f"2024-03/2024-03-0{d}_{r}" for d in (1, 3) for r in (1, 2, 3)]
+    assert not os.listdir(tmp_path)
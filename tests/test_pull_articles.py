@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_cache import HttpCache, cache_key  # noqa: E402
+from pull_articles import USER_AGENT, get_with_retry, make_session  # noqa: E402
+
+
+class ForbiddenHandler(BaseHTTPRequestHandler):
+    user_agents = []
+
+    def do_GET(self):
+        self.user_agents.append(self.headers.get("User-Agent"))
+        self.send_response(403)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ForbiddenHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/article"
+
+
+def test_403_is_remembered_briefly_and_sent_with_browser_user_agent(tmp_path):
+    server, url = serve()
+    cache = HttpCache(str(tmp_path))
+    try:
+        assert get_with_retry(url, session=make_session(), cache=cache, base_delay=0) is None
+        assert get_with_retry(url, cache=cache, base_delay=0) is None
+    finally:
+        server.shutdown()
+    # De tweede aanroep wordt door de negatieve cache overgeslagen
+    assert ForbiddenHandler.user_agents == [USER_AGENT]
+    assert cache.failure(url) == "status 403"
+
+    # Na een dag mag de URL opnieuw geprobeerd worden, ruim binnen negative_ttl
+    _, _, failed_path = cache._paths(cache_key(url))
+    with open(failed_path, "r", encoding="utf-8") as f:
+        record = json.load(f)
+    record["failed_at"] -= 2 * 24 * 3600
+    with open(failed_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    assert cache.failure(url) is None
+
+
+def test_404_is_remembered_for_negative_ttl(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.mark_failed("https://example.com/gone", "status 404")
+    _, _, failed_path = cache._paths(cache_key("https://example.com/gone"))
+    with open(failed_path, "r", encoding="utf-8") as f:
+        record = json.load(f)
+    record["failed_at"] -= 2 * 24 * 3600
+    with open(failed_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+    assert cache.failure("https://example.com/gone") == "status 404"
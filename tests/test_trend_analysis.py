@@ -0,0 +1,38 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trend_analysis import compute_trends  # noqa: E402
+
+ARTICLES = [("2024-10-01", 1, 2), ("2024-10-02", 1, 3), ("2024-11-01", 1, 20)]
+
+
+def write_scraper_dir(scraper_dir, layout):
+    os.makedirs(scraper_dir)
+    with open(os.path.join(scraper_dir, "scraped_data_2024-10-01_2024-11-30.csv"), "w", encoding="utf-8") as f:
+        f.write("date,filename,ranking,score,num_comments\n")
+        for date_str, rank, score in ARTICLES:
+            f.write(f"{date_str},{date_str}_{rank}.txt,{rank},{score},0\n")
+    for date_str, rank, _ in ARTICLES:
+        folder = {"tree": date_str[:7], "flat": "", "nested": os.path.join("download", date_str[:7])}[layout]
+        os.makedirs(os.path.join(scraper_dir, folder), exist_ok=True)
+        with open(os.path.join(scraper_dir, folder, f"{date_str}_{rank}.txt"), "w", encoding="utf-8") as f:
+            f.write("Title: Robots\nURL: https://example.com\n\nRobotics startups build robotics hardware.")
+
+
+@pytest.mark.parametrize("layout", ["tree", "flat", "nested"])
+def test_scores_from_csv_reach_compute_trends(tmp_path, layout):
+    scraper_dir = str(tmp_path / "scraper")
+    write_scraper_dir(scraper_dir, layout)
+    args = argparse.Namespace(scraper_dir=scraper_dir, corpus_dir=None, verbose=False)
+    results = compute_trends(args, datetime(2024, 10, 1), datetime(2024, 11, 30), {"robotics"})
+    [(term, growth, month_dict)] = results
+    assert term == "robotics"
+    # Twee keer 'robotics' per artikel, gewogen met de score uit de CSV
+    assert month_dict == {"2024-10": 2 * (2 + 3), "2024-11": 2 * 20}
+    assert growth == pytest.approx((40 - 10) / 10)
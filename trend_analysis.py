@@ -3,20 +3,29 @@ import glob
 import re
 import sys
 from datetime import datetime
-from collections import Counter, defaultdict
+from collections import defaultdict
 
 import numpy as np
-import pandas as pd
-import hdbscan
-import nltk
-from nltk import pos_tag
-from nltk.corpus import stopwords
-from sklearn.metrics.pairwise import cosine_similarity
 
-# Zorg dat de benodigde NLTK-resources beschikbaar zijn
-nltk.download('averaged_perceptron_tagger')
-nltk.download('stopwords')
-stop_words = set(stopwords.words('english'))
+from nltk_resources import english_stop_words, check_resources, add_nltk_argument
+from pos_cache import PosCache, POS_CACHE_FILE
+from clustering import add_clustering_arguments
+from embedding_store import EmbeddingStore, article_id_from_path
+from instrumentation import stats
+# hdbscan, sklearn, scipy, pandas en de NLTK-tagger worden pas in de functies die ze
+# nodig hebben geïmporteerd, zodat importeren en --help direct reageren
+
+# Benodigde NLTK-resources; __main__ en main.py controleren ze bij het opstarten
+NLTK_RESOURCES = ("stopwords", "averaged_perceptron_tagger_eng")
+
+# Term-indexen naast de genormaliseerde teksten, de ruwe artikelen en de corpus; mappen
+# met een punt worden door de tekstboom- en Parquet-readers overgeslagen
+TERM_INDEX_DIR = ".term_index"
+CORPUS_CLEANED_INDEX_DIR = ".term_index_cleaned"
+CORPUS_RAW_INDEX_DIR = ".term_index_raw"
+# Termen waaraan AI-gerelateerde clusters worden herkend
+AI_KEYWORDS = frozenset({"ai", "openai", "llm", "language",
+                         "transformer", "neural", "machine", "learning"})
 
 
 def parse_dates(start_date, end_date):
@@ -45,6 +54,18 @@ def is_file_in_daterange(file_path, start_dt, end_dt):
 
 
 def load_vectors(vec_dir, start_dt, end_dt):
+    """
+    Laadt de embedding vectoren binnen de datumrange en retourneert (X, text_paths).
+    Als er een EmbeddingStore in vec_dir staat wordt de range via de index
+    geselecteerd; anders worden de losse .vec bestanden (oud formaat) ingelezen.
+    """
+    store = EmbeddingStore(vec_dir)
+    if store.exists():
+        X, ids, text_paths = store.load(start_dt, end_dt)
+        if X.shape[0] == 0:
+            raise ValueError(
+                "Geen vectoren binnen de opgegeven datumrange gevonden in de embedding store.")
+        return X, text_paths
     vec_files = glob.glob(os.path.join(vec_dir, "**", "*.vec"), recursive=True)
     if not vec_files:
         raise ValueError(
@@ -58,11 +79,13 @@ def load_vectors(vec_dir, start_dt, end_dt):
     file_paths = []
     for vf in valid_files:
         with open(vf, "r", encoding="utf-8") as f:
+            stats.count("bytes_read", os.fstat(f.fileno()).st_size)
             vec_str = f.read().strip()
             vec_values = [float(x) for x in re.split(r'[\s,]+', vec_str) if x]
             if vec_values:
                 vectors.append(np.array(vec_values))
-                file_paths.append(vf)
+                # Het tekstbestand heeft dezelfde naam zonder de .vec extensie
+                file_paths.append(vf[:-4])
     if not vectors:
         raise ValueError(
             "Geen vectoren ingelezen uit de .vec bestanden (na filtering).")
@@ -74,52 +97,36 @@ def clean_and_tokenize(text):
     text = re.sub(r'<[^>]+>', ' ', text)
     text = re.sub(r'[^a-zA-Z0-9\s]', ' ', text)
     tokens = text.lower().split()
+    stop_words = english_stop_words()
     tokens = [t for t in tokens if t not in stop_words]
     return tokens
 
 
 def read_scores(scraper_dir, start_dt, end_dt):
-    csv_files = glob.glob(os.path.join(scraper_dir, "scraped_data_*.csv"))
-    relevant_csvs = []
-    for cf in csv_files:
-        cf_name = os.path.basename(cf)
-        match = re.match(
-            r"scraped_data_(\d{4}-\d{2}-\d{2})_(\d{4}-\d{2}-\d{2})\.csv", cf_name)
-        if match:
-            csv_start = datetime.strptime(match.group(1), "%Y-%m-%d")
-            csv_end = datetime.strptime(match.group(2), "%Y-%m-%d")
-            if csv_end >= start_dt and csv_start <= end_dt:
-                relevant_csvs.append(cf)
-    all_scores = []
-    for cf in relevant_csvs:
-        try:
-            df = pd.read_csv(cf)
-            all_scores.append(df)
-        except Exception as e:
-            print(f"Fout bij inlezen {cf}: {e}")
-    if all_scores:
-        scores_df = pd.concat(all_scores, ignore_index=True)
-        scores_df["date_dt"] = pd.to_datetime(
-            scores_df["date"], format="%Y-%m-%d", errors="coerce")
-        scores_df = scores_df.dropna(subset=["date_dt"])
-        scores_df = scores_df[(scores_df["date_dt"] >= start_dt) & (
-            scores_df["date_dt"] <= end_dt)]
-        score_map = {}
-        for _, row in scores_df.iterrows():
-            fname = row["filename"]
-            score_map[fname] = {"score": row["score"],
-                                "date_dt": row["date_dt"]}
-    else:
-        score_map = {}
-    return score_map
+    """
+    Retourneert {article_id: {"score": ..., "date_dt": ...}} voor de datumrange.
+    De onderliggende ScoreIndex wordt één keer opgebouwd, bewaard en gedeeld.
+    """
+    from score_index import get_score_index
+    return get_score_index(scraper_dir).score_map(start_dt, end_dt)
 
 
-def filter_candidate_terms(terms):
-    try:
-        tagged = pos_tag(list(terms))
-    except LookupError:
-        nltk.download('averaged_perceptron_tagger_eng')
-        tagged = pos_tag(list(terms))
+def read_corpus_scores(corpus_dir, start_dt, end_dt):
+    """Zoals read_scores, maar met de scores uit de Parquet corpus."""
+    from corpus_store import read_records
+    return {row["id"]: {"score": row["score"] or 0,
+                        "date_dt": datetime.combine(row["date"], datetime.min.time())}
+            for row in read_records(corpus_dir, start_dt, end_dt, columns=["id", "date", "rank", "score"])}
+
+
+def filter_candidate_terms(terms, cache_path=None):
+    """
+    Houdt de termen over die geen werkwoord, getal of te kort zijn. De POS-tags komen
+    uit de bewaarde PosCache in cache_path; alleen nieuwe termen worden getagd.
+    """
+    pos_cache = PosCache(cache_path)
+    tagged = pos_cache.tag(terms)
+    pos_cache.save()
     filtered = set()
     for word, tag in tagged:
         if tag.startswith("VB"):
@@ -130,48 +137,141 @@ def filter_candidate_terms(terms):
     return filtered
 
 
-def run_analysis(args):
-    # Parse datumargumenten
-    start_dt, end_dt = parse_dates(args.start_date, args.end_date)
-    # 1. Inlezen en filteren van vectoren
-    X, file_paths = load_vectors(args.vec_dir, start_dt, end_dt)
-    # 2. Clustering met HDBSCAN
-    clusterer = hdbscan.HDBSCAN(
-        min_cluster_size=args.min_cluster_size,
-        min_samples=args.min_samples,
-        metric='euclidean'
-    )
-    cluster_labels = clusterer.fit_predict(X)
-    # 3. Koppel tekstbestanden aan clusters
-    cluster_to_texts = defaultdict(list)
-    cluster_to_files = defaultdict(list)
-    for fpath, label in zip(file_paths, cluster_labels):
-        if label == -1:
-            continue
-        text_file = fpath[:-4]
-        text_content = ""
-        if os.path.exists(text_file):
-            with open(text_file, "r", encoding="utf-8") as f:
-                text_content = f.read().strip()
-        cluster_to_texts[label].append(text_content)
-        cluster_to_files[label].append(text_file)
+def read_text(path):
+    """Leest een tekstbestand (gestript); een ontbrekend bestand geeft een lege tekst."""
+    if not os.path.exists(path):
+        return ""
+    with open(path, "r", encoding="utf-8") as f:
+        stats.count("bytes_read", os.fstat(f.fileno()).st_size)
+        return f.read().strip()
+
+
+def file_document(doc_id, path):
+    """(doc_id, signature, load_text) voor TermIndex.update, voor een tekstbestand."""
+    from term_index import file_signature
+    signature = file_signature(path) if os.path.exists(path) else ""
+    return doc_id, signature, lambda: read_text(path)
+
+
+def text_document(doc_id, text):
+    """(doc_id, signature, load_text) voor TermIndex.update, voor een tekst in het geheugen."""
+    from term_index import text_signature
+    return doc_id, text_signature(text), lambda: text
+
+
+def iter_raw_articles(scraper_dir, start_dt, end_dt):
+    """
+    Geeft (article_id, year_month, file_path) voor alle ruwe artikelbestanden in
+    scraper_dir binnen de periode.
+    """
+    for root, dirs, files in os.walk(scraper_dir):
+        for file in files:
+            if file.endswith(".txt"):
+                file_path = os.path.join(root, file)
+                match = re.match(r'(\d{4}-\d{2}-\d{2})_', file)
+                if not match:
+                    continue
+                date_str = match.group(1)
+                try:
+                    dt = datetime.strptime(date_str, "%Y-%m-%d")
+                    if dt < start_dt or dt > end_dt:
+                        continue
+                    year_month = dt.strftime("%Y-%m")
+                except Exception:
+                    continue
+                article_id = article_id_from_path(
+                    os.path.relpath(file_path, scraper_dir))
+                yield article_id, year_month, file_path
+
+
+def iter_corpus_records(corpus_dir, start_dt, end_dt):
+    """
+    Geeft (article_id, year_month, score, content) voor de artikelen binnen de periode
+    uit de Parquet corpus, in hetzelfde tekstformaat als de artikelbestanden.
+    """
+    from corpus_store import read_records, format_article
+    columns = ["id", "date", "rank", "score", "num_comments",
+               "title", "url", "post_time", "raw_text"]
+    for row in read_records(corpus_dir, start_dt, end_dt, columns=columns):
+        yield row["id"], row["date"].strftime("%Y-%m"), row["score"] or 0, format_article(row).strip()
+
+
+def cluster_articles(args, X, doc_ids, clustering_options, algorithm, core_dist_n_jobs, cluster_model_dir):
+    """
+    Clustert de artikelen met HDBSCAN, of wijst ze toe via het bewaarde clustermodel in
+    cluster_model_dir. Retourneert (cluster_labels, probabilities); de lidmaatschapskansen
+    zijn alleen bekend na een nieuwe fit op precies deze artikelen en anders None.
+    """
+    from clustering import cluster_vectors
+    probabilities = None
+    if cluster_model_dir:
+        # Bewaard model: alleen nieuwe artikelen worden toegewezen, topic-id's blijven stabiel
+        from cluster_model import assign_topics
+        cluster_labels, _, _ = assign_topics(
+            X, doc_ids, cluster_model_dir, clustering_options,
+            max_noise_ratio=getattr(args, "max_noise_ratio", 0.5),
+            max_drift=getattr(args, "max_drift", 0.5),
+            refit=getattr(args, "refit", False),
+            algorithm=algorithm, core_dist_n_jobs=core_dist_n_jobs,
+            verbose=getattr(args, "verbose", False))
+    else:
+        cluster_labels, clusterer = cluster_vectors(
+            X, algorithm=algorithm, core_dist_n_jobs=core_dist_n_jobs, **clustering_options)
+        probabilities = getattr(clusterer, "probabilities_", None)
+    return cluster_labels, probabilities
+
+
+def clusters_fingerprint(args, X, doc_ids, clustering_options, algorithm, cluster_model_dir):
+    """
+    Vingerafdruk van de invoer van de clustering. Met een bewaard clustermodel tellen ook
+    de drempels voor opnieuw fitten en de bestanden van het model (niet alleen de map) mee.
+    """
+    from run_checkpoints import fingerprint, tree_signature
+    model_state = None
+    if cluster_model_dir:
+        model_state = {
+            "max_noise_ratio": getattr(args, "max_noise_ratio", 0.5),
+            "max_drift": getattr(args, "max_drift", 0.5),
+            "files": tree_signature(cluster_model_dir),
+        }
+    return fingerprint(doc_ids, X, clustering_options, algorithm, model_state)
+
+
+def find_ai_clusters(args, X, doc_ids, file_paths, texts, cluster_labels, probabilities):
+    """
+    Bepaalt de top-termen per cluster en selecteert de AI-gerelateerde clusters.
+    Retourneert (ai_cluster_docs, ai_cluster_files, ai_cluster_info).
+    """
+    from clustering import representative_order
+    from term_index import TermIndex
+    corpus_dir = getattr(args, "corpus_dir", None)
+    # 3. Koppel documenten aan clusters. De termtellingen komen uit de term-index, waarin
+    # alleen nieuwe of gewijzigde documenten opnieuw getokeniseerd worden.
+    clustered = [i for i, label in enumerate(cluster_labels) if label != -1]
+    if texts is not None:
+        # In de corpus staat de genormaliseerde tekst al bij de vector
+        cleaned_index = TermIndex(os.path.join(
+            corpus_dir, CORPUS_CLEANED_INDEX_DIR), clean_and_tokenize)
+        rows = cleaned_index.update(text_document(doc_ids[i], texts[i]) for i in clustered)
+    else:
+        cleaned_index = TermIndex(os.path.join(
+            args.vec_dir, TERM_INDEX_DIR), clean_and_tokenize)
+        rows = cleaned_index.update(file_document(doc_ids[i], file_paths[i]) for i in clustered)
+    cleaned_index.save()
+    cluster_members = defaultdict(list)
+    cluster_rows = defaultdict(list)
+    for i, row in zip(clustered, rows):
+        cluster_members[cluster_labels[i]].append(i)
+        cluster_rows[cluster_labels[i]].append(row)
     # Bereken top-termen per cluster
-    cluster_top_terms = {}
-    for label, texts in cluster_to_texts.items():
-        all_tokens = []
-        for t in texts:
-            tokens = clean_and_tokenize(t)
-            all_tokens.extend(tokens)
-        freq = Counter(all_tokens)
-        top_terms = [term for term, count in freq.most_common(10)]
-        cluster_top_terms[label] = top_terms
+    cluster_top_terms = {label: cleaned_index.top_terms(label_rows, 10)
+                         for label, label_rows in cluster_rows.items()}
     if getattr(args, "verbose", False):
         print("\nTop-termen per cluster:")
         for lbl, top_terms in cluster_top_terms.items():
             print(f"Cluster {lbl}: {top_terms}")
     # Stap 4: Bepaal AI-clusters op basis van top-termen
-    ai_keywords = {"ai", "openai", "llm", "language",
-                   "transformer", "neural", "machine", "learning"}
+    ai_keywords = set(AI_KEYWORDS)
     ai_clusters = {}
     for label, top_terms in cluster_top_terms.items():
         if any(term in ai_keywords for term in top_terms):
@@ -179,61 +279,185 @@ def run_analysis(args):
     if getattr(args, "verbose", False):
         print("\nClusters vermoedelijk gerelateerd aan AI (op basis van top-termen):")
         for label, top_terms in ai_clusters.items():
-            num_articles = len(cluster_to_texts[label])
+            num_articles = len(cluster_members[label])
             print(
                 f"Cluster {label} ({num_articles} artikelen): Top-termen: {top_terms}")
-    # Verzamel de documenten (tekst) en bestandsnamen van de AI-gerelateerde clusters
-    ai_cluster_docs = {label: cluster_to_texts[label] for label in ai_clusters}
-    ai_cluster_files = {
-        label: cluster_to_files[label] for label in ai_clusters}
+    # Verzamel de documenten (tekst) en bestandsnamen van de AI-gerelateerde clusters;
+    # alleen deze teksten worden nog ingelezen
+    ai_cluster_docs = {}
+    ai_cluster_files = {}
+    ai_cluster_info = {}
+    for label, top_terms in ai_clusters.items():
+        members = cluster_members[label]
+        if texts is not None:
+            ai_cluster_docs[label] = [texts[i].strip() for i in members]
+        else:
+            ai_cluster_docs[label] = [read_text(file_paths[i]) for i in members]
+        ai_cluster_files[label] = [file_paths[i] for i in members]
+        # De meest representatieve artikelen eerst, voor de fragmenten in de LLM-prompt
+        order = representative_order(
+            X[members], probabilities[members] if probabilities is not None else None)
+        ai_cluster_info[label] = {"top_terms": top_terms, "representative_order": order}
+    return ai_cluster_docs, ai_cluster_files, ai_cluster_info
+
+
+def compute_trends(args, start_dt, end_dt, candidate_terms):
+    """
+    Groei per kandidaat-term over de ruwe artikelen in de periode, gewogen met de scores.
+    Retourneert de trendresultaten als gesorteerde lijst (term, growth, month_dict).
+    """
+    from term_index import TermIndex
+    from trend_engine import compute_term_trends
+    corpus_dir = getattr(args, "corpus_dir", None)
     # Stap 5: Lees CSV-bestanden met scores en maak een score_map
-    score_map = read_scores(args.scraper_dir, start_dt, end_dt)
+    # (met een corpus staan de scores in de corpus zelf)
+    with stats.stage("read_scores"):
+        score_map = {} if corpus_dir else read_scores(
+            args.scraper_dir, start_dt, end_dt)
+    # Stap 6: Term-based trendanalyse (alleen documenten binnen de periode), gevectoriseerd
+    # over de doc×term matrix van de ruwe artikelen
+    doc_months, scores = [], []
+    if corpus_dir:
+        raw_index = TermIndex(os.path.join(
+            corpus_dir, CORPUS_RAW_INDEX_DIR), clean_and_tokenize)
+        documents = []
+        for article_id, year_month, score, content in iter_corpus_records(corpus_dir, start_dt, end_dt):
+            documents.append(text_document(article_id, content))
+            doc_months.append(year_month)
+            scores.append(score)
+    else:
+        raw_index = TermIndex(os.path.join(
+            args.scraper_dir, TERM_INDEX_DIR), clean_and_tokenize)
+        documents = []
+        # Staan de bestanden niet in de YYYY-MM/DATE_RANK.txt indeling (bijvoorbeeld plat of
+        # in geneste downloadmappen), dan wordt de score op bestandsnaam gezocht
+        by_filename = {info["filename"]: info for info in score_map.values()}
+        missing = 0
+        for article_id, year_month, file_path in iter_raw_articles(args.scraper_dir, start_dt, end_dt):
+            documents.append(file_document(article_id, file_path))
+            doc_months.append(year_month)
+            info = score_map.get(article_id) or by_filename.get(os.path.basename(file_path))
+            if info is None:
+                missing += 1
+            scores.append(info["score"] if info else 0)
+        if missing:
+            print(f"{missing} van de {len(documents)} artikelen hebben geen score in de "
+                  f"scraped_data CSV's en tellen met score 0 mee.")
+            stats.count("articles_without_score", missing)
+    with stats.stage("term_index"):
+        raw_rows = raw_index.update(documents)
+        raw_index.save()
+        stats.count("documents", len(documents))
+    # De term×maand scores, groei, helling en versnelling voor alle kandidaat-termen tegelijk
+    cols, terms = raw_index.columns(sorted(candidate_terms))
+    trends = compute_term_trends(
+        raw_index.counts[raw_rows][:, cols], terms, doc_months, scores)
+    trend_results = trends.results()
+    if getattr(args, "verbose", False):
+        print("\nHelling en versnelling per term:")
+        for term, term_stats in trends.statistics().items():
+            print(f"{term}: helling {term_stats['slope']:.2f}, versnelling {term_stats['acceleration']:.2f}")
+    return trend_results
+
+
+def run_analysis(args, run_dir=None):
+    """
+    Clustering, AI-topics en trendanalyse voor de periode in args. Met run_dir (een
+    RunDirectory) worden de clusterlabels, de AI-clusters en de trendresultaten als
+    checkpoint bewaard en bij --resume hergebruikt zolang hun invoer niet veranderd is.
+    """
+    from run_checkpoints import fingerprint, tree_signature
+    # Parse datumargumenten
+    start_dt, end_dt = parse_dates(args.start_date, args.end_date)
+    corpus_dir = getattr(args, "corpus_dir", None)
+    # 1. Inlezen en filteren van vectoren
+    texts = None
+    with stats.stage("load_vectors"):
+        if corpus_dir:
+            from corpus_store import load_embeddings
+            X, file_paths, texts = load_embeddings(corpus_dir, start_dt, end_dt)
+            if X.shape[0] == 0:
+                raise ValueError(
+                    "Geen vectoren binnen de opgegeven datumrange gevonden in de corpus.")
+        else:
+            X, file_paths = load_vectors(args.vec_dir, start_dt, end_dt)
+        stats.count("documents", X.shape[0])
+    if texts is not None:
+        doc_ids = file_paths
+    else:
+        doc_ids = [article_id_from_path(os.path.relpath(path, args.vec_dir)) for path in file_paths]
+    # 2. Clustering met HDBSCAN, optioneel na normalisatie en dimensiereductie
+    clustering_options = {
+        "min_cluster_size": args.min_cluster_size,
+        "min_samples": args.min_samples,
+        "reduce": getattr(args, "reduce", "none"),
+        "n_components": getattr(args, "n_components", 50),
+        "normalize": getattr(args, "normalize_vectors", False),
+    }
+    algorithm = getattr(args, "hdbscan_algorithm", "best")
+    core_dist_n_jobs = getattr(args, "core_dist_n_jobs", 4)
+    cluster_model_dir = getattr(args, "cluster_model_dir", None)
+    with stats.stage("clustering"):
+        clusters_fp = clusters_fingerprint(args, X, doc_ids, clustering_options, algorithm, cluster_model_dir)
+        # Met --refit wordt het clustermodel altijd opnieuw gefit, ook bij --resume
+        refit = cluster_model_dir and getattr(args, "refit", False)
+        checkpoint = run_dir.load("clusters", clusters_fp) if run_dir and not refit else None
+        if checkpoint is not None:
+            cluster_labels, probabilities = checkpoint
+            stats.count("checkpoint_reused")
+        else:
+            cluster_labels, probabilities = cluster_articles(
+                args, X, doc_ids, clustering_options, algorithm, core_dist_n_jobs, cluster_model_dir)
+            if cluster_model_dir:
+                # Het model is bijgewerkt; het checkpoint hoort bij de nieuwe toestand ervan
+                clusters_fp = clusters_fingerprint(args, X, doc_ids, clustering_options, algorithm,
+                                                   cluster_model_dir)
+            if run_dir:
+                run_dir.save("clusters", clusters_fp, (cluster_labels, probabilities))
+        stats.count("clusters", len(set(cluster_labels) - {-1}))
+        stats.count("noise_documents", int(np.sum(np.asarray(cluster_labels) == -1)))
+    # 3 en 4. AI-clusters met hun documenten en top-termen
+    with stats.stage("ai_clusters"):
+        ai_fp = fingerprint(clusters_fp, sorted(AI_KEYWORDS))
+        checkpoint = run_dir.load("ai_clusters", ai_fp) if run_dir else None
+        if checkpoint is not None:
+            ai_cluster_docs, ai_cluster_files, ai_cluster_info = checkpoint
+            stats.count("checkpoint_reused")
+        else:
+            ai_cluster_docs, ai_cluster_files, ai_cluster_info = find_ai_clusters(
+                args, X, doc_ids, file_paths, texts, cluster_labels, probabilities)
+            if run_dir:
+                run_dir.save("ai_clusters", ai_fp, (ai_cluster_docs, ai_cluster_files, ai_cluster_info))
+        stats.count("topics", len(ai_cluster_docs))
+        stats.count("documents", sum(len(docs) for docs in ai_cluster_docs.values()))
+    ai_clusters = {label: info["top_terms"] for label, info in ai_cluster_info.items()}
     # Bouw kandidaatlijst op basis van de top-termen uit de AI-clusters
     candidate_terms = set()
     for top_terms in ai_clusters.values():
         candidate_terms.update(top_terms)
-    candidate_terms = filter_candidate_terms(candidate_terms)
+    candidate_terms = filter_candidate_terms(
+        candidate_terms, os.path.join(corpus_dir or args.vec_dir, POS_CACHE_FILE))
     # Gebruik de unie met de oorspronkelijke ai_keywords (zonder extra TF-IDF-filtering)
-    filtered_candidate_terms = candidate_terms.union(ai_keywords)
+    filtered_candidate_terms = candidate_terms.union(AI_KEYWORDS)
     if getattr(args, "verbose", False):
         print("\nTop 10 termen per AI-gerelateerde cluster:")
         for label in sorted(ai_clusters.keys()):
             print(f"Cluster {label}: {ai_clusters[label]}")
-    # Stap 6: Term-based trendanalyse (alleen documenten binnen de periode)
-    term_scores = defaultdict(lambda: defaultdict(float))
-    for root, dirs, files in os.walk(args.scraper_dir):
-        for file in files:
-            if file.endswith(".txt"):
-                file_path = os.path.join(root, file)
-                match = re.match(r'(\d{4}-\d{2}-\d{2})_', file)
-                if not match:
-                    continue
-                date_str = match.group(1)
-                try:
-                    dt = datetime.strptime(date_str, "%Y-%m-%d")
-                    if dt < start_dt or dt > end_dt:
-                        continue
-                    year_month = dt.strftime("%Y-%m")
-                except Exception:
-                    continue
-                score = score_map.get(file, {}).get("score", 0)
-                with open(file_path, "r", encoding="utf-8") as f:
-                    content = f.read().strip()
-                tokens = clean_and_tokenize(content)
-                for token in tokens:
-                    if token in filtered_candidate_terms:
-                        term_scores[token][year_month] += score
-    trend_results = []
-    for term, month_dict in term_scores.items():
-        months = sorted(month_dict.keys())
-        if not months:
-            continue
-        first = month_dict[months[0]]
-        last = month_dict[months[-1]]
-        growth = (last - first) / first if first > 0 else last
-        trend_results.append((term, growth, dict(month_dict)))
-    trend_results.sort(key=lambda x: x[1], reverse=True)
-    return trend_results, ai_cluster_docs, ai_cluster_files
+    # Stap 5 en 6: scores en trendanalyse over de ruwe artikelen; het checkpoint is geldig
+    # zolang de kandidaat-termen, de periode en de bestanden in de databron gelijk zijn
+    with stats.stage("trends"):
+        data_dir = corpus_dir or args.scraper_dir
+        trends_fp = fingerprint(sorted(filtered_candidate_terms), args.start_date, args.end_date,
+                                os.path.abspath(data_dir), tree_signature(data_dir))
+        trend_results = run_dir.load("trends", trends_fp) if run_dir else None
+        if trend_results is None:
+            trend_results = compute_trends(args, start_dt, end_dt, filtered_candidate_terms)
+            if run_dir:
+                run_dir.save("trends", trends_fp, trend_results)
+        else:
+            stats.count("checkpoint_reused")
+        stats.count("candidate_terms", len(filtered_candidate_terms))
+    return trend_results, ai_cluster_docs, ai_cluster_files, ai_cluster_info
 
 
 if __name__ == "__main__":
@@ -241,13 +465,17 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--vec_dir", type=str, default="articles_normalised")
     parser.add_argument("--scraper_dir", type=str, default="./scraper")
+    parser.add_argument("--corpus_dir", type=str, default=None)
     parser.add_argument("--start_date", type=str, required=True)
     parser.add_argument("--end_date", type=str, required=True)
     parser.add_argument("--min_cluster_size", type=int, default=5)
     parser.add_argument("--min_samples", type=int, default=1)
     parser.add_argument("--verbose", action="store_true")
+    add_clustering_arguments(parser)
+    add_nltk_argument(parser)
     args = parser.parse_args()
-    trends, docs, files = run_analysis(args)
+    check_resources(NLTK_RESOURCES, download=args.nltk_download)
+    trends, docs, files, info = run_analysis(args)
     print("Trendresultaten:")
     for term, growth, month_dict in trends:
         print(
@@ -0,0 +1,101 @@
+import numpy as np
+from scipy import sparse
+
+
+def month_index(year_month):
+    """'YYYY-MM' als doorlopend maandnummer, zodat ontbrekende maanden meetellen in de afstand."""
+    year, month = year_month.split("-")
+    return int(year) * 12 + int(month) - 1
+
+
+def month_indicator(doc_months, weights=None):
+    """
+    Sparse doc×maand matrix met per document één waarde (weights, standaard 1) in de
+    kolom van zijn maand. Retourneert (months, matrix) met months oplopend gesorteerd.
+    """
+    months = sorted(set(doc_months))
+    positions = {month: i for i, month in enumerate(months)}
+    n_docs = len(doc_months)
+    cols = np.fromiter((positions[m] for m in doc_months), dtype=np.int64, count=n_docs)
+    if weights is None:
+        weights = np.ones(n_docs, dtype=np.float64)
+    indicator = sparse.csr_matrix((np.asarray(weights, dtype=np.float64), (np.arange(n_docs), cols)),
+                                  shape=(n_docs, len(months)))
+    return months, indicator
+
+
+class TermTrends:
+    """
+    Term×maand scores met per term de groei, helling en versnelling, voor alle termen
+    tegelijk berekend.
+
+    - growth: (laatste - eerste) / eerste over de eerste en laatste maand waarin de term
+      voorkomt (de laatste score als de eerste 0 is), zoals in de oorspronkelijke analyse.
+    - slope: helling van een lineaire fit van de score per maand (ontbrekende maanden 0).
+    - acceleration: tweede afgeleide van een kwadratische fit (0 bij minder dan 3 maanden).
+    """
+
+    def __init__(self, terms, months, scores, present):
+        self.terms = list(terms)
+        self.months = list(months)
+        self.scores = scores
+        self.present = present
+        n_terms, n_months = scores.shape
+        self.growth = np.zeros(n_terms)
+        self.slope = np.zeros(n_terms)
+        self.acceleration = np.zeros(n_terms)
+        if n_terms == 0 or n_months == 0:
+            return
+        rows = np.arange(n_terms)
+        first = scores[rows, present.argmax(axis=1)]
+        last = scores[rows, n_months - 1 - present[:, ::-1].argmax(axis=1)]
+        safe_first = np.where(first > 0, first, 1.0)
+        self.growth = np.where(first > 0, (last - first) / safe_first, last)
+        x = np.array([month_index(m) for m in self.months], dtype=np.float64)
+        if n_months >= 2:
+            centered = x - x.mean()
+            self.slope = (scores - scores.mean(axis=1, keepdims=True)) @ centered / (centered @ centered)
+        if n_months >= 3:
+            centered = x - x.mean()
+            design = np.vander(centered, 3)
+            coefficients, _, _, _ = np.linalg.lstsq(design, scores.T, rcond=None)
+            self.acceleration = 2 * coefficients[0]
+
+    def month_dict(self, i):
+        """{year_month: score} van term i voor de maanden waarin de term voorkomt."""
+        return {self.months[j]: float(self.scores[i, j]) for j in np.flatnonzero(self.present[i])}
+
+    def results(self):
+        """
+        Lijst van (term, growth, month_dict), aflopend gesorteerd op groei; termen die in
+        geen enkele maand voorkomen vallen weg.
+        """
+        found = np.flatnonzero(self.present.any(axis=1)) if len(self.terms) else []
+        results = [(self.terms[i], float(self.growth[i]), self.month_dict(i)) for i in found]
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results
+
+    def statistics(self):
+        """{term: {"growth", "slope", "acceleration"}} voor de termen die voorkomen."""
+        found = np.flatnonzero(self.present.any(axis=1)) if len(self.terms) else []
+        return {self.terms[i]: {"growth": float(self.growth[i]), "slope": float(self.slope[i]),
+                                "acceleration": float(self.acceleration[i])} for i in found}
+
+
+def compute_term_trends(counts, terms, doc_months, scores):
+    """
+    Berekent de trends voor alle termen in één keer uit een sparse doc×term matrix
+    (counts, kolommen in de volgorde van terms) met per document de maand en score:
+    de term×maand scores zijn countsᵀ @ (doc×maand indicator gewogen met de score),
+    het voorkomen per maand is (counts > 0)ᵀ @ indicator.
+    """
+    if counts.shape[0] == 0 or counts.shape[1] == 0:
+        return TermTrends(terms, [], np.zeros((len(terms), 0)), np.zeros((len(terms), 0), dtype=bool))
+    counts = sparse.csr_matrix(counts)
+    months, weighted = month_indicator(doc_months, scores)
+    _, indicator = month_indicator(doc_months)
+    term_scores = (counts.T @ weighted).toarray()
+    occurs = counts.copy()
+    occurs.data = np.ones_like(occurs.data)
+    present = (occurs.T @ indicator).toarray() > 0
+    return TermTrends(terms, months, term_scores, present)